@@ -1,4 +1,61 @@
-from fastapi import Request
+from fastapi import Request, Response, Query, HTTPException
 
 def get_session(request: Request):
-    return request.app.state.session
+    """One session per request; uncommitted work is rolled back when it is closed."""
+    session = request.app.state.session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+class Pagination:
+    """
+    Paging parameters of the list endpoints.
+
+    ?page=N&per_page=M pages with OFFSET. ?after_id=ID&after=<order_by value> continues
+    after the last row of the previous page, as given by the X-Next-After-Id / X-Next-After
+    headers; a NULL order value comes as X-Next-After-Null instead and is passed back as
+    after_null=true. after can be left out when ordering by id. Without page or after_id
+    the whole list is returned, as before.
+    """
+    def __init__(
+        self,
+        page: int = Query(None, ge=1),
+        per_page: int = Query(50, ge=1, le=500),
+        after: str = Query(None),
+        after_id: int = Query(None),
+        after_null: bool = Query(False),
+    ):
+        self.page = page
+        self.per_page = per_page
+        self.after = after
+        self.after_id = after_id
+        self.after_null = after_null
+
+    def apply(self, q, response: Response):
+        """Run the query for this request, setting X-Total-Count when a page was asked for."""
+        if self.page is None and self.after_id is None:
+            return q.all()
+        if self.after_id is not None:
+            if self.after_null:
+                after = (None, self.after_id)
+            elif self.after is not None:
+                after = (self.after, self.after_id)
+            else:
+                after = self.after_id
+            try:
+                page = q.paginate(per_page=self.per_page, after=after)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        else:
+            page = q.paginate(page=self.page, per_page=self.per_page)
+        response.headers["X-Total-Count"] = str(page.total)
+        if page.next_after is not None:
+            value, pk = page.next_after
+            if value is None:
+                response.headers["X-Next-After-Null"] = "true"
+            else:
+                response.headers["X-Next-After"] = str(value)
+            response.headers["X-Next-After-Id"] = str(pk)
+        return page.items
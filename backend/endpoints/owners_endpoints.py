@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
 from pydantic import BaseModel
 from miniorm.session import Session
+from miniorm.filters import col
 from models import Owner, Person, Pet
-from deps import get_session
+from deps import get_session, Pagination
 
 router = APIRouter()
 
@@ -34,20 +35,15 @@ def register_owner(owner: OwnerRegister, session: Session = Depends(get_session)
         "message": "Owner registered successfully"
     }
 
-def _apply_owner_filters(owners, first_name, last_name, email, phone):
-    if first_name:
-        owners = [o for o in owners if o.first_name and first_name.lower() in o.first_name.lower()]
-    if last_name:
-        owners = [o for o in owners if o.last_name and last_name.lower() in o.last_name.lower()]
-    if email:
-        owners = [o for o in owners if o.email and email.lower() in o.email.lower()]
-    if phone:
-        owners = [o for o in owners if o.phone and phone.lower() in (o.phone or "").lower()]
-    return owners
+def _owner_filters(first_name, last_name, email, phone):
+    fields = {"first_name": first_name, "last_name": last_name, "email": email, "phone": phone}
+    return [col(name).contains(value) for name, value in fields.items() if value]
 
 @router.get("/api/owners")
 def get_owners(
+    response: Response,
     session: Session = Depends(get_session),
+    pagination: Pagination = Depends(),
     first_name: str = Query(None),
     last_name: str = Query(None),
     email: str = Query(None),
@@ -55,12 +51,12 @@ def get_owners(
     order_by: str = Query(None),
     order_dir: str = Query("ASC"),
 ):
-    q = session.query(Owner)
+    q = session.query(Owner).with_columns("person_id", "first_name", "last_name", "email", "phone", row_type="named")
+    q = q.filter(*_owner_filters(first_name, last_name, email, phone))
     if order_by and order_by in ("owner_id", "first_name", "last_name", "email", "phone"):
-        col = "person_id" if order_by == "owner_id" else order_by
-        q = q.order_by(col, order_dir or "ASC")
-    owners = q.all()
-    owners = _apply_owner_filters(owners, first_name, last_name, email, phone)
+        order_col = "person_id" if order_by == "owner_id" else order_by
+        q = q.order_by(order_col, order_dir or "ASC")
+    owners = pagination.apply(q, response)
     return [
         {
             "owner_id": o.person_id,
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
 from pydantic import BaseModel
 from miniorm.session import Session
+from miniorm.filters import col
 from models import Pet, Owner, Person
-from deps import get_session
+from deps import get_session, Pagination
 
 router = APIRouter()
 
@@ -13,22 +14,18 @@ class PetCreate(BaseModel):
     breed: str
     birth_date: str
 
-def _apply_pet_filters(pets, owner_id, name, species, breed, birth_date):
-    if owner_id is not None:
-        pets = [p for p in pets if p.owner and p.owner.person_id == owner_id]
-    if name:
-        pets = [p for p in pets if p.name and name.lower() in p.name.lower()]
-    if species:
-        pets = [p for p in pets if p.species and species.lower() in p.species.lower()]
-    if breed:
-        pets = [p for p in pets if p.breed and breed.lower() in p.breed.lower()]
+def _pet_filters(name, species, breed, birth_date):
+    fields = {"name": name, "species": species, "breed": breed}
+    filters = [col(field).contains(value) for field, value in fields.items() if value]
     if birth_date:
-        pets = [p for p in pets if p.birth_date and birth_date in (p.birth_date or "")]
-    return pets
+        filters.append(col("birth_date").contains(birth_date))
+    return filters
 
 @router.get("/api/pets")
 def get_pets(
+    response: Response,
     session: Session = Depends(get_session),
+    pagination: Pagination = Depends(),
     owner_id: int = Query(None),
     name: str = Query(None),
     species: str = Query(None),
@@ -37,29 +34,17 @@ def get_pets(
     order_by: str = Query(None),
     order_dir: str = Query("ASC"),
 ):
-    q = session.query(Pet)
+    q = session.query(Pet).with_columns("pet_id", "owner", "name", "species", "breed", "birth_date", row_type="dict")
+    q = q.filter(*_pet_filters(name, species, breed, birth_date))
     if order_by and order_by in ("pet_id", "owner_id", "name", "species", "breed", "birth_date"):
-        col = "owner" if order_by == "owner_id" else order_by
-        q = q.order_by(col, order_dir or "ASC")
+        order_col = "owner" if order_by == "owner_id" else order_by
+        q = q.order_by(order_col, order_dir or "ASC")
     if owner_id is not None:
         owner = session.get(Owner, owner_id)
         if not owner:
             return []
-        pets = q.filter(owner=owner_id).all()
-    else:
-        pets = q.all()
-    pets = _apply_pet_filters(pets, owner_id, name, species, breed, birth_date)
-    return [
-        {
-            "pet_id": p.pet_id,
-            "owner": p.owner.person_id if p.owner else None,
-            "name": p.name,
-            "species": p.species,
-            "breed": p.breed,
-            "birth_date": p.birth_date
-        }
-        for p in pets
-    ]
+        q = q.filter(owner=owner_id)
+    return pagination.apply(q, response)
 
 @router.post("/api/pets")
 def add_pet(pet: PetCreate, session: Session = Depends(get_session)):
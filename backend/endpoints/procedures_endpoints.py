@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from pydantic import BaseModel
 from miniorm.session import Session
+from miniorm.filters import col
 from models import Procedure
-from deps import get_session
+from deps import get_session, Pagination
 
 router = APIRouter()
 
@@ -16,28 +17,23 @@ class ProcedureUpdate(BaseModel):
     description: str | None = None
     price: float | None = None
 
-def _apply_procedure_filters(procs, name, description, price_min, price_max):
+def _procedure_filters(name, description, price_min, price_max):
+    filters = []
     if name:
-        procs = [p for p in procs if name.lower() in (p.name or "").lower()]
+        filters.append(col("name").contains(name))
     if description:
-        procs = [p for p in procs if description.lower() in (p.description or "").lower()]
+        filters.append(col("description").contains(description))
     if price_min is not None:
-        try:
-            pm = float(price_min)
-            procs = [p for p in procs if p.price is not None and p.price >= pm]
-        except (ValueError, TypeError):
-            pass
+        filters.append(col("price") >= float(price_min))
     if price_max is not None:
-        try:
-            px = float(price_max)
-            procs = [p for p in procs if p.price is not None and p.price <= px]
-        except (ValueError, TypeError):
-            pass
-    return procs
+        filters.append(col("price") <= float(price_max))
+    return filters
 
 @router.get("/api/procedures")
 def get_procedures(
+    response: Response,
     session: Session = Depends(get_session),
+    pagination: Pagination = Depends(),
     name: str = Query(None),
     description: str = Query(None),
     price_min: float = Query(None),
@@ -45,15 +41,11 @@ def get_procedures(
     order_by: str = Query(None),
     order_dir: str = Query("ASC"),
 ):
-    q = session.query(Procedure)
+    q = session.query(Procedure).with_columns("procedure_id", "name", "description", "price", row_type="dict")
+    q = q.filter(*_procedure_filters(name, description, price_min, price_max))
     if order_by and order_by in ("procedure_id", "name", "description", "price"):
         q = q.order_by(order_by, order_dir or "ASC")
-    procs = q.all()
-    procs = _apply_procedure_filters(procs, name, description, price_min, price_max)
-    return [
-        {"procedure_id": p.procedure_id, "name": p.name, "description": p.description, "price": p.price}
-        for p in procs
-    ]
+    return pagination.apply(q, response)
 
 @router.post("/api/procedures")
 def add_procedure(proc: ProcedureCreate, session: Session = Depends(get_session)):
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from pydantic import BaseModel
 from miniorm.session import Session
+from miniorm.filters import col
 from models import Vet, Person
-from deps import get_session
+from deps import get_session, Pagination
 
 router = APIRouter()
 
@@ -13,22 +14,15 @@ class VetCreate(BaseModel):
     phone: str
     license: str
 
-def _apply_vet_filters(vets, first_name, last_name, email, phone, license_):
-    if first_name:
-        vets = [v for v in vets if v.first_name and first_name.lower() in v.first_name.lower()]
-    if last_name:
-        vets = [v for v in vets if v.last_name and last_name.lower() in v.last_name.lower()]
-    if email:
-        vets = [v for v in vets if v.email and email.lower() in v.email.lower()]
-    if phone:
-        vets = [v for v in vets if v.phone and phone.lower() in (v.phone or "").lower()]
-    if license_:
-        vets = [v for v in vets if v.license and license_.lower() in (v.license or "").lower()]
-    return vets
+def _vet_filters(first_name, last_name, email, phone, license_):
+    fields = {"first_name": first_name, "last_name": last_name, "email": email, "phone": phone, "license": license_}
+    return [col(name).contains(value) for name, value in fields.items() if value]
 
 @router.get("/api/vets")
 def get_vets(
+    response: Response,
     session: Session = Depends(get_session),
+    pagination: Pagination = Depends(),
     first_name: str = Query(None),
     last_name: str = Query(None),
     email: str = Query(None),
@@ -37,12 +31,13 @@ def get_vets(
     order_by: str = Query(None),
     order_dir: str = Query("ASC"),
 ):
-    q = session.query(Vet)
+    q = session.query(Vet).with_columns(
+        "person_id", "first_name", "last_name", "email", "phone", "license", row_type="named"
+    ).filter(*_vet_filters(first_name, last_name, email, phone, license))
     if order_by and order_by in ("vet_id", "first_name", "last_name", "email", "phone", "license"):
-        col = "person_id" if order_by == "vet_id" else order_by
-        q = q.order_by(col, order_dir or "ASC")
-    vets = q.all()
-    vets = _apply_vet_filters(vets, first_name, last_name, email, phone, license)
+        order_col = "person_id" if order_by == "vet_id" else order_by
+        q = q.order_by(order_col, order_dir or "ASC")
+    vets = pagination.apply(q, response)
     return [
         {
             "vet_id": v.person_id,
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Response
 from pydantic import BaseModel
 from miniorm.session import Session
+from miniorm.options import joinedload, selectinload
+from miniorm.filters import col
 from models import Visit, Pet, Vet, Procedure
-from deps import get_session
+from deps import get_session, Pagination
 
 router = APIRouter()
 
@@ -15,19 +17,21 @@ class VisitCreate(BaseModel):
     paid: int
 
 
-def _apply_visit_filters(visits, date, reason, paid):
+def _visit_filters(date, reason, paid):
+    filters = []
     if date:
-        visits = [v for v in visits if v.date and date in (v.date or "")]
+        filters.append(col("date").contains(date))
     if reason:
-        visits = [v for v in visits if v.reason and reason.lower() in (v.reason or "").lower()]
+        filters.append(col("reason").contains(reason))
     if paid is not None:
-        p = int(paid) if str(paid).isdigit() else paid
-        visits = [v for v in visits if v.paid == p]
-    return visits
+        filters.append(col("paid") == paid)
+    return filters
 
 @router.get("/api/visits")
 def get_visits(
+    response: Response,
     session: Session = Depends(get_session),
+    pagination: Pagination = Depends(),
     owner_id: int = Query(None),
     vet_id: int = Query(None),
     pet_id: int = Query(None),
@@ -37,22 +41,19 @@ def get_visits(
     order_by: str = Query(None),
     order_dir: str = Query("ASC"),
 ):
-    q = session.query(Visit)
+    q = session.query(Visit).readonly().options(joinedload("pet"), joinedload("vet"), selectinload("procedures"))
+    q = q.filter(*_visit_filters(date, reason, paid))
     if order_by and order_by in ("visit_id", "pet_id", "vet_id", "date", "reason", "paid"):
-        col = "pet" if order_by == "pet_id" else ("vet" if order_by == "vet_id" else order_by)
-        q = q.order_by(col, order_dir or "ASC")
+        order_col = "pet" if order_by == "pet_id" else ("vet" if order_by == "vet_id" else order_by)
+        q = q.order_by(order_col, order_dir or "ASC")
     if owner_id is not None:
-        pets = session.query(Pet).filter(owner=owner_id).all()
-        pet_ids = [p.pet_id for p in pets]
-        all_visits = q.all()
-        visits = [v for v in all_visits if v.pet and v.pet.pet_id in pet_ids]
-    else:
-        visits = q.all()
+        pet_ids = [pet_id for (pet_id,) in session.query(Pet).filter(owner=owner_id).values("pet_id")]
+        q = q.filter(col("pet").in_(pet_ids))
     if vet_id is not None:
-        visits = [v for v in visits if v.vet and v.vet.person_id == vet_id]
+        q = q.filter(vet=vet_id)
     if pet_id is not None:
-        visits = [v for v in visits if v.pet and v.pet.pet_id == pet_id]
-    visits = _apply_visit_filters(visits, date, reason, paid)
+        q = q.filter(pet=pet_id)
+    visits = pagination.apply(q, response)
     return [
         {
             "visit_id": v.visit_id,
@@ -7,8 +7,9 @@ from miniorm import MiniBase
 from miniorm.orm_types import Text, Number
 
 from miniorm.database import DatabaseEngine
-from miniorm.session import Session
-from miniorm.generator import SchemaGenerator
+from miniorm.session_factory import SessionMaker
+from miniorm.migrations import Migrator
+from miniorm.result_cache import ResultCache
 
 
 app = FastAPI()
@@ -19,6 +20,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-After", "X-Next-After-Id", "X-Next-After-Null"],
 )
 
 
@@ -37,11 +39,18 @@ from endpoints.vets_endpoints import router as vets_router
 from endpoints.procedures_endpoints import router as procedures_router
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-engine = DatabaseEngine(os.path.join(BASE_DIR, "miniorm.sqlite"))
-SchemaGenerator().create_all(engine, MiniBase._registry, drop_first=False)
+# owners and vets used to repeat the persons columns, which the CONCRETE mapper reads and writes in persons
+LEGACY_COLUMNS = {table: ["first_name", "last_name", "email", "phone"] for table in ("owners", "vets")}
 
-session = Session(engine)
-app.state.session = session
+DB_PATH = os.environ.get("MINIORM_DB", os.path.join(BASE_DIR, "miniorm.sqlite"))
+
+engine = DatabaseEngine(DB_PATH, profile="read_heavy", result_cache=ResultCache())
+Migrator(
+    engine, MiniBase._registry, scripts_dir=os.path.join(os.path.dirname(DB_PATH), "migrations"),
+    drop_columns=LEGACY_COLUMNS,
+).migrate()
+
+app.state.session_factory = SessionMaker(engine)
 
 app.include_router(persons_router)
 app.include_router(owners_router)
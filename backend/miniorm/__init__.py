@@ -1,10 +1,17 @@
 # MiniORM - A lightweight Python ORM
 from miniorm.base import MiniBase
 from miniorm.session import Session
+from miniorm.session_factory import SessionMaker, ScopedSession
 from miniorm.mapper import Mapper
 from miniorm.query import Query
 from miniorm.database import DatabaseEngine
 from miniorm.filters import col, and_, or_
+from miniorm.options import joinedload, selectinload
+from miniorm.aggregates import func
+from miniorm.indexes import Index
+from miniorm.migrations import Migrator
+from miniorm.entity_cache import EntityCache
+from miniorm.result_cache import ResultCache
 
 __version__ = "0.1.0"
-__all__ = ["MiniBase", "Session", "Mapper", "Query", "DatabaseEngine", "col", "and_", "or_"]
+__all__ = ["MiniBase", "Session", "SessionMaker", "ScopedSession", "Mapper", "Query", "DatabaseEngine", "col", "and_", "or_", "joinedload", "selectinload", "func", "Index", "Migrator", "EntityCache", "ResultCache"]
@@ -0,0 +1,82 @@
+"""
+Aggregate expressions for Query.aggregate() / Query.having(), similar to SQLAlchemy's func.
+"""
+from miniorm.filters import FilterExpression, CombinedFilter
+
+
+class Aggregate:
+    """An aggregate function over a column (or over all rows for COUNT(*))"""
+    FUNCTIONS = ("COUNT", "SUM", "AVG", "MIN", "MAX")
+
+    def __init__(self, function, column_name=None, distinct=False):
+        function = function.upper()
+        if function not in self.FUNCTIONS:
+            raise ValueError(f"Unknown aggregate function: {function}")
+        if column_name is None and function != "COUNT":
+            raise ValueError(f"{function} needs a column")
+        self.function = function
+        self.column_name = column_name
+        self.distinct = distinct
+
+    def __eq__(self, other):
+        return AggregateFilter(self, '=', other)
+
+    def __ne__(self, other):
+        return AggregateFilter(self, '!=', other)
+
+    def __lt__(self, other):
+        return AggregateFilter(self, '<', other)
+
+    def __le__(self, other):
+        return AggregateFilter(self, '<=', other)
+
+    def __gt__(self, other):
+        return AggregateFilter(self, '>', other)
+
+    def __ge__(self, other):
+        return AggregateFilter(self, '>=', other)
+
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        inner = self.column_name or "*"
+        if self.distinct:
+            inner = f"DISTINCT {inner}"
+        return f"<Aggregate {self.function}({inner})>"
+
+
+class AggregateFilter(FilterExpression):
+    """Comparison on an aggregate, used in HAVING"""
+    def __init__(self, aggregate, operator, value):
+        self.aggregate = aggregate
+        self.operator = operator
+        self.value = value
+
+    def __and__(self, other):
+        """Combine with AND operator"""
+        return CombinedFilter(self, other, logic='AND')
+
+    def __or__(self, other):
+        """Combine with OR operator"""
+        return CombinedFilter(self, other, logic='OR')
+
+
+class _Functions:
+    """Factory for aggregates: func.count(), func.sum('paid'), func.count('vet', distinct=True)"""
+    def count(self, column_name=None, distinct=False):
+        return Aggregate("COUNT", column_name, distinct)
+
+    def sum(self, column_name):
+        return Aggregate("SUM", column_name)
+
+    def avg(self, column_name):
+        return Aggregate("AVG", column_name)
+
+    def min(self, column_name):
+        return Aggregate("MIN", column_name)
+
+    def max(self, column_name):
+        return Aggregate("MAX", column_name)
+
+
+func = _Functions()
@@ -0,0 +1,69 @@
+"""
+Data descriptors installed on mapped classes by Mapper._instrument().
+
+Values live in the instance __dict__: reading a column is a dict lookup, only
+relationship attributes and deferred columns (DeferredLoad) run lazy loading.
+Writes through object.__setattr__ store the raw value; change tracking stays in
+MiniBase.__setattr__.
+"""
+from miniorm.instrumented import InstrumentedList
+
+
+class ColumnAttribute:
+    """Column value of an instance, None until set or loaded."""
+    def __init__(self, name, declared):
+        self.name = name
+        # what the class body declared (Column / Relationship), returned on class access
+        self.declared = declared
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self.declared
+        values = obj.__dict__
+        value = values.get(self.name)
+        if value is None and '_unloaded' in values:
+            pending = values['_unloaded']
+            if self.name in pending.names:
+                pending.load()
+                return values.get(self.name)
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+    def __delete__(self, obj):
+        obj.__dict__.pop(self.name, None)
+
+
+class RelationshipAttribute(ColumnAttribute):
+    """Related object or InstrumentedList, loaded through the instance's session on first access."""
+    def __init__(self, name, declared, rel):
+        super().__init__(name, declared)
+        self.rel = rel
+        self.collection = rel.r_type in ("one-to-many", "many-to-many")
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self.declared
+
+        values = obj.__dict__
+        current = values.get(self.name)
+        if self.collection:
+            if isinstance(current, list):
+                return current
+        elif hasattr(current, '_orm_state'):
+            return current
+
+        session = values.get('_session')
+        if session is None:
+            # No session yet - empty list for collections, None for a related object
+            if self.collection:
+                current = values[self.name] = InstrumentedList(obj, self.name)
+                return current
+            return None
+
+        value = obj._load_relationship(session, self.rel)
+        if isinstance(value, list):
+            value = InstrumentedList(obj, self.name, value)
+        values[self.name] = value
+        return value
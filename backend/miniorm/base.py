@@ -1,6 +1,7 @@
 from miniorm.mapper import Mapper
 from miniorm.orm_types import Column, Relationship
 from miniorm.states import ObjectState
+from miniorm.instrumented import InstrumentedList
 
 class MiniBase:
     _registry = {}
@@ -41,65 +42,7 @@ class MiniBase:
         
         cls._mapper = Mapper(cls, columns, relationships, meta_attrs)
         MiniBase._registry[cls] = cls._mapper
-
-    def __getattribute__(self, name):
-        if name.startswith('_') or name in ('mapper_args', 'Meta'):
-            return object.__getattribute__(self, name)
-
-        state = object.__getattribute__(self, '_orm_state')
-        mapper = object.__getattribute__(self, '_mapper')
-        session = object.__getattribute__(self, '_session')
-
-        if name == mapper.pk:
-            val = object.__getattribute__(self, name)
-            if isinstance(val, Column):
-                return self.__dict__.get(name, None)
-            return val
-
-        if name in mapper.relationships:
-            rel = mapper.relationships[name]
-            current_val = self.__dict__.get(name)
-            
-            is_loaded = False
-            if rel.r_type == "many-to-one":
-                is_loaded = current_val is not None and hasattr(current_val, '_orm_state')
-            else:
-                is_loaded = isinstance(current_val, list)
-
-            if not is_loaded:
-                if session:
-                    value = self._load_relationship(session, rel)
-                    object.__setattr__(self, name, value)
-                    return value
-                else:
-                    # No session yet - return empty list for collections, None for many-to-one
-                    if rel.r_type in ("one-to-many", "many-to-many"):
-                        empty_list = []
-                        object.__setattr__(self, name, empty_list)
-                        return empty_list
-                    return None
-
-        val = object.__getattribute__(self, name)
-
-        # Handle Relationship/Column objects for TRANSIENT/PENDING states
-        if state in (ObjectState.TRANSIENT, ObjectState.PENDING):
-            if isinstance(val, Relationship):
-                if val.r_type in ("one-to-many", "many-to-many"):
-                    empty_list = []
-                    object.__setattr__(self, name, empty_list)
-                    return empty_list
-                return None
-            if isinstance(val, (Column, type)) and not name.startswith('_'):
-                return None
-            return val
-
-        if isinstance(val, Column) and state != ObjectState.TRANSIENT:
-            return None
-        
-        if isinstance(val, (Column, type)) and not name.startswith('_'):
-            return None
-
-        return val
+        Mapper._finalized = False
 
     def _load_relationship(self, session, rel):
         print(f"DEBUG: Loading relationship {rel} for {self}...")
@@ -110,16 +53,14 @@ class MiniBase:
         session._internal_loading = True
         try:
             if rel.r_type == "many-to-one":
-                fk_val = object.__getattribute__(self, rel._resolved_fk_name)
-                from miniorm.orm_types import Column
-                if isinstance(fk_val, (Column, type(rel))) or fk_val is None:
+                fk_val = self.__dict__.get(rel._resolved_fk_name)
+                if fk_val is None:
                     return None
                 
                 return session.get(rel._resolved_target, fk_val)
             
-            pk_val = object.__getattribute__(self, self._mapper.pk)
-            from miniorm.orm_types import Column
-            if isinstance(pk_val, Column) or pk_val is None:
+            pk_val = self.__dict__.get(self._mapper.pk)
+            if pk_val is None:
                 return [] if rel.r_type in ("one-to-many", "many-to-many") else None
 
             if rel.r_type == "one-to-many":
@@ -129,7 +70,7 @@ class MiniBase:
                 assoc = rel.association_table
                 return session.query(target_cls).join_m2m(
                     assoc.name, assoc.local_key, assoc.remote_key, pk_val
-                ).all()
+                )._results
         finally:
             session._internal_loading = False
         return None
@@ -147,8 +88,15 @@ class MiniBase:
                         f"for {self.__class__.__name__} after it has been persisted."
                     )
 
+        if mapper and name in mapper.relationships and isinstance(value, list) \
+                and mapper.relationships[name].r_type in ("one-to-many", "many-to-many"):
+            value = InstrumentedList(self, name, value)
+
         object.__setattr__(self, name, value)
 
-        if not name.startswith('_') and mapper and name in mapper.columns:
+        if not name.startswith('_') and mapper and name in mapper.tracked_attributes():
             if getattr(self, '_orm_state', None) == ObjectState.EXPIRED:
                 object.__setattr__(self, '_orm_state', ObjectState.PERSISTENT)
+            session = self.__dict__.get('_session')
+            if session is not None:
+                session._mark_dirty(self, name)
@@ -1,6 +1,11 @@
 import re
 
+from miniorm.statement_cache import StatementCache
+
 class QueryBuilder:
+    # compiled SELECTs by query shape, shared by all sessions
+    select_cache = StatementCache(maxsize=256)
+
     def __init__(self):
         self._safe_ident_pattern = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_#]*$')
 
@@ -9,7 +14,115 @@ class QueryBuilder:
             raise ValueError(f"Unsafe SQL identifier: {identifier}")
         return f'"{identifier}"'
 
-    def build_select(self, mapper, filters, filter_expressions=None, limit=None, offset=None, joins=None, order_by=None):
+    def build_select(self, mapper, filters, filter_expressions=None, limit=None, offset=None, joins=None, order_by=None,
+                     eager_joins=None, link=None, select=None, group_by=None, having=None, deferred=None):
+        """
+        Return (sql, params) for a SELECT. The SQL is compiled once per query shape
+        (see _select_shape) and cached; a repeated shape only collects its parameters.
+        """
+        key = self._select_shape(mapper, filters, filter_expressions, limit, offset, joins, order_by,
+                                 eager_joins, link, select, group_by, having, deferred)
+        sql = self.select_cache.get(key)
+        if sql is None:
+            sql, params = self._compile_select(mapper, filters, filter_expressions, limit, offset, joins, order_by,
+                                               eager_joins, link, select, group_by, having, deferred)
+            self.select_cache.put(key, sql)
+            return sql, params
+
+        params = list(link[1]) if link is not None else []
+        params.extend(val for val in filters.values() if val is not None)
+        for expr in filter_expressions or ():
+            params.extend(self._filter_params(expr))
+        for expr in having or ():
+            params.extend(self._filter_params(expr))
+        if limit is not None:
+            params.append(int(limit))
+        if offset is not None:
+            params.append(int(offset))
+        return sql, tuple(params)
+
+    def _select_shape(self, mapper, filters, filter_expressions, limit, offset, joins, order_by,
+                      eager_joins, link, select, group_by, having, deferred=None):
+        """Everything the SQL text depends on; parameter values are left out."""
+        return (
+            mapper,
+            tuple((name, val is None) for name, val in filters.items()),
+            tuple(self._filter_shape(expr) for expr in filter_expressions or ()),
+            limit is not None, offset is not None,
+            tuple(id(rel) for rel in joins or ()),
+            tuple(order_by or ()),
+            tuple((key, id(rel)) for key, rel in eager_joins or ()),
+            (link[0].name, link[0].local_key, link[0].remote_key, len(link[1])) if link is not None else None,
+            tuple(self._item_shape(item) for item in select) if select is not None else None,
+            tuple(group_by or ()),
+            tuple(self._filter_shape(expr) for expr in having or ()),
+            tuple(sorted(deferred or ())),
+        )
+
+    def _item_shape(self, item):
+        from miniorm.aggregates import Aggregate
+        if isinstance(item, Aggregate):
+            return (item.function, item.column_name, item.distinct)
+        return item
+
+    def _filter_shape(self, expr):
+        from miniorm.filters import (
+            ComparisonFilter, InFilter, NotInFilter, LikeFilter, BetweenFilter, CombinedFilter, NotFilter
+        )
+        from miniorm.aggregates import AggregateFilter
+
+        if isinstance(expr, ComparisonFilter):
+            other = expr.value.column_name if expr.is_field_comparison else None
+            return ("cmp", expr.column_name, expr.operator, other)
+        if isinstance(expr, (InFilter, NotInFilter)):
+            return (type(expr).__name__, expr.column_name, len(expr.values))
+        if isinstance(expr, CombinedFilter):
+            return ("combined", expr.logic, tuple(self._filter_shape(f) for f in expr.filters))
+        if isinstance(expr, NotFilter):
+            return ("not", self._filter_shape(expr.filter_expr))
+        if isinstance(expr, AggregateFilter):
+            return ("having", self._item_shape(expr.aggregate), expr.operator)
+        if isinstance(expr, BetweenFilter):
+            return ("between", expr.column_name)
+        if isinstance(expr, LikeFilter):
+            return ("like", expr.column_name, expr.escape)
+        return (type(expr).__name__, getattr(expr, "column_name", None))
+
+    def _filter_params(self, expr):
+        """Parameters of a filter expression, in the order _build_filter_expression binds them."""
+        from miniorm.filters import (
+            ComparisonFilter, InFilter, NotInFilter, LikeFilter, BetweenFilter, CombinedFilter, NotFilter
+        )
+        from miniorm.aggregates import AggregateFilter
+
+        if isinstance(expr, ComparisonFilter):
+            return [] if expr.is_field_comparison else [expr.value]
+        if isinstance(expr, (InFilter, NotInFilter)):
+            return list(expr.values)
+        if isinstance(expr, LikeFilter):
+            return [expr.pattern]
+        if isinstance(expr, BetweenFilter):
+            return [expr.lower, expr.upper]
+        if isinstance(expr, CombinedFilter):
+            return [p for f in expr.filters for p in self._filter_params(f)]
+        if isinstance(expr, NotFilter):
+            return self._filter_params(expr.filter_expr)
+        if isinstance(expr, AggregateFilter):
+            return [expr.value]
+        return []
+
+    def _compile_select(self, mapper, filters, filter_expressions=None, limit=None, offset=None, joins=None, order_by=None,
+                        eager_joins=None, link=None, select=None, group_by=None, having=None, deferred=None):
+        """
+        select: column names and Aggregates to select instead of the mapped columns.
+        group_by / having: GROUP BY column names and a list of aggregate filters.
+        eager_joins: [(key, relationship)] of many-to-one relationships whose target row is
+        LEFT JOINed, with its ancestors' rows for CLASS and CONCRETE inheritance, and selected
+        as "key#column"; select can name those columns as "key#column".
+        link: (association table, local ids) restricts the select to targets of those owners
+        through a many-to-many table, selecting the owner id as "_link#owner".
+        deferred: mapped column names left out of the selected columns.
+        """
         table_name = mapper.table_name
         table = self._quote(table_name)
 
@@ -51,11 +164,52 @@ class QueryBuilder:
                         f'JOIN {target_table} ON {a_alias}.{self._quote(assoc.remote_key)} = {target_table}.{remote_pk}'
                     )
 
-        sql = f"SELECT {', '.join([f'{table_name}.{self._quote(col)}' for col, table_name in cols.items()])} FROM {table}"
-        if 'all_joins' in locals() and all_joins:
-            sql += " " + " ".join(all_joins)
-
+        select_parts = [f'{table_name}.{self._quote(col)}' for col, table_name in cols.items()
+                        if not deferred or col not in deferred]
         where_parts = []
+        eager_cols = {}
+
+        for i, (key, rel) in enumerate(eager_joins or ()):
+            target_mapper = rel._resolved_target._mapper
+            alias = self._quote(f"eager_{i}")
+            fk_name = rel._resolved_fk_name
+            all_joins.append(
+                f'LEFT JOIN {self._quote(target_mapper.table_name)} AS {alias} '
+                f'ON {cols[fk_name]}.{self._quote(fk_name)} = {alias}.{self._quote(target_mapper.pk)}'
+            )
+            tables = [(alias, target_mapper)]
+            for depth in range(1, len(target_mapper.table_chain())):
+                child_alias, child = tables[-1]
+                parent_alias = self._quote(f"eager_{i}_{depth}")
+                all_joins.append(
+                    f'LEFT JOIN {self._quote(child.parent.table_name)} AS {parent_alias} '
+                    f'ON {child_alias}.{self._quote(child.pk)} = {parent_alias}.{self._quote(child.parent.pk)}'
+                )
+                tables.append((parent_alias, child.parent))
+            for table_alias, table_mapper in tables:
+                for col in table_mapper.columns:
+                    if f"{key}#{col}" in eager_cols:
+                        continue
+                    eager_cols[f"{key}#{col}"] = f'{table_alias}.{self._quote(col)}'
+                    select_parts.append(f'{table_alias}.{self._quote(col)} AS {self._quote(f"{key}#{col}")}')
+
+        if link is not None:
+            assoc, local_ids = link
+            alias = self._quote("_link")
+            all_joins.append(
+                f'JOIN {self._quote(assoc.name)} AS {alias} '
+                f'ON {cols[mapper.pk]}.{self._quote(mapper.pk)} = {alias}.{self._quote(assoc.remote_key)}'
+            )
+            select_parts.append(f'{alias}.{self._quote(assoc.local_key)} AS {self._quote("_link#owner")}')
+            where_parts.append(f'{alias}.{self._quote(assoc.local_key)} IN ({", ".join(["?" for _ in local_ids])})')
+            params.extend(local_ids)
+
+        if select is not None:
+            select_parts = [self._compile_select_item(item, cols, table, eager_cols) for item in select]
+
+        sql = f"SELECT {', '.join(select_parts)} FROM {table}"
+        if all_joins:
+            sql += " " + " ".join(all_joins)
         
         # Process simple equality filters
         actual_filters = dict(filters)
@@ -80,6 +234,17 @@ class QueryBuilder:
         if where_parts:
             sql += " WHERE " + " AND ".join(where_parts)
 
+        if group_by:
+            sql += " GROUP BY " + ", ".join(self._compile_select_item(col, cols, table) for col in group_by)
+
+        if having:
+            having_parts = []
+            for expr in having:
+                sql_part, expr_params = self._build_filter_expression(expr, cols, table)
+                having_parts.append(sql_part)
+                params.extend(expr_params)
+            sql += " HAVING " + " AND ".join(having_parts)
+
         if order_by:
             order_clauses = []
             for col, direction in order_by:
@@ -89,25 +254,63 @@ class QueryBuilder:
             sql += " ORDER BY " + ", ".join(order_clauses)
         
         if limit is not None:
-            sql += f" LIMIT {int(limit)}"
-            if offset is not None: sql += f" OFFSET {int(offset)}"
+            sql += " LIMIT ?"
+            params.append(int(limit))
         elif offset is not None:
-            sql += f" LIMIT -1 OFFSET {int(offset)}"
+            sql += " LIMIT -1"
+        if offset is not None:
+            sql += " OFFSET ?"
+            params.append(int(offset))
 
         # print(f"DEBUG: SELECT: {sql}")
 
         return sql, tuple(params)
     
+    def build_aggregate_over(self, sql, params, aggregates):
+        """Aggregate over the rows of another SELECT (used when it has LIMIT/OFFSET or GROUP BY)."""
+        parts = []
+        for agg in aggregates:
+            inner = "*" if agg.column_name is None else self._quote(agg.column_name)
+            if agg.distinct:
+                inner = f"DISTINCT {inner}"
+            parts.append(f"{agg.function}({inner})")
+        return f"SELECT {', '.join(parts)} FROM ({sql})", params
+
+    def build_exists(self, sql, params):
+        return f"SELECT EXISTS ({sql})", params
+
+    def _compile_select_item(self, item, cols, table, eager_cols=None):
+        """Column name -> table."column", Aggregate -> FUNC([DISTINCT] table."column") or COUNT(*)."""
+        from miniorm.aggregates import Aggregate
+
+        if isinstance(item, Aggregate):
+            if item.column_name is None:
+                return f"{item.function}(*)"
+            inner = self._compile_select_item(item.column_name, cols, table)
+            if item.distinct:
+                inner = f"DISTINCT {inner}"
+            return f"{item.function}({inner})"
+
+        if eager_cols and item in eager_cols:
+            return eager_cols[item]
+        table_name = cols.get(item, table.strip('"'))
+        return f"{table_name}.{self._quote(item)}"
+
     def _build_filter_expression(self, expr, cols, table):
         """Convert a filter expression into SQL and parameters"""
         from miniorm.filters import (
-            ComparisonFilter, InFilter, NotInFilter, LikeFilter, ILikeFilter,
+            ComparisonFilter, InFilter, NotInFilter, LikeFilter,
             IsNullFilter, IsNotNullFilter, BetweenFilter, CombinedFilter, ColumnFilter, NotFilter
         )
         
+        from miniorm.aggregates import AggregateFilter
+
         params = []
         
-        if isinstance(expr, ComparisonFilter):
+        if isinstance(expr, AggregateFilter):
+            return f"{self._compile_select_item(expr.aggregate, cols, table)} {expr.operator} ?", [expr.value]
+
+        elif isinstance(expr, ComparisonFilter):
             table_name = cols.get(expr.column_name, table.strip('"'))
             prefixed_col = f"{table_name}.{self._quote(expr.column_name)}"
             
@@ -136,13 +339,9 @@ class QueryBuilder:
         elif isinstance(expr, LikeFilter):
             table_name = cols.get(expr.column_name, table.strip('"'))
             prefixed_col = f"{table_name}.{self._quote(expr.column_name)}"
-            return f"{prefixed_col} LIKE ?", [expr.pattern]
-        
-        elif isinstance(expr, ILikeFilter):
-            table_name = cols.get(expr.column_name, table.strip('"'))
-            prefixed_col = f"{table_name}.{self._quote(expr.column_name)}"
-            # SQLite doesn't have ILIKE, so we use LIKE with LOWER
-            return f"LOWER({prefixed_col}) LIKE LOWER(?)", [expr.pattern]
+            # SQLite's LIKE already ignores ASCII case. Left bare (no LOWER()) the column can be
+            # searched through a NOCASE index: a pattern without a leading wildcard is a range scan.
+            return f"{prefixed_col} LIKE ?{self._like_escape(expr.escape)}", [expr.pattern]
         
         elif isinstance(expr, IsNullFilter):
             table_name = cols.get(expr.column_name, table.strip('"'))
@@ -176,6 +375,13 @@ class QueryBuilder:
         else:
             raise TypeError(f"Unknown filter expression type: {type(expr)}")
 
+    def _like_escape(self, escape):
+        if escape is None:
+            return ""
+        if len(escape) != 1 or escape == "'":
+            raise ValueError(f"LIKE escape must be a single character other than a quote: {escape!r}")
+        return f" ESCAPE '{escape}'"
+
     def build_insert(self, table_name, data):
         """Build INSERT SQL from table name and data dict. Does not use mapper."""
         table = self._quote(table_name)
@@ -186,6 +392,14 @@ class QueryBuilder:
         sql = f"INSERT INTO {table} ({', '.join(quoted_fields)}) VALUES ({placeholders})"
         return sql, tuple(values)
     
+    def build_bulk_insert(self, table_name, fields, rows):
+        """Build one INSERT for executemany: SQL plus a parameter tuple per row dict."""
+        table = self._quote(table_name)
+        quoted_fields = [self._quote(f) for f in fields]
+        placeholders = ", ".join(["?" for _ in fields])
+        sql = f"INSERT INTO {table} ({', '.join(quoted_fields)}) VALUES ({placeholders})"
+        return sql, [tuple(row[f] for f in fields) for row in rows]
+
     def build_update(self, table_name, data):
         print(f"DEBUG: UPDATE: {data}")
         table = self._quote(table_name)
@@ -207,17 +421,31 @@ class QueryBuilder:
         return sql, tuple(params)
 
     def build_delete(self, table_name, data):
-        where_parts = []
-        params = []
-
         pk_info = data["_pk"]
         pk_col, pk_val = list(pk_info.items())[0]
-        params.append(pk_val)
-        
-        sql = f"DELETE FROM {table_name} WHERE {self._quote(pk_col)} = ?"
+
+        if isinstance(pk_val, (list, tuple, set)):
+            params = list(pk_val)
+            placeholders = ", ".join(["?" for _ in params])
+            sql = f"DELETE FROM {self._quote(table_name)} WHERE {self._quote(pk_col)} IN ({placeholders})"
+        else:
+            params = [pk_val]
+            sql = f"DELETE FROM {self._quote(table_name)} WHERE {self._quote(pk_col)} = ?"
         print(f"DEBUG: DELETE: {sql}")
         return sql, tuple(params)
 
+    def build_select_pks(self, table_name, pk_col, fk_col, fk_values):
+        """SELECT the primary keys of rows whose foreign key is one of fk_values."""
+        return self.build_select_in(table_name, [pk_col], fk_col, fk_values)
+
+    def build_select_in(self, table_name, columns, key_col, values):
+        """SELECT columns of the rows whose key_col is one of values."""
+        cols = ", ".join(self._quote(c) for c in columns)
+        placeholders = ", ".join(["?" for _ in values])
+        sql = (f"SELECT {cols} FROM {self._quote(table_name)} "
+               f"WHERE {self._quote(key_col)} IN ({placeholders})")
+        return sql, tuple(values)
+
     def build_m2m_insert(self, assoc_table, local_id, remote_id, local_key, remote_key):
         table = self._quote(assoc_table)
         l_key = self._quote(local_key)
@@ -0,0 +1,20 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.database import DatabaseEngine
+
+
+class TracingEngine(DatabaseEngine):
+    """Engine that records every statement sent to SQLite."""
+    def __init__(self, *args, **kwargs):
+        self.statements = []
+        super().__init__(*args, **kwargs)
+
+    def _connect(self):
+        connection = super()._connect()
+        connection.set_trace_callback(self.statements.append)
+        return connection
+
+    def selects(self, table=None):
+        """SELECT statements, only those reading table when it is given."""
+        return [s for s in self.statements if s.startswith("SELECT") and (table is None or f'"{table}"' in s)]
@@ -1,14 +1,69 @@
 import sqlite3
 import logging
+from contextlib import contextmanager
+
+from miniorm.pool import ConnectionPool, StaticPool
+from miniorm.result import Rows
+from miniorm.pragmas import PragmaProfile, resolve_profile
+from miniorm.entity_cache import EntityCache
 
 class DatabaseEngine:
     logger = logging.getLogger("MiniORM")
     if not logger.handlers:
         logging.basicConfig(level=logging.INFO)
 
-    def __init__(self, db_path=":memory:"):
-        self.connection = sqlite3.connect(db_path, check_same_thread=False)
-        self.connection.row_factory = sqlite3.Row 
+    def __init__(self, db_path=":memory:", pool_size=5, pool_timeout=30.0, profile=None, pragmas=None,
+                 entity_cache=None, result_cache=None):
+        """
+        profile: name of a pragma profile ("default", "read_heavy", "write_heavy", "test") or a
+        PragmaProfile, applied to every pooled connection. pragmas: overrides of single values.
+        entity_cache: EntityCache shared by the sessions of this engine (a default one if not given).
+        result_cache: ResultCache for the SELECTs sessions run, off when not given.
+        """
+        self.db_path = db_path
+        self.entity_cache = entity_cache or EntityCache()
+        self.result_cache = result_cache
+        self.profile = resolve_profile(profile)
+        if pragmas:
+            self.profile = self.profile.with_overrides(**pragmas)
+        if db_path == ":memory:":
+            self.pool = StaticPool(self._connect, timeout=pool_timeout)
+        else:
+            self.pool = ConnectionPool(self._connect, size=pool_size, timeout=pool_timeout)
+
+    def _connect(self):
+        # isolation_level=None: transactions are opened explicitly by the Session
+        # no row_factory: rows stay plain tuples, execute() wraps them in Rows with the column names
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.profile.apply(connection)
+        return connection
+
+    def acquire(self):
+        """Check a connection out of the pool. Must be given back with release()."""
+        return self.pool.checkout()
+
+    def release(self, connection):
+        self.pool.checkin(connection)
+
+    @contextmanager
+    def connect(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def pool_status(self):
+        return self.pool.status()
+
+    def pragma_status(self):
+        """The pragma profile and the values a pooled connection actually runs with."""
+        with self.connect() as connection:
+            actual = {key: connection.execute(f"PRAGMA {key}").fetchone()[0] for key in PragmaProfile.PRAGMAS}
+        return {"profile": self.profile.name, "configured": dict(self.profile.pragmas), "actual": actual}
+
+    def dispose(self):
+        self.pool.dispose()
 
     def _log(self, sql, params=None):
         msg = f"[SQL EXECUTE]: {sql}"
@@ -16,7 +71,12 @@ class DatabaseEngine:
             msg += f" | [PARAMS]: {params}"
         self.logger.info(msg)
 
-    def execute(self, sql, params=None, return_lastrowid=False):
+    def execute(self, sql, params=None, return_lastrowid=False, connection=None):
+        """Run one statement. Without `connection` a pooled one is used for just this call."""
+        if connection is None:
+            with self.connect() as connection:
+                return self.execute(sql, params, return_lastrowid, connection)
+
         clean_params = []
         if params:
             for p in params:
@@ -25,15 +85,43 @@ class DatabaseEngine:
                 else:
                     clean_params.append(p)
 
-        cursor = self.connection.cursor()
+        cursor = connection.cursor()
         cursor.execute(sql, tuple(clean_params) if clean_params else (params or ()))
-        
+
         if return_lastrowid:
             return cursor.lastrowid
-        return cursor.fetchall()
+        return Rows.from_cursor(cursor, cursor.fetchall())
+
+    def iterate(self, sql, params=None, connection=None, size=1000):
+        """Run a SELECT and yield its rows as Rows of at most `size` (cursor.fetchmany)."""
+        if connection is None:
+            with self.connect() as connection:
+                yield from self.iterate(sql, params, connection, size)
+            return
+
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql, tuple(params or ()))
+            columns = Rows.cursor_columns(cursor)
+            while True:
+                rows = cursor.fetchmany(size)
+                if not rows:
+                    break
+                yield Rows(rows, columns)
+        finally:
+            cursor.close()
+
+    def executemany(self, sql, seq_of_params, connection=None):
+        if connection is None:
+            with self.connect() as connection:
+                return self.executemany(sql, seq_of_params, connection)
+
+        cursor = connection.cursor()
+        cursor.executemany(sql, seq_of_params)
+        return cursor.rowcount
 
-    def commit(self):
-        self.connection.commit()
+    def commit(self, connection):
+        connection.commit()
 
-    def rollback(self):
-        self.connection.rollback()
\ No newline at end of file
+    def rollback(self, connection):
+        connection.rollback()
@@ -0,0 +1,52 @@
+import weakref
+
+from miniorm.filters import col
+
+
+class DeferredLoad:
+    """
+    Columns a query left out (Column(deferred=True), Query.defer / load_only), shared by
+    the objects that query loaded through their __dict__["_unloaded"].
+
+    The first access to one of these columns on any of the objects loads them for all
+    of its objects still alive, with one SELECT pk, columns ... WHERE pk IN (...) per chunk.
+    """
+    CHUNK_SIZE = 500
+
+    def __init__(self, session, mapper, names):
+        self.session = session
+        self.mapper = mapper
+        self.names = frozenset(names)
+        self._objects = weakref.WeakValueDictionary()
+
+    def add(self, pk_val, obj):
+        self._objects[pk_val] = obj
+        obj.__dict__['_unloaded'] = self
+
+    def load(self):
+        # strong references until the values are in place
+        objects = dict(self._objects)
+        self._objects.clear()
+        mapper = self.mapper
+        names = sorted(self.names)
+        pks = list(objects)
+
+        for start in range(0, len(pks), self.CHUNK_SIZE):
+            sql, params = self.session.query_builder.build_select(
+                mapper, {}, filter_expressions=[col(mapper.pk).in_(pks[start:start + self.CHUNK_SIZE])],
+                select=[mapper.pk] + names
+            )
+            for row in self.session.execute(sql, params):
+                obj = objects.get(row[0])
+                if obj is None:
+                    continue
+                snapshot = self.session._snapshots.get(obj)
+                for name, value in zip(names, row[1:]):
+                    # a value assigned before the load wins
+                    obj.__dict__.setdefault(name, value)
+                    if snapshot is not None:
+                        snapshot.setdefault(name, value)
+
+        for obj in objects.values():
+            if obj.__dict__.get('_unloaded') is self:
+                del obj.__dict__['_unloaded']
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class EntityCache:
+    """
+    Second-level cache of row values, shared by every session of an engine.
+
+    Keyed by (mapper, pk), holding the loaded class and its column values, never the
+    objects themselves: each session still builds its own instance. Only models with
+    Meta.cache = True are stored (Meta.cache_ttl overrides the ttl in seconds).
+    Bounded LRU; entries older than their ttl are dropped when read.
+
+    Sessions invalidate the rows they write. An invalidation also moves the generation
+    on, and values read under an older generation are not stored, so a read racing a
+    commit cannot put the old row back.
+    """
+    def __init__(self, maxsize=1024, ttl=300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, mapper, pk):
+        """(class, values) cached for the row, or None."""
+        key = (mapper, pk)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            cls, values, expires = entry
+            if expires is not None and expires <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cls, values
+
+    def put(self, mapper, pk, cls, values, generation):
+        ttl = mapper.cache_ttl if mapper.cache_ttl is not None else self.ttl
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[(mapper, pk)] = (cls, values, self.clock() + ttl if ttl is not None else None)
+            self._entries.move_to_end((mapper, pk))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, keys):
+        """Drop the cached (mapper, pk) rows."""
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "expirations": self.expirations, "invalidations": self.invalidations,
+                "size": len(self._entries), "maxsize": self.maxsize,
+            }
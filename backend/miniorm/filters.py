@@ -4,6 +4,17 @@ Supports complex filtering without raw SQL.
 """
 
 
+LIKE_ESCAPE = "\\"
+
+
+def escape_like(text, escape=LIKE_ESCAPE):
+    """Escape the LIKE wildcards in text so it matches literally"""
+    text = str(text)
+    for char in (escape, "%", "_"):
+        text = text.replace(char, escape + char)
+    return text
+
+
 class FilterExpression:
     """Base class for all filter expressions"""
     
@@ -54,13 +65,21 @@ class ColumnFilter(FilterExpression):
         """NOT IN operator"""
         return NotInFilter(self.column_name, values, self.model_class)
     
-    def like(self, pattern):
-        """LIKE operator for pattern matching"""
-        return LikeFilter(self.column_name, pattern, self.model_class)
+    def like(self, pattern, escape=None):
+        """LIKE operator for pattern matching, case-insensitive for ASCII letters"""
+        return LikeFilter(self.column_name, pattern, self.model_class, escape)
     
-    def ilike(self, pattern):
-        """Case-insensitive LIKE operator"""
-        return ILikeFilter(self.column_name, pattern, self.model_class)
+    def ilike(self, pattern, escape=None):
+        """Case-insensitive LIKE operator, the same as like(): SQLite's LIKE already ignores ASCII case"""
+        return LikeFilter(self.column_name, pattern, self.model_class, escape)
+
+    def startswith(self, prefix):
+        """Case-insensitive prefix match; with a NOCASE index this is an index range scan"""
+        return LikeFilter(self.column_name, f"{escape_like(prefix)}%", self.model_class, LIKE_ESCAPE)
+
+    def contains(self, text):
+        """Case-insensitive substring match, % and _ in text match literally"""
+        return LikeFilter(self.column_name, f"%{escape_like(text)}%", self.model_class, LIKE_ESCAPE)
     
     def is_null(self):
         """Filter for NULL values"""
@@ -127,27 +146,12 @@ class NotInFilter(FilterExpression):
 
 
 class LikeFilter(FilterExpression):
-    """Represents a LIKE filter (case-sensitive)"""
-    def __init__(self, column_name, pattern, model_class=None):
-        self.column_name = column_name
-        self.pattern = pattern
-        self.model_class = model_class
-    
-    def __and__(self, other):
-        """Combine with AND operator"""
-        return CombinedFilter(self, other, logic='AND')
-    
-    def __or__(self, other):
-        """Combine with OR operator"""
-        return CombinedFilter(self, other, logic='OR')
-
-
-class ILikeFilter(FilterExpression):
-    """Represents a case-insensitive LIKE filter"""
-    def __init__(self, column_name, pattern, model_class=None):
+    """Represents a LIKE filter; SQLite's LIKE ignores case for ASCII letters"""
+    def __init__(self, column_name, pattern, model_class=None, escape=None):
         self.column_name = column_name
         self.pattern = pattern
         self.model_class = model_class
+        self.escape = escape
     
     def __and__(self, other):
         """Combine with AND operator"""
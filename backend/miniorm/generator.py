@@ -1,5 +1,6 @@
 import re
 from miniorm.orm_types import ForeignKey
+from miniorm.indexes import Index
 
 class SchemaGenerator:
     TYPE_MAP = {str: "TEXT", int: "INTEGER", bool: "INTEGER"}
@@ -16,6 +17,14 @@ class SchemaGenerator:
         rows = engine.execute(f"PRAGMA table_info({self._quote(table_name)})")
         return [row[1] for row in rows]
 
+    def _get_existing_indexes(self, engine, table_name, connection=None):
+        """name -> CREATE statement of the indexes created with CREATE INDEX (not the automatic ones)."""
+        rows = engine.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table_name,), connection=connection
+        )
+        return {row[0]: row[1] for row in rows}
+
     def _collect_tables(self, registry):
         """Return (main_tables, m2m_tables) for drop/create ordering."""
         table_definitions = {}
@@ -42,13 +51,15 @@ class SchemaGenerator:
         if not all_tables:
             return
 
-        engine.execute("PRAGMA foreign_keys = OFF")
-        try:
-            for t_name in all_tables:
-                engine.execute(f"DROP TABLE IF EXISTS {self._quote(t_name)}")
-                print(f"DEBUG: Dropped table: {t_name}")
-        finally:
-            engine.execute("PRAGMA foreign_keys = ON")
+        # PRAGMA foreign_keys is per connection, so keep the whole drop on one
+        with engine.connect() as conn:
+            engine.execute("PRAGMA foreign_keys = OFF", connection=conn)
+            try:
+                for t_name in all_tables:
+                    engine.execute(f"DROP TABLE IF EXISTS {self._quote(t_name)}", connection=conn)
+                    print(f"DEBUG: Dropped table: {t_name}")
+            finally:
+                engine.execute("PRAGMA foreign_keys = ON", connection=conn)
 
     def create_all(self, engine, registry, drop_first=False):
         from miniorm.mapper import Mapper
@@ -57,31 +68,30 @@ class SchemaGenerator:
         if drop_first:
             self.drop_all(engine, registry)
 
-        table_definitions = {}
-        for mapper in registry.values():
-            if mapper.abstract:
-                continue
-            name = mapper.table_name
-            if name not in table_definitions:
-                table_definitions[name] = {
-                    'columns': {},
-                    'pk': mapper.pk,
-                    'mapper': mapper
-                }
-            
-            table_definitions[name]['columns'].update(mapper.columns)
+        table_definitions = self._table_definitions(registry)
 
         for t_name, info in table_definitions.items():
             sql = self._generate_sql(t_name, info)
             engine.execute(sql)
             existing_cols = self._get_existing_columns(engine, t_name)
-            expected_cols = set(info['columns'].keys())
-            for col_name, col_obj in info['columns'].items():
+            table_columns = self._table_columns(info)
+            expected_cols = set(table_columns)
+            for col_name, col_obj in table_columns.items():
                 if col_name not in existing_cols:
                     print(f"DEBUG: Migration: Adding missing column '{col_name}' to table '{t_name}'")
                     sql_type = self.TYPE_MAP.get(col_obj.dtype, "TEXT")
-                    alter_sql = f"ALTER TABLE {self._quote(t_name)} ADD COLUMN {self._quote(col_name)} {sql_type} NULL"
+                    alter_sql = f"ALTER TABLE {self._quote(t_name)} ADD COLUMN {self._quote(col_name)} {sql_type}{self._collate(col_obj)} NULL"
                     engine.execute(alter_sql)
+
+            # stale indexes go before the columns, SQLite cannot drop an indexed column
+            indexes = {name: self.generate_index(t_name, name, index, columns=table_columns)
+                       for name, index in self._collect_indexes(t_name, info).items()}
+            existing_indexes = self._get_existing_indexes(engine, t_name)
+            for index_name, index_sql in existing_indexes.items():
+                if indexes.get(index_name) != index_sql:
+                    engine.execute(f"DROP INDEX IF EXISTS {self._quote(index_name)}")
+                    print(f"DEBUG: Migration: Dropped index '{index_name}' from table '{t_name}'")
+
             for col_name in existing_cols:
                 if col_name not in expected_cols:
                     try:
@@ -89,46 +99,154 @@ class SchemaGenerator:
                         print(f"DEBUG: Migration: Dropped unused column '{col_name}' from table '{t_name}'")
                     except Exception as e:
                         print(f"DEBUG: Could not drop column '{col_name}' from {t_name}: {e}")
+
+            for index_name, index_sql in indexes.items():
+                if existing_indexes.get(index_name) != index_sql:
+                    try:
+                        engine.execute(index_sql)
+                        print(f"DEBUG: Migration: Created index '{index_name}' on table '{t_name}'")
+                    except Exception as e:
+                        print(f"DEBUG: Could not create index '{index_name}' on {t_name}: {e}")
             print(f"DEBUG: Created table: {t_name}")
 
-        created_m2m = set()
+        for rel in self._m2m_relationships(registry):
+            assoc = rel.association_table
+            engine.execute(self.generate_m2m_table(rel))
+            name, index = self._m2m_index(assoc)
+            engine.execute(self.generate_index(assoc.name, name, index, if_not_exists=True))
+            print(f"DEBUG: Created M2M table: {assoc.name}")
+
+    def _table_definitions(self, registry):
+        """table name -> {'columns', 'pk', 'mapper', 'indexes'} of every mapped table."""
+        table_definitions = {}
+        for mapper in registry.values():
+            if mapper.abstract:
+                continue
+            name = mapper.table_name
+            if name not in table_definitions:
+                table_definitions[name] = {
+                    'columns': {},
+                    'pk': mapper.pk,
+                    'mapper': mapper,
+                    'indexes': []
+                }
+            
+            table_definitions[name]['columns'].update(mapper.columns)
+            for index in mapper.meta.get('indexes', ()):
+                if index not in table_definitions[name]['indexes']:
+                    table_definitions[name]['indexes'].append(index)
+        return table_definitions
+
+    def _m2m_relationships(self, registry):
+        """One many-to-many relationship per association table."""
+        found = {}
         for mapper in registry.values():
             for rel in mapper.relationships.values():
                 if rel.r_type == "many-to-many" and rel.association_table:
-                    assoc = rel.association_table
-                    if assoc.name not in created_m2m:
-                        sql = self.generate_m2m_table(rel)
-                        engine.execute(sql)
-                        created_m2m.add(assoc.name)
-                        print(f"DEBUG: Created M2M table: {assoc.name}")
+                    found.setdefault(rel.association_table.name, rel)
+        return list(found.values())
 
+    def _m2m_index(self, assoc):
+        # the primary key covers lookups by the first key only
+        index = Index(assoc.remote_key)
+        return index.resolve_name(assoc.name), index
 
-    def _generate_sql(self, table_name, info):
-        quoted_table = self._quote(table_name)
-        column_defs = []
+
+    def _table_columns(self, info):
+        """
+        Columns stored in the table itself. CLASS inheritance leaves the parent's out,
+        and so does CONCRETE, whose mapper reads and writes them through the parent
+        table; the primary key stays so the row can join its parent.
+        """
         mapper = info['mapper']
-        if mapper.inheritance.strategy.name == "CLASS":
+        if mapper.inheritance.strategy.name in ("CLASS", "CONCRETE"):
             parent_cols = set(mapper.parent.columns.keys()) if mapper.parent else set()
-            columns_to_include = {
-                name: col for name, col in mapper.columns.items() 
+            columns = {
+                name: col for name, col in mapper.columns.items()
                 if name not in parent_cols or name == mapper.pk
             }
-        else:
-            columns_to_include = info['columns']
+            if mapper.pk not in columns:
+                columns = {mapper.pk: self._pk_column(mapper)} | columns
+            return columns
+        return info['columns']
+
+    def _pk_column(self, mapper):
+        while mapper.pk not in mapper.columns and mapper.parent:
+            mapper = mapper.parent
+        return mapper.columns[mapper.pk]
+
+    def _collect_indexes(self, table_name, info):
+        """
+        name -> Index for a table: Meta.indexes, Column(index=True) / Column(unique=True)
+        and one per foreign key column not already leading another index.
+        """
+        columns = self._table_columns(info)
+        pk = info['mapper'].pk
+        indexes = {}
+
+        for index in info['indexes']:
+            unknown = [name for name in index.columns if name not in columns]
+            if unknown:
+                raise ValueError(f"Index on table {table_name} refers to unknown column(s): {unknown}")
+            indexes.setdefault(index.resolve_name(table_name), index)
+
+        for name, col in columns.items():
+            if name == pk:
+                continue
+            if col.unique or col.index:
+                index = Index(name, unique=col.unique)
+                indexes.setdefault(index.resolve_name(table_name), index)
+
+        for name, col in columns.items():
+            if name == pk or not hasattr(col, 'target_table'):
+                continue
+            if any(index.columns[0] == name and index.where is None for index in indexes.values()):
+                continue
+            index = Index(name)
+            indexes[index.resolve_name(table_name)] = index
+
+        return indexes
+
+    def generate_index(self, table_name, index_name, index, if_not_exists=False, columns=None):
+        """
+        columns: the table's Column objects; a column collation is repeated in the index,
+        so changing it changes the statement and the index is rebuilt.
+        """
+        # without IF NOT EXISTS this is the statement SQLite keeps in sqlite_master, compared on sync
+        unique = "UNIQUE " if index.unique else ""
+        exists = "IF NOT EXISTS " if if_not_exists else ""
+        columns = columns or {}
+        columns = ", ".join(f"{self._quote(name)}{self._collate(columns.get(name))}" for name in index.columns)
+        sql = f"CREATE {unique}INDEX {exists}{self._quote(index_name)} ON {self._quote(table_name)} ({columns})"
+        if index.where:
+            sql += f" WHERE {index.where}"
+        return sql
+
+    def _collate(self, col):
+        collation = getattr(col, 'collation', None)
+        return f" COLLATE {collation}" if collation else ""
+
+    def _generate_sql(self, table_name, info):
+        quoted_table = self._quote(table_name)
+        column_defs = []
+        mapper = info['mapper']
+        columns_to_include = self._table_columns(info)
 
         for name, col in columns_to_include.items():
             q_name = self._quote(name)
-            sql_type = self.TYPE_MAP.get(col.dtype, "TEXT")
+            sql_type = self.TYPE_MAP.get(col.dtype, "TEXT") + self._collate(col)
             constraints = []
             
             if name == mapper.pk:
-                if mapper.inheritance and mapper.inheritance.strategy.name == "CLASS" and mapper.parent:
+                if mapper.inheritance and mapper.inheritance.strategy.name in ("CLASS", "CONCRETE") and mapper.parent:
                     constraints.append("PRIMARY KEY")
                 else:
                     constraints.append("PRIMARY KEY AUTOINCREMENT")
             
             if not col.nullable:
                 constraints.append("NOT NULL")
+            if getattr(col, 'server_default', None) is not None:
+                constraints.append(f"DEFAULT ({col.server_default})")
             column_defs.append(f"{q_name} {sql_type} {' '.join(constraints)}".strip())
 
         for name, col in columns_to_include.items():
@@ -0,0 +1,41 @@
+from miniorm.states import ObjectState
+
+
+class RowHydrator:
+    """
+    Builds instances from rows of one column layout, compiled by Mapper.row_hydrator().
+
+    target_class(row) picks the class to build by looking at fixed row positions, and
+    each class has a precomputed list of (position, attribute) pairs copied straight
+    into the new instance's __dict__.
+    """
+    def __init__(self, target_class, plans, pk_index):
+        self.target_class = target_class
+        self.plans = plans
+        self.pk_index = pk_index
+
+    def __call__(self, row):
+        return self.build(self.target_class(row), row)
+
+    def build(self, cls, row):
+        obj = new_instance(cls)
+        values = obj.__dict__
+        for index, name in self.plans[cls]:
+            value = row[index]
+            if value is not None:
+                values[name] = value
+        return obj
+
+
+def new_instance(cls):
+    """Empty transient instance; __init__ only runs when the class overrides it."""
+    if cls.__init__ is not _base_init():
+        return cls()
+    obj = cls.__new__(cls)
+    obj.__dict__.update(_orm_state=ObjectState.TRANSIENT, _session=None, type=cls.__name__)
+    return obj
+
+
+def _base_init():
+    from miniorm.base import MiniBase
+    return MiniBase.__init__
@@ -1,15 +1,47 @@
+import weakref
+
+
 class IdentityMap:
+    """
+    One object per (class, primary key) within a session.
+
+    Objects are held for as long as the session lives. Only objects streamed by
+    Query.__iter__ / yield_per are added weakly: once the caller drops them they leave
+    the map, so iterating over a large table does not keep every loaded row alive.
+    A streamed object becomes held like any other when a regular load returns it;
+    one with pending changes stays referenced by the dirty set and unit of work.
+    """
     def __init__(self):
         self._map = {}
+        self._weak = weakref.WeakValueDictionary()
 
     def get(self, model_class, pk):
-        return self._map.get((model_class, pk))
+        key = (model_class, pk)
+        obj = self._map.get(key)
+        if obj is None and self._weak:
+            obj = self._weak.get(key)
+        return obj
 
-    def add(self, model_class, pk, instance):
-        self._map[(model_class, pk)] = instance
+    def add(self, model_class, pk, instance, weak=False):
+        key = (model_class, pk)
+        if weak:
+            if key not in self._map:
+                self._weak[key] = instance
+            return
+        self._map[key] = instance
+        if key in self._weak:
+            del self._weak[key]
 
     def remove(self, model_class, pk):
         self._map.pop((model_class, pk), None)
+        self._weak.pop((model_class, pk), None)
 
     def clear(self):
-        self._map.clear()
\ No newline at end of file
+        self._map.clear()
+        self._weak.clear()
+
+    def values(self):
+        return list(self._map.values()) + list(self._weak.values())
+
+    def __len__(self):
+        return len(self._map) + len(self._weak)
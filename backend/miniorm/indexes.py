@@ -0,0 +1,31 @@
+class Index:
+    """
+    Index declared in a model's Meta.indexes, created and kept in sync by SchemaGenerator.create_all():
+
+        class Meta:
+            indexes = [Index("pet", "date"), Index("vet", where='"paid" = 0')]
+
+    where: SQL condition of a partial index. Without a name, one is derived from
+    the table and columns (ix_... / ux_... for unique indexes).
+    """
+    def __init__(self, *columns, name=None, unique=False, where=None):
+        if not columns:
+            raise ValueError("Index needs at least one column")
+        self.columns = tuple(columns)
+        self.name = name
+        self.unique = unique
+        self.where = where
+
+    def resolve_name(self, table_name):
+        if self.name:
+            return self.name
+        prefix = "ux" if self.unique else "ix"
+        return f"{prefix}_{table_name}_{'_'.join(self.columns)}"
+
+    def __repr__(self):
+        parts = [", ".join(self.columns)]
+        if self.unique:
+            parts.append("unique")
+        if self.where:
+            parts.append(f"where {self.where}")
+        return f"<Index {'; '.join(parts)}>"
@@ -27,13 +27,13 @@ class InheritanceStrategy(ABC):
         pass
     
     @abstractmethod
-    def resolve_delete(self, mapper, entity):
-        """Return operations dict: table_name -> pk_value, optional _m2m_cleanup list."""
+    def resolve_delete(self, mapper, pks):
+        """Return operations dict: table_name -> {"_pk": {pk_column: [pk values]}}, in delete order."""
         pass
     
     @abstractmethod
-    def resolve_target_class(self, mapper, row_dict):
-        """Return the model class to instantiate for this row (for hydration)."""
+    def compile_target_class(self, mapper, positions):
+        """Return row -> model class, reading the row by position (positions: column name -> index)."""
         pass
 
     @abstractmethod
@@ -65,13 +65,12 @@ class SingleTableInheritance(InheritanceStrategy):
         operations[mapper.table_name]["_pk"] = {mapper.pk: getattr(entity, mapper.pk)}
         return operations
 
-    def resolve_delete(self, mapper, entity):
-        operations = {mapper.table_name: {}}
-        operations[mapper.table_name]["_pk"] = {mapper.pk: getattr(entity, mapper.pk)}
-        return operations
+    def resolve_delete(self, mapper, pks):
+        return {mapper.table_name: {"_pk": {mapper.pk: pks}}}
 
-    def resolve_target_class(self, mapper, row_dict):
-        return mapper.cls
+    def compile_target_class(self, mapper, positions):
+        cls = mapper.cls
+        return lambda row: cls
 
     def resolve_attributes(self, mapper):
         return mapper.columns
@@ -115,23 +114,33 @@ class ClassTableInheritance(InheritanceStrategy):
         operations[mapper.table_name]["_pk"] = {mapper.pk: getattr(entity, mapper.pk)}
         return operations
 
-    def resolve_delete(self, mapper, entity):
+    def resolve_delete(self, mapper, pks):
         operations = {}
 
-        operations[mapper.table_name]["_pk"] = {mapper.pk: getattr(entity, mapper.pk)}
+        # child table first, its row references the parent row
+        operations[mapper.table_name] = {"_pk": {mapper.pk: pks}}
         
         if mapper.parent:
-            operations.update(self.resolve_delete(mapper.parent, entity))
+            operations.update(self.resolve_delete(mapper.parent, pks))
 
         return operations
 
-    def resolve_target_class(self, mapper, row_dict):
-        if mapper.children:
-            for child_cls in mapper.children:
-                pk_alias = f"{child_cls._mapper.table_name}#{child_cls._mapper.pk}"
-                if row_dict.get(pk_alias) is not None:
-                    return self.resolve_target_class(child_cls._mapper, row_dict)
-        return mapper.cls
+    def compile_target_class(self, mapper, positions):
+        branches = []
+        for child_cls in mapper.children:
+            index = positions.get(f"{child_cls._mapper.table_name}#{child_cls._mapper.pk}")
+            if index is not None:
+                branches.append((index, self.compile_target_class(child_cls._mapper, positions)))
+        cls = mapper.cls
+        if not branches:
+            return lambda row: cls
+
+        def target_class(row):
+            for index, resolve in branches:
+                if row[index] is not None:
+                    return resolve(row)
+            return cls
+        return target_class
 
     def resolve_attributes(self, mapper):
         attrs = mapper.columns
@@ -157,11 +166,11 @@ class ConcreteTableInheritance(InheritanceStrategy):
     def resolve_update(self, mapper, entity):
         return STRATEGIES["CLASS"].resolve_update(mapper, entity)
 
-    def resolve_delete(self, mapper, entity):
-        return STRATEGIES["CLASS"].resolve_delete(mapper, entity)
+    def resolve_delete(self, mapper, pks):
+        return STRATEGIES["CLASS"].resolve_delete(mapper, pks)
 
-    def resolve_target_class(self, mapper, row_dict):
-        return STRATEGIES["CLASS"].resolve_target_class(mapper, row_dict)
+    def compile_target_class(self, mapper, positions):
+        return STRATEGIES["CLASS"].compile_target_class(mapper, positions)
     
     def resolve_attributes(self, mapper):
         return STRATEGIES["CLASS"].resolve_attributes(mapper)
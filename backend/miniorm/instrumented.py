@@ -0,0 +1,33 @@
+class InstrumentedList(list):
+    """
+    List used for one-to-many and many-to-many collections.
+
+    In-place changes (append, remove, ...) are reported to the owner's session,
+    so the owner is flushed without scanning the identity map for changes.
+    """
+    def __init__(self, owner, name, items=()):
+        super().__init__(items)
+        self._owner = owner
+        self._name = name
+
+    def _changed(self):
+        session = self._owner.__dict__.get('_session')
+        if session is not None:
+            session._mark_dirty(self._owner, self._name)
+
+
+def _instrument(method_name):
+    method = getattr(list, method_name)
+
+    def wrapper(self, *args):
+        result = method(self, *args)
+        self._changed()
+        return result
+
+    wrapper.__name__ = method_name
+    return wrapper
+
+
+for _method_name in ("append", "extend", "insert", "remove", "pop", "clear",
+                     "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(InstrumentedList, _method_name, _instrument(_method_name))
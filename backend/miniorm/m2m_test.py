@@ -85,33 +85,33 @@ def validate_m2m_table(engine):
     print("VALIDATING M2M TABLE")
     print("-"*60)
     
-    cursor = engine.connection.cursor()
-    
-    
-    cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%student%course%' OR name LIKE '%course%student%'"
-    )
-    tables = cursor.fetchall()
-    
-    if not tables:
-        print("✗ No association table found!")
-        return
-    
-    assoc_table_name = tables[0][0]
-    print(f"✓ Association table: {assoc_table_name}")
-    
-    print(f"\nSchema:")
-    cursor.execute(f"PRAGMA table_info({assoc_table_name})")
-    for col in cursor.fetchall():
-        col_id, col_name, col_type, not_null, default, pk = col
-        print(f"  - {col_name}: {col_type} (pk={pk})")
-    
-    print(f"\nData:")
-    cursor.execute(f"SELECT * FROM {assoc_table_name}")
-    rows = cursor.fetchall()
-    for row in rows:
-        print(f"  {row}")
-    print(f"  Total rows: {len(rows)}")
+    with engine.connect() as connection:
+        cursor = connection.cursor()
+        
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%student%course%' OR name LIKE '%course%student%'"
+        )
+        tables = cursor.fetchall()
+    
+        if not tables:
+            print("✗ No association table found!")
+            return
+    
+        assoc_table_name = tables[0][0]
+        print(f"✓ Association table: {assoc_table_name}")
+    
+        print(f"\nSchema:")
+        cursor.execute(f"PRAGMA table_info({assoc_table_name})")
+        for col in cursor.fetchall():
+            col_id, col_name, col_type, not_null, default, pk = col
+            print(f"  - {col_name}: {col_type} (pk={pk})")
+    
+        print(f"\nData:")
+        cursor.execute(f"SELECT * FROM {assoc_table_name}")
+        rows = cursor.fetchall()
+        for row in rows:
+            print(f"  {row}")
+        print(f"  Total rows: {len(rows)}")
 
 
 def test_m2m_queries(session):
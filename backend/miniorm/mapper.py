@@ -1,7 +1,14 @@
+import threading
 from miniorm.orm_types import Relationship, ForeignKey, Column, Text, AssociationTable
 from miniorm.inheritance import STRATEGIES, Inheritance
+from miniorm.hydrator import RowHydrator
+from miniorm.attributes import ColumnAttribute, RelationshipAttribute
 
 class Mapper:
+    # set by finalize_mappers(), cleared whenever a new model class is registered
+    _finalized = False
+    _finalize_lock = threading.Lock()
+
     def __init__(self, cls, columns, relationships, meta_attrs):
         self.cls = cls
         self.meta = meta_attrs or {}
@@ -10,12 +17,20 @@ class Mapper:
         self.inheritance = None
         self.columns = columns
         self.abstract = self.meta.get("abstract", False)
+        # opt-in to the engine's second-level EntityCache
+        self.cache = bool(self.meta.get("cache", False))
+        self.cache_ttl = self.meta.get("cache_ttl")
         
         self.parent = None
         self.declared_relationships = dict(relationships)
         self.relationships = {}
         self.children = []
         self._pending_relationships = []
+        self._fk_relationships = None
+        self.referenced_by = []
+        self._hydrators = {}
+        self._tracked = None
+        self._deferred = None
 
         self._resolve_parent()
         self._resolve_inheritance()
@@ -23,6 +38,7 @@ class Mapper:
         self._resolve_columns()
         self._resolve_relationships()
         self._resolve_pk()
+        self._instrument()
 
     def __repr__(self):
         cols = ", ".join(self.columns.keys())
@@ -87,6 +103,49 @@ class Mapper:
         else:
             raise Exception(f"Class {self.cls.__name__} has no primary key defined")
     
+    def tracked_attributes(self):
+        """Columns, inherited ones included, and relationships whose assignment marks an instance dirty."""
+        if self._tracked is None:
+            attributes = self.inheritance.strategy.resolve_attributes(self)
+            self._tracked = frozenset(attributes) | frozenset(self.relationships)
+        return self._tracked
+
+    def deferrable_columns(self):
+        """Columns a query may leave out: all but primary and foreign keys, which loading relies on."""
+        attributes = self.inheritance.strategy.resolve_attributes(self)
+        return [name for name, column in attributes.items()
+                if name != self.pk and not column.pk and not hasattr(column, 'target_table')]
+
+    def deferred_columns(self):
+        """Columns declared with Column(deferred=True), left out of queries by default."""
+        if self._deferred is None:
+            attributes = self.inheritance.strategy.resolve_attributes(self)
+            self._deferred = frozenset(name for name in self.deferrable_columns()
+                                       if getattr(attributes[name], 'deferred', False))
+        return self._deferred
+
+    def _instrument(self):
+        """Install attribute descriptors for the columns and relationships of this class."""
+        names = dict.fromkeys(self.columns)
+        names.update(dict.fromkeys(self.declared_relationships))
+        names.update(dict.fromkeys(self.relationships))
+        for name in names:
+            self._instrument_attribute(name)
+
+    def _instrument_attribute(self, name):
+        declared = self.cls.__dict__.get(name)
+        if isinstance(declared, ColumnAttribute):
+            declared = declared.declared
+        if declared is None:
+            declared = self.columns.get(name) or self.relationships.get(name)
+
+        # the primary key reads as a plain value even when declared as a relationship to the parent
+        rel = self.relationships.get(name) or self.declared_relationships.get(name)
+        if rel is not None and name != self.pk:
+            setattr(self.cls, name, RelationshipAttribute(name, declared, rel))
+        else:
+            setattr(self.cls, name, ColumnAttribute(name, declared))
+
     def _resolve_target_class(self, target):
         if isinstance(target, type) and hasattr(target, "_mapper"):
             return target
@@ -136,6 +195,7 @@ class Mapper:
                 reverse_rel.local_table_pk = target_mapper.pk
                 reverse_rel.remote_table_pk = self.pk
                 target_mapper.relationships[rel.backref] = reverse_rel
+                target_mapper._instrument_attribute(rel.backref)
         
         else:
             rel._resolved_fk_name = name
@@ -156,12 +216,56 @@ class Mapper:
                 reverse_rel.local_table = target_mapper.table_name
                 reverse_rel.remote_table = self.table_name
                 target_mapper.relationships[backref_name] = reverse_rel
+                target_mapper._instrument_attribute(backref_name)
             else:
                 target_mapper.relationships[self.table_name] = rel
+                target_mapper._instrument_attribute(self.table_name)
+
+    def table_chain(self):
+        """Tables holding a row of this class: its own and, for CLASS and CONCRETE inheritance, its ancestors'."""
+        tables = [self.table_name]
+        mapper = self
+        while mapper.parent and mapper.inheritance.strategy.name in ("CLASS", "CONCRETE"):
+            mapper = mapper.parent
+            tables.append(mapper.table_name)
+        return tables
+
+    def foreign_key_relationships(self):
+        """(attribute name, relationship) for every FK column of this class, inherited ones included."""
+        if self._fk_relationships is None:
+            found = {}
+            mapper = self
+            while mapper is not None:
+                for name, rel in mapper.relationships.items():
+                    if rel.r_type in ("many-to-one", "one-to-one") and rel.local_table == mapper.table_name:
+                        found.setdefault(name, rel)
+                mapper = mapper.parent
+            self._fk_relationships = list(found.items())
+        return self._fk_relationships
 
     @staticmethod
     def finalize_mappers():
+        """Resolve relationships and indexes across all models. A no-op until a new model is registered."""
+        if Mapper._finalized:
+            return
+        with Mapper._finalize_lock:
+            if not Mapper._finalized:
+                Mapper._finalize()
+                Mapper._finalized = True
+
+    @staticmethod
+    def _finalize():
         from miniorm.base import MiniBase
+        from miniorm.builder import QueryBuilder
+
+        # cached SQL was compiled against the previous set of mappers
+        QueryBuilder.select_cache.clear()
+        
+        for mapper in MiniBase._registry.values():
+            mapper._fk_relationships = None
+            mapper._hydrators = {}
+            mapper._tracked = None
+            mapper._deferred = None
         
         for mapper in MiniBase._registry.values():
             resolved = []
@@ -180,6 +284,9 @@ class Mapper:
         
         for mapper in MiniBase._registry.values():
             mapper._resolve_pk()
+            mapper._instrument()
+
+        Mapper._build_reverse_fk_index(MiniBase._registry)
         
         for mapper in MiniBase._registry.values():
             if mapper.inheritance and mapper.inheritance.strategy.name == "CLASS":
@@ -190,6 +297,29 @@ class Mapper:
                     raise ValueError(f"Missing relationship to parent ({mapper.parent.table_name}) in {mapper.table_name} (CLASS inheritance requires it)")
 
 
+    @staticmethod
+    def _build_reverse_fk_index(registry):
+        """
+        For every mapper, list the foreign keys that point at its table:
+        referenced_by = [(referencing mapper, fk column, relationship)].
+        CLASS-inheritance child tables appear here too, their pk references the parent row.
+        """
+        by_table = {}
+        for mapper in registry.values():
+            by_table.setdefault(mapper.table_name, []).append(mapper)
+            mapper.referenced_by = []
+
+        seen = set()
+        for mapper in registry.values():
+            for name, rel in mapper.relationships.items():
+                if rel.r_type not in ("many-to-one", "one-to-one") or rel.local_table != mapper.table_name:
+                    continue
+                if (mapper.table_name, rel._resolved_fk_name) in seen:
+                    continue
+                seen.add((mapper.table_name, rel._resolved_fk_name))
+                for target in by_table.get(rel.remote_table, ()):
+                    target.referenced_by.append((mapper, rel._resolved_fk_name, rel))
+
     def _map_data_to_columns(self, entity):
         mapped_data = {}
 
@@ -209,6 +339,33 @@ class Mapper:
 
         return mapped_data
 
+    def apply_defaults(self, entity):
+        """
+        Fill unset columns from Column.default before an insert. Unset columns
+        with a server_default are left out of the INSERT so the database fills them.
+        """
+        for name, col in self.inheritance.strategy.resolve_attributes(self).items():
+            if name == self.pk or entity.__dict__.get(name) is not None:
+                continue
+            if col.default is not None:
+                entity.__dict__[name] = col.default() if callable(col.default) else col.default
+            elif getattr(col, 'server_default', None) is not None:
+                entity.__dict__.pop(name, None)
+
+    def server_generated_columns(self):
+        """{table_name: (pk column, [columns with a server_default])} over the table chain."""
+        found = {}
+        seen = set()
+        mapper = self
+        while mapper is not None:
+            for name, col in mapper.columns.items():
+                if name in seen or getattr(col, 'server_default', None) is None:
+                    continue
+                seen.add(name)
+                found.setdefault(mapper.table_name, (mapper.pk, []))[1].append(name)
+            mapper = mapper.parent if self.inheritance.strategy.name != "SINGLE" else None
+        return found
+
     def _get_mapper_for_table(self, table_name):
         from miniorm.base import MiniBase
         for m in MiniBase._registry.values():
@@ -223,54 +380,6 @@ class Mapper:
                 return name
         return None
 
-    def _collect_cascade_dependents(self, entity):
-        if _visited is None:
-            _visited = set()
-        if id(entity) in _visited:
-            return []
-        _visited.add(id(entity))
-        out = []
-        mapper = entity._mapper
-        
-        entity_pk = getattr(entity, mapper.pk, None)
-        if entity_pk is None:
-            return [entity]
-
-        target_tables = {mapper.table_name}
-        if mapper.inheritance and mapper.inheritance.strategy.name == "CLASS" and mapper.parent:
-            target_tables.add(mapper.parent.table_name)
-        
-        for other_mapper in MiniBase._registry.values():
-            if other_mapper.cls is entity.__class__:
-                continue
-            for rel in other_mapper.relationships.values():
-                if not getattr(rel, 'cascade_delete', True):
-                    continue
-                if rel.r_type not in ('many-to-one', 'one-to-one'):
-                    continue
-                if not getattr(rel, '_resolved_target', None):
-                    continue
-                
-                fk_target_table = getattr(rel, 'remote_table', None)
-                if not fk_target_table:
-                    fk_target_table = rel._resolved_target._mapper.table_name
-                
-                if fk_target_table not in target_tables:
-                    continue
-                
-                fk_name = getattr(rel, '_resolved_fk_name', None)
-                if not fk_name:
-                    continue
-                self._is_loading = True
-                try:
-                    refs = self.query(other_mapper.cls).filter(**{fk_name: entity_pk}).all()
-                finally:
-                    self._is_loading = False
-                for ref in refs:
-                    out.extend(self._collect_cascade_dependents(ref, _visited))
-        out.append(entity)
-        return out
-
     def prepare_select(self):
         return self.inheritance.strategy.resolve_select(self)
 
@@ -294,23 +403,72 @@ class Mapper:
                     operations[table_name] = filtered
         return operations   
     
-    def prepare_delete(self, entity):
-        return self.inheritance.strategy.resolve_delete(self, entity)
+    def prepare_delete(self, pks):
+        operations = self.inheritance.strategy.resolve_delete(self, pks)
+        operations["_m2m_cleanup"] = [
+            (assoc.name, assoc.local_key, pks) for assoc in self._association_tables()
+        ]
+        return operations
+
+    def _association_tables(self):
+        """Association tables whose local key points at rows of this class."""
+        tables = self.table_chain()
+        found = {}
+        mapper = self
+        while mapper is not None:
+            for rel in mapper.relationships.values():
+                assoc = rel.association_table
+                if rel.r_type == "many-to-many" and assoc and assoc.local_table in tables:
+                    found.setdefault((assoc.name, assoc.local_key), assoc)
+            mapper = mapper.parent
+        return list(found.values())
     
-    def hydrate(self, row_dict):
-        target_cls = self.inheritance.strategy.resolve_target_class(self, row_dict)
-        attributes = self.inheritance.strategy.resolve_attributes(self)
-        obj = target_cls()
-        target_mapper = target_cls._mapper
+    def row_hydrator(self, keys, prefix=None, skip_prefixes=()):
+        """
+        RowHydrator for rows with these column names, compiled once per layout.
+
+        prefix: hydrate from the "prefix#column" columns only (eager joined targets).
+        skip_prefixes: "prefix#column" columns that belong to something else.
+        """
+        cache_key = (tuple(keys), prefix, tuple(skip_prefixes))
+        hydrator = self._hydrators.get(cache_key)
+        if hydrator is None:
+            hydrator = self._compile_hydrator(*cache_key)
+            self._hydrators[cache_key] = hydrator
+        return hydrator
 
-        for key, value in row_dict.items():
-            if value is not None:
+    def _compile_hydrator(self, keys, prefix, skip_prefixes):
+        strategy = self.inheritance.strategy
+        positions = {}
+        for index, key in enumerate(keys):
+            if prefix is not None:
+                if not key.startswith(f"{prefix}#"):
+                    continue
+                key = key[len(prefix) + 1:]
+            elif "#" in key and key.split("#", 1)[0] in skip_prefixes:
+                continue
+            # sqlite3.Row returns the first column of a duplicated name
+            positions.setdefault(key, index)
+
+        plans = {}
+        for cls in self._subclasses():
+            table_name = cls._mapper.table_name
+            attributes = strategy.resolve_attributes(cls._mapper)
+            plan = []
+            for key, index in positions.items():
                 if "#" in key:
-                    table_name, col_name = key.split("#", 1)
-                    if table_name == target_mapper.table_name or col_name in attributes:
-                        object.__setattr__(obj, col_name, value)
-                else:
-                    if key in attributes:
-                        object.__setattr__(obj, key, value)
+                    table, name = key.split("#", 1)
+                    if table == table_name or name in attributes:
+                        plan.append((index, name))
+                elif key in attributes:
+                    plan.append((index, key))
+            plans[cls] = tuple(plan)
+
+        target_class = strategy.compile_target_class(self, positions)
+        return RowHydrator(target_class, plans, positions.get(self.pk))
 
-        return obj
\ No newline at end of file
+    def _subclasses(self):
+        found = [self.cls]
+        for child in self.children:
+            found.extend(child._mapper._subclasses())
+        return found
\ No newline at end of file
@@ -0,0 +1,291 @@
+import hashlib
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+from miniorm.generator import SchemaGenerator
+
+
+class Migration:
+    """One generated migration: the statements that bring the database to the mapped schema."""
+    def __init__(self, version, fingerprint, statements, rebuilt=()):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.statements = statements
+        self.rebuilt = list(rebuilt)
+
+    def script(self):
+        return "".join(f"{sql.strip().rstrip(';')};\n" for sql in self.statements)
+
+    def __repr__(self):
+        return f"<Migration {self.version} ({len(self.statements)} statements)>"
+
+
+class Migrator:
+    """
+    Versioned schema migrations.
+
+    The fingerprint of the mapped schema and a version number are kept in the
+    _miniorm_schema table. migrate() compares fingerprints first and only when they
+    differ introspects the database, generates an ordered migration and runs it once,
+    in a single transaction. Changes ALTER TABLE cannot make (dropped or changed
+    columns, new foreign keys or defaults) rebuild the table: create, copy, drop, rename.
+
+    A rebuild that would drop a primary key or a column still holding values is refused
+    with a RuntimeError, the database is left as it was.
+
+    scripts_dir: also write every applied migration there as <version>_<fingerprint>.sql.
+    drop_columns: allow such a rebuild, True for any column or {table: [column, ...]}
+    for the listed ones only; the values of the dropped columns are lost.
+    """
+    META_TABLE = "_miniorm_schema"
+
+    def __init__(self, engine, registry, generator=None, scripts_dir=None, drop_columns=False):
+        self.engine = engine
+        self.registry = registry
+        self.generator = generator or SchemaGenerator()
+        self.scripts_dir = scripts_dir
+        self.drop_columns = drop_columns
+
+    def fingerprint(self):
+        """Hash of the CREATE statements of the mapped schema, tables, indexes and association tables."""
+        from miniorm.mapper import Mapper
+        Mapper.finalize_mappers()
+
+        parts = []
+        for t_name, info in sorted(self.generator._table_definitions(self.registry).items()):
+            parts.append(self.generator._generate_sql(t_name, info))
+            indexes = self.generator._collect_indexes(t_name, info)
+            columns = self.generator._table_columns(info)
+            parts.extend(sorted(self.generator.generate_index(t_name, name, index, columns=columns)
+                                for name, index in indexes.items()))
+        for rel in sorted(self.generator._m2m_relationships(self.registry), key=lambda r: r.association_table.name):
+            parts.append(" ".join(self.generator.generate_m2m_table(rel).split()))
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def current(self, connection=None):
+        """(version, fingerprint) last applied, (0, None) for a database never migrated."""
+        self._ensure_meta_table(connection)
+        rows = self.engine.execute(
+            f'SELECT version, fingerprint FROM "{self.META_TABLE}" ORDER BY version DESC LIMIT 1',
+            connection=connection
+        )
+        return tuple(rows[0]) if rows else (0, None)
+
+    def history(self):
+        self._ensure_meta_table()
+        rows = self.engine.execute(
+            f'SELECT version, fingerprint, applied_at FROM "{self.META_TABLE}" ORDER BY version'
+        )
+        return [tuple(row) for row in rows]
+
+    def migrate(self):
+        """Bring the database to the mapped schema. Returns the applied Migration or None if it was up to date."""
+        fingerprint = self.fingerprint()
+        if self.current()[1] == fingerprint:
+            return None
+
+        with self.engine.connect() as conn:
+            foreign_keys = self.engine.execute("PRAGMA foreign_keys", connection=conn)[0][0]
+            # a table rebuild drops the old table, which must not cascade into referencing rows
+            self.engine.execute("PRAGMA foreign_keys = OFF", connection=conn)
+            try:
+                # the write lock makes concurrent workers wait here, then see the new fingerprint
+                self.engine.execute("BEGIN IMMEDIATE", connection=conn)
+                try:
+                    version, applied = self.current(conn)
+                    if applied == fingerprint:
+                        self.engine.execute("COMMIT", connection=conn)
+                        return None
+
+                    migration = Migration(version + 1, fingerprint, *self._plan(conn))
+                    for sql in migration.statements:
+                        self.engine.logger.debug(f"Migration {migration.version}: {sql}")
+                        self.engine.execute(sql, connection=conn)
+                    self._check_foreign_keys(conn, migration)
+
+                    self.engine.execute(
+                        f'INSERT INTO "{self.META_TABLE}" (version, fingerprint, applied_at, script) VALUES (?, ?, ?, ?)',
+                        (migration.version, fingerprint, datetime.now(timezone.utc).isoformat(), migration.script()),
+                        connection=conn
+                    )
+                    self.engine.execute("COMMIT", connection=conn)
+                except Exception:
+                    self.engine.execute("ROLLBACK", connection=conn)
+                    raise
+            finally:
+                self.engine.execute(f"PRAGMA foreign_keys = {'ON' if foreign_keys else 'OFF'}", connection=conn)
+
+        self._write_script(migration)
+        return migration
+
+    def plan(self):
+        """The Migration migrate() would run now, without running it."""
+        with self.engine.connect() as conn:
+            version, _ = self.current(conn)
+            return Migration(version + 1, self.fingerprint(), *self._plan(conn))
+
+    def _ensure_meta_table(self, connection=None):
+        self.engine.execute(
+            f'CREATE TABLE IF NOT EXISTS "{self.META_TABLE}" ('
+            'version INTEGER PRIMARY KEY, fingerprint TEXT NOT NULL, applied_at TEXT, script TEXT)',
+            connection=connection
+        )
+
+    def _plan(self, conn):
+        gen = self.generator
+        existing_tables = {row[0] for row in self.engine.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'", connection=conn
+        )}
+        statements = []
+        index_statements = []
+        rebuilt = []
+
+        for t_name, info in gen._table_definitions(self.registry).items():
+            columns = gen._table_columns(info)
+            expected_indexes = {name: gen.generate_index(t_name, name, index, columns=columns)
+                                for name, index in gen._collect_indexes(t_name, info).items()}
+
+            if t_name not in existing_tables:
+                statements.append(gen._generate_sql(t_name, info))
+                index_statements.extend(expected_indexes.values())
+                continue
+
+            existing = self._existing_columns(conn, t_name)
+            added = [name for name in columns if name not in existing]
+            dropped = [name for name in existing if name not in columns]
+            guarded = [name for name in dropped if not self._may_drop(t_name, name)]
+            if guarded:
+                self._check_dropped(conn, t_name, existing, guarded)
+            rebuild = (
+                bool(dropped)
+                or any(self._column_spec(info, name, col) != existing[name] for name, col in columns.items() if name in existing)
+                or self._foreign_keys(columns) != self._existing_foreign_keys(conn, t_name)
+                or any(not self._can_add(info, name, columns[name]) for name in added)
+            )
+
+            existing_indexes = gen._get_existing_indexes(self.engine, t_name, conn) if not rebuild else {}
+            if not rebuild:
+                for name, sql in existing_indexes.items():
+                    if expected_indexes.get(name) != sql:
+                        statements.append(f"DROP INDEX {gen._quote(name)}")
+                for name in added:
+                    sql_type = gen.TYPE_MAP.get(columns[name].dtype, "TEXT") + gen._collate(columns[name])
+                    statements.append(f"ALTER TABLE {gen._quote(t_name)} ADD COLUMN {gen._quote(name)} {sql_type}")
+            else:
+                statements.extend(self._rebuild(t_name, info, [name for name in columns if name in existing]))
+                rebuilt.append(t_name)
+
+            index_statements.extend(sql for name, sql in expected_indexes.items() if existing_indexes.get(name) != sql)
+
+        for rel in gen._m2m_relationships(self.registry):
+            assoc = rel.association_table
+            if assoc.name not in existing_tables:
+                statements.append(gen.generate_m2m_table(rel))
+            name, index = gen._m2m_index(assoc)
+            index_statements.append(gen.generate_index(assoc.name, name, index, if_not_exists=True))
+
+        return statements + index_statements, rebuilt
+
+    def _check_foreign_keys(self, conn, migration):
+        """Rows of rebuilt tables must still point at existing rows."""
+        for t_name in migration.rebuilt:
+            try:
+                violations = self.engine.execute(
+                    f"PRAGMA foreign_key_check({self.generator._quote(t_name)})", connection=conn
+                )
+            except sqlite3.OperationalError as e:
+                # a foreign key to a column that is not unique in its table cannot be checked
+                raise RuntimeError(
+                    f"Migration {migration.version} cannot check the foreign keys of {t_name}: {e}"
+                ) from e
+            if violations:
+                raise RuntimeError(
+                    f"Migration {migration.version} leaves rows of {t_name} with broken foreign keys: {violations[:5]}"
+                )
+
+    def _may_drop(self, t_name, name):
+        if self.drop_columns is True:
+            return True
+        return name in (self.drop_columns or {}).get(t_name, ())
+
+    def _check_dropped(self, conn, t_name, existing, dropped):
+        """Columns a rebuild would drop must be empty and not the primary key."""
+        quote = self.generator._quote
+        for name in dropped:
+            if existing[name][2]:
+                raise RuntimeError(
+                    f"Migration would drop the primary key {name} of {t_name}; pass drop_columns to allow it"
+                )
+            if self.engine.execute(
+                f"SELECT 1 FROM {quote(t_name)} WHERE {quote(name)} IS NOT NULL LIMIT 1", connection=conn
+            ):
+                raise RuntimeError(
+                    f"Migration would drop column {name} of {t_name}, which holds values; "
+                    "pass drop_columns to allow it"
+                )
+
+    def _rebuild(self, t_name, info, kept_columns):
+        """SQLite's table rebuild: new table under a temporary name, copy the kept columns, swap."""
+        gen = self.generator
+        temp_name = f"_migrate_{t_name}"
+        quoted = gen._quote(t_name)
+        temp = gen._quote(temp_name)
+        columns = ", ".join(gen._quote(name) for name in kept_columns)
+        return [
+            gen._generate_sql(temp_name, info),
+            f"INSERT INTO {temp} ({columns}) SELECT {columns} FROM {quoted}",
+            f"DROP TABLE {quoted}",
+            f"ALTER TABLE {temp} RENAME TO {quoted}",
+        ]
+
+    def _column_spec(self, info, name, col):
+        """(type, not null, primary key, default, collation) as _existing_columns reads them."""
+        default = getattr(col, 'server_default', None)
+        return (
+            self.generator.TYPE_MAP.get(col.dtype, "TEXT"),
+            not col.nullable,
+            name == info['mapper'].pk,
+            str(default) if default is not None else None,
+            getattr(col, 'collation', None),
+        )
+
+    def _can_add(self, info, name, col):
+        """ALTER TABLE ADD COLUMN only takes plain nullable columns."""
+        return (col.nullable and name != info['mapper'].pk and not hasattr(col, 'target_table')
+                and getattr(col, 'server_default', None) is None)
+
+    def _existing_columns(self, conn, t_name):
+        rows = self.engine.execute(f"PRAGMA table_info({self.generator._quote(t_name)})", connection=conn)
+        # table_info has no collation, it is read from the column definitions of the CREATE TABLE
+        create_sql = self.engine.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (t_name,), connection=conn
+        )[0][0]
+        return {
+            row[1]: ((row[2] or "").upper(), bool(row[3]), row[5] > 0, row[4], self._collation_of(create_sql, row[1]))
+            for row in rows
+        }
+
+    @staticmethod
+    def _collation_of(create_sql, column):
+        match = re.search(rf'"{re.escape(column)}"\s+\w+\s+COLLATE\s+(\w+)', create_sql, re.IGNORECASE)
+        return match.group(1).upper() if match else None
+
+    def _foreign_keys(self, columns):
+        return {
+            name: (col.target_table, col.target_column, bool(getattr(col, 'on_delete_cascade', False)))
+            for name, col in columns.items() if hasattr(col, 'target_table')
+        }
+
+    def _existing_foreign_keys(self, conn, t_name):
+        rows = self.engine.execute(f"PRAGMA foreign_key_list({self.generator._quote(t_name)})", connection=conn)
+        return {row[3]: (row[2], row[4], row[6] == "CASCADE") for row in rows}
+
+    def _write_script(self, migration):
+        if not self.scripts_dir:
+            return
+        os.makedirs(self.scripts_dir, exist_ok=True)
+        path = os.path.join(self.scripts_dir, f"{migration.version:04d}_{migration.fingerprint[:12]}.sql")
+        with open(path, "w") as f:
+            f.write(migration.script())
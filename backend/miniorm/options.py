@@ -0,0 +1,27 @@
+"""
+Loader options for Query.options(), similar to SQLAlchemy.
+They load relationships together with the query instead of one lazy query per object.
+"""
+
+
+class LoaderOption:
+    """Eager loading strategy for one relationship of the queried class"""
+    def __init__(self, key, strategy):
+        self.key = key
+        self.strategy = strategy
+
+    def __repr__(self):
+        return f"<LoaderOption {self.strategy} {self.key}>"
+
+
+def joinedload(key):
+    """
+    Load a many-to-one / one-to-one relationship through a LEFT JOIN in the same SELECT.
+    Collections and multi-table targets fall back to selectin loading.
+    """
+    return LoaderOption(key, "joined")
+
+
+def selectinload(key):
+    """Load a relationship for all results with one extra SELECT ... WHERE key IN (...)."""
+    return LoaderOption(key, "selectin")
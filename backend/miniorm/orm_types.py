@@ -35,12 +35,29 @@ class Relationship:
         return f"<Relationship {', '.join(parts)}>"
 
 class Column:
-    def __init__(self, dtype, pk=False, nullable=True, unique=False, default=None):
+    """
+    default: value (or zero-argument callable) filled in by the ORM on insert.
+    server_default: SQL expression the database fills in, e.g. "CURRENT_TIMESTAMP";
+    such columns are read back after the insert.
+    unique / index: create a (unique) index on the column.
+    collation: "NOCASE" compares (and indexes) text ignoring ASCII case, "RTRIM" ignores trailing spaces.
+    deferred: left out of queries, loaded on first access (Query.defer / load_only per query).
+    """
+    COLLATIONS = ("BINARY", "NOCASE", "RTRIM")
+
+    def __init__(self, dtype, pk=False, nullable=True, unique=False, default=None, server_default=None, index=False,
+                 collation=None, deferred=False):
+        if collation is not None and collation.upper() not in self.COLLATIONS:
+            raise ValueError(f"Unknown collation: {collation}")
         self.dtype = dtype
         self.pk = pk
         self.nullable = nullable
         self.unique = unique
         self.default = default
+        self.server_default = server_default
+        self.index = index
+        self.collation = collation.upper() if collation else None
+        self.deferred = deferred
 
     def __eq__(self, other):
         return FilterExpr(self, '=', other)
@@ -95,12 +112,14 @@ class CombinedFilterExpr:
         return f"<CombinedFilterExpr {self.left} {self.op} {self.right}>"
     
 class Text(Column):
-    def __init__(self, pk=False, nullable=True, unique=False, default=None):
-        super().__init__(str, pk, nullable, unique, default)
+    def __init__(self, pk=False, nullable=True, unique=False, default=None, server_default=None, index=False,
+                 collation=None, deferred=False):
+        super().__init__(str, pk, nullable, unique, default, server_default, index, collation, deferred)
 
 class Number(Column):
-    def __init__(self, pk=False, nullable=True, unique=False, default=None):
-        super().__init__(int, pk, nullable, unique, default)
+    def __init__(self, pk=False, nullable=True, unique=False, default=None, server_default=None, index=False,
+                 deferred=False):
+        super().__init__(int, pk, nullable, unique, default, server_default, index, deferred=deferred)
 
 class ForeignKey(Column):
     def __init__(self, target_table, target_column, pk=False, nullable=True, unique=True, on_delete_cascade=True):
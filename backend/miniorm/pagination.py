@@ -0,0 +1,34 @@
+import math
+
+
+class Page:
+    """
+    One page of query results, returned by Query.paginate().
+
+    total is the number of rows matching the query without paging. next_after is
+    the keyset to pass as paginate(after=...) for the following page, or None on
+    the last page.
+    """
+    def __init__(self, items, total, page, per_page, next_after=None):
+        self.items = items
+        self.total = total
+        self.page = page
+        self.per_page = per_page
+        self.next_after = next_after
+
+    @property
+    def pages(self):
+        return math.ceil(self.total / self.per_page) if self.total else 0
+
+    @property
+    def has_next(self):
+        return self.next_after is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return f"<Page {self.page or 'after'} ({len(self.items)} of {self.total})>"
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import deque
+
+
+class ConnectionPool:
+    """
+    Checkout/checkin pool of database connections shared between threads.
+
+    At most `size` connections exist at once. When all of them are checked out,
+    `checkout` blocks until one is returned or `timeout` seconds pass.
+    """
+    def __init__(self, creator, size=5, timeout=30.0):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self._creator = creator
+        self.size = size
+        self.timeout = timeout
+
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._checked_out = 0
+        self._waiting = 0
+        self._created = 0
+
+    def checkout(self, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._cond:
+            while not self._idle and self._checked_out >= self.size:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out after {timeout}s waiting for a connection "
+                        f"(pool size {self.size}, all checked out)"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            self._checked_out += 1
+            if self._idle:
+                return self._idle.pop()
+
+        # Slot is reserved, create the connection outside the lock
+        try:
+            conn = self._creator()
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def checkin(self, conn):
+        if getattr(conn, "in_transaction", False):
+            # never hand out a connection with a half-finished transaction
+            conn.rollback()
+        with self._cond:
+            self._checked_out -= 1
+            self._idle.append(conn)
+            self._cond.notify()
+
+    def status(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "checked_out": self._checked_out,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "created": self._created,
+            }
+
+    def dispose(self):
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+
+
+class StaticPool(ConnectionPool):
+    """
+    Hands the same connection to every caller.
+
+    Used for ":memory:" databases, where each new connection would open a
+    separate, empty database.
+    """
+    def __init__(self, creator, timeout=30.0):
+        super().__init__(creator, size=1, timeout=timeout)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def checkout(self, timeout=None):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._creator()
+                self._created += 1
+            self._checked_out += 1
+            return self._conn
+
+    def checkin(self, conn):
+        with self._lock:
+            self._checked_out -= 1
+
+    def status(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "checked_out": self._checked_out,
+                "idle": 0 if self._checked_out else int(self._conn is not None),
+                "waiting": 0,
+                "created": self._created,
+            }
+
+    def dispose(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
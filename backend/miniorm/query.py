@@ -1,9 +1,19 @@
+import copy
 from miniorm.base import MiniBase
 from miniorm.orm_types import Column
 from miniorm.states import ObjectState
-from miniorm.filters import FilterExpression
+from miniorm.filters import FilterExpression, ComparisonFilter, col
+from miniorm.pagination import Page
+from miniorm.instrumented import InstrumentedList
+from miniorm.aggregates import Aggregate, func
+from miniorm.result import Rows
+from miniorm.deferred import DeferredLoad
 
 class Query:
+    STREAM_CHUNK_SIZE = 1000
+    IN_CHUNK_SIZE = 500
+    ROW_TYPES = ("tuple", "named", "dict")
+
     def __init__(self, model_class, session):
         self.model_class = model_class
         self.session = session
@@ -13,6 +23,22 @@ class Query:
         self._offset = None
         self._joins = []
         self._order_by = []
+        self._options = []
+        self._yield_per = None
+        # set by __iter__ and passed on to related queries: loaded objects are held weakly
+        self._streaming = False
+        self._group_by = []
+        self._having = []
+        # entity cache generation when the rows were read, see EntityCache.put
+        self._cache_generation = None
+        self._readonly = getattr(session, 'readonly', False)
+        # detached objects of the current chunk of a read-only query, by (class, pk)
+        self._detached = {}
+        # with_columns(): [(label, select item, eager join or None)] and the row type
+        self._projection = None
+        self._row_type = "tuple"
+        # columns left out by defer() / load_only(), None for the mapper's Column(deferred=True) ones
+        self._deferred = None
 
     def filter(self, *args, **kwargs):
         """
@@ -40,51 +66,351 @@ class Query:
     def limit(self, value: int):
         self._limit = value
         return self
+
+    def offset(self, value: int):
+        self._offset = value
+        return self
     
     def order_by(self, column_attr, direction="ASC"):
+        """Order by a column attribute (Model.column) or a column name."""
         direction = direction.upper()
         if direction not in ("ASC", "DESC"):
             raise ValueError("Direction must be ASC or DESC")
         
-        column_name = self.model_class._mapper._get_column_name(column_attr)
+        mapper = self.model_class._mapper
+        if isinstance(column_attr, str):
+            attributes = mapper.inheritance.strategy.resolve_attributes(mapper)
+            column_name = column_attr if column_attr in attributes else None
+        else:
+            column_name = mapper._get_column_name(column_attr)
         if column_name is None:
             raise AttributeError(f"Column {column_attr} is not an attribute of {self.model_class.__name__}")
         self._order_by.append((column_name, direction))
         return self
     
+    def options(self, *options):
+        """
+        Eager load relationships of the results:
+        query(Visit).options(joinedload('pet'), selectinload('procedures'))
+        """
+        mapper = self.model_class._mapper
+        for option in options:
+            rel = mapper.relationships.get(option.key)
+            if rel is None:
+                raise AttributeError(f"Model {self.model_class.__name__} has no relationship {option.key}")
+            if rel.r_type in ("many-to-one", "one-to-one") and rel.local_table not in mapper.table_chain():
+                raise ValueError(f"Relationship {option.key} of {self.model_class.__name__} has no foreign key to load by")
+            self._options.append(option)
+        return self
+
+    def readonly(self):
+        """
+        Load detached, untracked objects: no identity map, no snapshot, no change tracking.
+        Relationships are only there when eager loaded with options(); for large reads.
+        """
+        self._readonly = True
+        return self
+
+    def defer(self, *names):
+        """Leave these columns out of the SELECT; they are loaded together on first access."""
+        mapper = self.model_class._mapper
+        deferrable = mapper.deferrable_columns()
+        attributes = mapper.inheritance.strategy.resolve_attributes(mapper)
+        for name in names:
+            if name not in attributes:
+                raise AttributeError(f"Column {name} is not an attribute of {self.model_class.__name__}")
+            if name not in deferrable:
+                raise ValueError(f"Column {name} is a primary or foreign key and cannot be deferred")
+        self._deferred = self._deferred_columns(mapper) | frozenset(names)
+        return self
+
+    def load_only(self, *names):
+        """Select only these columns (and the primary and foreign keys), defer all others."""
+        mapper = self.model_class._mapper
+        attributes = mapper.inheritance.strategy.resolve_attributes(mapper)
+        for name in names:
+            if name not in attributes:
+                raise AttributeError(f"Column {name} is not an attribute of {self.model_class.__name__}")
+        self._deferred = frozenset(name for name in mapper.deferrable_columns() if name not in names)
+        return self
+
+    def _deferred_columns(self, mapper):
+        return self._deferred if self._deferred is not None else mapper.deferred_columns()
+
+    def with_columns(self, *columns, row_type="tuple"):
+        """
+        Select only these columns and return rows instead of objects, straight from the cursor:
+        query(Pet).with_columns("pet_id", "name", "owner.last_name", row_type="dict").all()
+
+        "rel.column" reads a column of a many-to-one relationship's target (LEFT JOIN), inherited
+        columns included: the tables of the target's CLASS or CONCRETE ancestors are joined too.
+        row_type: "tuple", "named" (namedtuples, "owner.last_name" -> owner_last_name) or "dict".
+        Nothing is hydrated or tracked; eager load options do not apply.
+        """
+        if not columns:
+            raise ValueError("with_columns needs at least one column")
+        if row_type not in self.ROW_TYPES:
+            raise ValueError(f"row_type must be one of {', '.join(self.ROW_TYPES)}")
+        mapper = self.model_class._mapper
+        attributes = mapper.inheritance.strategy.resolve_attributes(mapper)
+        self._projection = [self._projection_item(mapper, attributes, name) for name in columns]
+        self._row_type = row_type
+        return self
+
+    def values(self, *columns, row_type="tuple"):
+        """Rows of just these columns, see with_columns()."""
+        return self._copy().with_columns(*columns, row_type=row_type).all()
+
+    def _projection_item(self, mapper, attributes, name):
+        if "." not in name:
+            if name not in attributes:
+                raise AttributeError(f"Column {name} is not an attribute of {self.model_class.__name__}")
+            return name, name, None
+
+        key, column = name.split(".", 1)
+        rel = mapper.relationships.get(key)
+        if rel is None:
+            raise AttributeError(f"Model {self.model_class.__name__} has no relationship {key}")
+        if rel.r_type not in ("many-to-one", "one-to-one") or rel.local_table not in mapper.table_chain():
+            raise ValueError(f"Relationship {key} of {self.model_class.__name__} has no foreign key to select by")
+        target_mapper = rel._resolved_target._mapper
+        if column not in target_mapper.inheritance.strategy.resolve_attributes(target_mapper):
+            raise AttributeError(f"Column {column} is not an attribute of {target_mapper.cls.__name__}")
+        return name, f"{key}#{column}", (key, rel)
+
+    def _project(self, rows):
+        rows = Rows(rows, tuple(label for label, _, _ in self._projection))
+        if self._row_type == "dict":
+            return rows.dicts()
+        if self._row_type == "named":
+            return rows.namedtuples()
+        return rows
+
+    def yield_per(self, count):
+        """Iterate in chunks of `count` rows: each chunk is fetched, hydrated and eager loaded before the next."""
+        if count < 1:
+            raise ValueError("yield_per count must be positive")
+        self._yield_per = count
+        return self
+
     def all(self):
+        mapper, sql, params, joined, selectin = self._compile()
+        if self._projection is not None:
+            return self._project(self.session.execute(sql, params))
+        self._cache_generation = self._read_generation()
+        rows = self.session.execute(sql, params)
+        return self._load(mapper, rows, joined, selectin)
+
+    def __iter__(self):
+        """Stream results from the cursor instead of building the whole list first."""
+        mapper, sql, params, joined, selectin = self._compile()
+        self._cache_generation = self._read_generation()
+        self._streaming = True
+        for rows in self.session.iterate(sql, params, size=self._yield_per or self.STREAM_CHUNK_SIZE):
+            if self._projection is not None:
+                yield from self._project(rows)
+            else:
+                yield from self._load(mapper, rows, joined, selectin)
+
+    def _read_generation(self):
+        cache = getattr(getattr(self.session, 'engine', None), 'entity_cache', None)
+        return cache.generation if cache is not None else None
+
+    def _compile(self):
         if hasattr(self.session, '_autoflush'):
             self.session._autoflush()
             
         mapper = MiniBase._registry.get(self.model_class)
+        if self._projection is not None:
+            joined, selectin = [], []
+            eager_joins = list(dict.fromkeys(join for _, _, join in self._projection if join))
+            select = [item for _, item, _ in self._projection]
+            deferred = None
+        else:
+            joined, selectin = self._split_options(mapper)
+            eager_joins, select = joined, None
+            deferred = self._deferred_columns(mapper)
         sql, params = self.session.query_builder.build_select(
             mapper, self.filters, filter_expressions=self.filter_expressions,
-            limit=self._limit, offset=self._offset, joins=self._joins, order_by=self._order_by
+            limit=self._limit, offset=self._offset, joins=self._joins, order_by=self._order_by,
+            eager_joins=eager_joins, select=select, deferred=deferred
         )
-        
-        rows = self.session.engine.execute(sql, params)
-        
+        return mapper, sql, params, joined, selectin
+
+    def _load(self, mapper, rows, joined, selectin):
+        self._detached = {}
         results = []
-        for row in rows:
-            row_dict = dict(row) if hasattr(row, 'keys') else {}
-            
-            obj = mapper.hydrate(row_dict)
-
-            if obj:
-                pk_val = getattr(obj, mapper.pk, None)
-                if pk_val is not None:
-                    existing = self.session.identity_map.get(obj.__class__, pk_val)
-                    if existing:
-                        if getattr(existing, '_orm_state', None) == ObjectState.DELETED:
-                            continue
-                        results.append(existing)
-                        continue
-                
-                obj = self.session._make_persistent(obj)
-                results.append(obj)
+        targets = None
+        deferred = self._deferred_columns(mapper)
+        pending = DeferredLoad(self.session, mapper, deferred) if deferred else None
+        for obj, row in self._instances(mapper, rows, [key for key, _ in joined], pending):
+            if obj is None:
+                continue
+            if targets is None:
+                targets = [(key, rel._resolved_target._mapper.row_hydrator(rows.columns, prefix=key)) for key, rel in joined]
+            for key, hydrate in targets:
+                has_target = hydrate.pk_index is not None and row[hydrate.pk_index] is not None
+                self._set_loaded(obj, key, self._instance(hydrate, row) if has_target else None)
+            results.append(obj)
+
+        for key, rel in selectin:
+            self._selectin(results, key, rel)
                 
         return results
 
+    def _split_options(self, mapper):
+        """Joined loading works for foreign keys to single-table classes, the rest is loaded select-in."""
+        joined, selectin = [], []
+        for option in self._options:
+            rel = mapper.relationships[option.key]
+            target_mapper = rel._resolved_target._mapper
+            if (option.strategy == "joined" and rel.r_type in ("many-to-one", "one-to-one")
+                    and len(target_mapper.table_chain()) == 1 and not target_mapper.children):
+                joined.append((option.key, rel))
+            else:
+                selectin.append((option.key, rel))
+        return joined, selectin
+
+    def _instances(self, mapper, rows, prefixes=(), pending=None):
+        """
+        Turn rows into identity-mapped objects. Yields (object, row) per row; object is None
+        for deleted rows. "prefix#column" values of eager joins are left in the row.
+
+        The mapper's hydrator for the result's columns is looked up once, then every
+        row tuple is read by position. pending: DeferredLoad of the columns the rows lack.
+        """
+        hydrate = mapper.row_hydrator(rows.columns, skip_prefixes=prefixes)
+        for row in rows:
+            yield self._instance(hydrate, row, pending), row
+
+    def _instance(self, hydrate, row, pending=None):
+        cls = hydrate.target_class(row)
+        pk_val = row[hydrate.pk_index] if hydrate.pk_index is not None else None
+        if self._readonly:
+            return self._detached_instance(hydrate, cls, pk_val, row, pending)
+        if pk_val is not None:
+            existing = self.session.identity_map.get(cls, pk_val)
+            if existing:
+                if getattr(existing, '_orm_state', None) == ObjectState.DELETED:
+                    return None
+                if not self._streaming:
+                    self.session.identity_map.add(cls, pk_val, existing)
+                return existing
+        obj = hydrate.build(cls, row)
+        if pending is not None and pk_val is not None:
+            pending.add(pk_val, obj)
+        # the entity cache only takes complete rows
+        elif pk_val is not None and self._cache_generation is not None:
+            cache = self.session._entity_cache(cls._mapper)
+            if cache is not None:
+                values = obj.__dict__
+                cache.put(cls._mapper, pk_val, cls,
+                          {name: values[name] for _, name in hydrate.plans[cls] if name in values},
+                          self._cache_generation)
+        return self.session._make_persistent(obj, self._streaming)
+
+    def _detached_instance(self, hydrate, cls, pk_val, row, pending=None):
+        """Read-only result object, shared by the rows of one chunk that reference the same row."""
+        key = (cls, pk_val)
+        obj = self._detached.get(key) if pk_val is not None else None
+        if obj is None:
+            obj = hydrate.build(cls, row)
+            object.__setattr__(obj, '_orm_state', ObjectState.DETACHED)
+            if pk_val is not None:
+                self._detached[key] = obj
+                if pending is not None:
+                    pending.add(pk_val, obj)
+        return obj
+
+    def _related_query(self, target_cls):
+        query = self.session.query(target_cls)
+        query._readonly = self._readonly
+        query._streaming = self._streaming
+        return query
+
+    def _set_loaded(self, obj, key, value):
+        """Store an eagerly loaded relationship unless the object already holds a loaded or changed one."""
+        current = obj.__dict__.get(key)
+        if isinstance(value, list):
+            if not isinstance(current, list):
+                object.__setattr__(obj, key, InstrumentedList(obj, key, value))
+        elif not hasattr(current, '_orm_state'):
+            if value is not None or current is None:
+                object.__setattr__(obj, key, value)
+
+    def _selectin(self, results, key, rel):
+        """Load one relationship for all results with a single IN query."""
+        if not results:
+            return
+        target_cls = rel._resolved_target
+        target_mapper = target_cls._mapper
+        pk_name = results[0]._mapper.pk
+
+        if rel.r_type in ("many-to-one", "one-to-one"):
+            fk_name = rel._resolved_fk_name
+            refs = {}
+            for obj in results:
+                value = obj.__dict__.get(fk_name)
+                if hasattr(value, '_orm_state'):
+                    continue
+                if value is not None and not isinstance(value, Column):
+                    refs.setdefault(value, []).append(obj)
+            if not refs:
+                return
+            if self._readonly:
+                loaded = self._load_in(target_cls, target_mapper.pk, list(refs))
+                found = {target.__dict__.get(target_mapper.pk): target for target in loaded}
+            else:
+                # held until assigned below, a streaming query keeps only weak references in the identity map
+                cached = [self.session._get_cached(target_cls, pk, self._streaming) for pk in refs
+                          if self.session.identity_map.get(target_cls, pk) is None]
+                missing = [pk for pk in refs if self.session.identity_map.get(target_cls, pk) is None]
+                loaded = self._load_in(target_cls, target_mapper.pk, missing)
+                found = {pk: self.session.identity_map.get(target_cls, pk) for pk in refs}
+            for pk, owners in refs.items():
+                target = found.get(pk)
+                for obj in owners:
+                    self._set_loaded(obj, key, target)
+
+        elif rel.r_type == "one-to-many":
+            fk_name = rel._resolved_fk_name
+            owners = {obj.__dict__.get(pk_name): obj for obj in results}
+            children = self._load_in(target_cls, fk_name, list(owners))
+            grouped = {pk: [] for pk in owners}
+            for child in children:
+                value = child.__dict__.get(fk_name)
+                if hasattr(value, '_orm_state'):
+                    value = value.__dict__.get(value._mapper.pk)
+                if value in grouped:
+                    grouped[value].append(child)
+            for pk, obj in owners.items():
+                self._set_loaded(obj, key, grouped[pk])
+
+        elif rel.r_type == "many-to-many":
+            owners = {obj.__dict__.get(pk_name): obj for obj in results}
+            owner_pks = list(owners)
+            grouped = {pk: [] for pk in owners}
+            for start in range(0, len(owner_pks), self.IN_CHUNK_SIZE):
+                sql, params = self.session.query_builder.build_select(
+                    target_mapper, {}, link=(rel.association_table, owner_pks[start:start + self.IN_CHUNK_SIZE])
+                )
+                rows = self.session.execute(sql, params)
+                owner_index = rows.index_of("_link#owner")
+                for target, row in self._instances(target_mapper, rows, ["_link"]):
+                    owner_pk = row[owner_index]
+                    if target is not None and owner_pk in grouped:
+                        grouped[owner_pk].append(target)
+            for pk, obj in owners.items():
+                self._set_loaded(obj, key, grouped[pk])
+
+    def _load_in(self, target_cls, column_name, values):
+        """Related objects whose column is one of values, IN_CHUNK_SIZE values per query."""
+        loaded = []
+        for start in range(0, len(values), self.IN_CHUNK_SIZE):
+            chunk = values[start:start + self.IN_CHUNK_SIZE]
+            loaded.extend(self._related_query(target_cls).filter(col(column_name).in_(chunk)).all())
+        return loaded
+
     def first(self):
         self.limit(1)
         results = self.all()
@@ -95,6 +421,187 @@ class Query:
             return None
         return obj
     
+    def paginate(self, page=1, per_page=20, after=None):
+        """
+        One Page of results with the total number of matching rows.
+
+        page / per_page pages with LIMIT/OFFSET. after=(order value, pk) continues
+        behind that row of the previous page (Page.next_after) with a WHERE on the
+        order column instead, so a deep page costs the same as the first one. The order
+        value may be None for a NULL; a bare pk is enough when ordering by the pk.
+        Results are ordered by the first order_by column (if any), then by primary key.
+        """
+        if per_page < 1:
+            raise ValueError("per_page must be positive")
+        mapper = self.model_class._mapper
+        if len(self._order_by) > 1 and after is not None:
+            raise ValueError("Keyset pagination supports a single order_by column")
+
+        counting = self._copy()
+        counting._limit = counting._offset = None
+        counting._order_by = []
+        total = counting.count()
+
+        query = self._copy()
+        order_col, direction = self._order_by[0] if self._order_by else (mapper.pk, "ASC")
+        if order_col != mapper.pk:
+            query._order_by.append((mapper.pk, direction))
+
+        if after is not None:
+            if not isinstance(after, tuple):
+                if order_col != mapper.pk:
+                    raise ValueError(f"after needs the {order_col} value of the last row, not only its primary key")
+                after = (after, after)
+            value, pk_val = after
+            op = ">" if direction == "ASC" else "<"
+            if order_col == mapper.pk:
+                query.filter_expressions.append(ComparisonFilter(mapper.pk, op, pk_val))
+            else:
+                query.filter_expressions.append(self._behind(order_col, op, value, ComparisonFilter(mapper.pk, op, pk_val)))
+            query._offset = None
+            page = None
+        else:
+            if page < 1:
+                raise ValueError("page must be 1 or more")
+            query._offset = (page - 1) * per_page
+        query._limit = per_page
+
+        items = query.all()
+        next_after = None
+        if len(items) == per_page:
+            next_after = self._next_after(items[-1], order_col, mapper.pk)
+        return Page(items, total, page, per_page, next_after)
+
+    def _behind(self, order_col, op, value, pk_behind):
+        """
+        Rows behind (value, pk) in ORDER BY order_col, pk. SQLite sorts NULLs first, so
+        they come before every value ascending and after every value descending.
+        """
+        column = col(order_col)
+        if value is None:
+            same = column.is_null() & pk_behind
+            return same | column.is_not_null() if op == ">" else same
+        behind = ComparisonFilter(order_col, op, value) | ((column == value) & pk_behind)
+        return behind if op == ">" else behind | column.is_null()
+
+    def _next_after(self, last, order_col, pk_name):
+        """(order value, pk) of the last item of a page; None for rows that do not have both columns."""
+        if self._projection is not None:
+            labels = [label for label, _, _ in self._projection]
+            if order_col not in labels or pk_name not in labels:
+                return None
+            values = list(last.values()) if isinstance(last, dict) else last
+            return values[labels.index(order_col)], values[labels.index(pk_name)]
+        value = last.__dict__.get(order_col)
+        if hasattr(value, '_mapper'):
+            value = value.__dict__.get(value._mapper.pk)
+        return value, last.__dict__.get(pk_name)
+
+    def _copy(self):
+        clone = copy.copy(self)
+        clone.filters = dict(self.filters)
+        clone.filter_expressions = list(self.filter_expressions)
+        clone._joins = list(self._joins)
+        clone._order_by = list(self._order_by)
+        clone._options = list(self._options)
+        clone._group_by = list(self._group_by)
+        clone._having = list(self._having)
+        return clone
+
+    def group_by(self, *column_names):
+        mapper = self.model_class._mapper
+        attributes = mapper.inheritance.strategy.resolve_attributes(mapper)
+        for name in column_names:
+            if name not in attributes:
+                raise AttributeError(f"Column {name} is not an attribute of {self.model_class.__name__}")
+        self._group_by.extend(column_names)
+        return self
+
+    def having(self, *expressions):
+        """Filter groups on aggregates: having(func.sum('paid') > 100)"""
+        for expr in expressions:
+            if not isinstance(expr, FilterExpression):
+                raise TypeError(f"Expected FilterExpression, got {type(expr)}")
+        self._having.extend(expressions)
+        return self
+
+    def count(self):
+        """Number of matching rows (of groups with group_by), counted by the database."""
+        mapper = self.model_class._mapper
+        if self._joins and not self._group_by:
+            counter = func.count(mapper.pk, distinct=True)
+        else:
+            counter = func.count()
+        return self._aggregate_values([counter])[0]
+
+    def exists(self):
+        if hasattr(self.session, '_autoflush'):
+            self.session._autoflush()
+        mapper = self.model_class._mapper
+        sql, params = self._build_select(select=[mapper.pk], limit=1)
+        sql, params = self.session.query_builder.build_exists(sql, params)
+        return bool(self.session.execute(sql, params)[0][0])
+
+    def sum(self, column_name):
+        return self.aggregate(func.sum(column_name))
+
+    def avg(self, column_name):
+        return self.aggregate(func.avg(column_name))
+
+    def min(self, column_name):
+        return self.aggregate(func.min(column_name))
+
+    def max(self, column_name):
+        return self.aggregate(func.max(column_name))
+
+    def aggregate(self, *aggregates):
+        """
+        Compute aggregates in SQL, nothing is hydrated.
+
+        Without group_by: the value of a single aggregate, a tuple for several.
+        With group_by: a list of tuples (group columns..., aggregates...).
+        """
+        for agg in aggregates:
+            if not isinstance(agg, Aggregate):
+                raise TypeError(f"Expected Aggregate, got {type(agg)}")
+        if self._group_by:
+            if hasattr(self.session, '_autoflush'):
+                self.session._autoflush()
+            sql, params = self._build_select(
+                select=list(self._group_by) + list(aggregates), limit=self._limit, offset=self._offset,
+                order_by=self._order_by, group_by=self._group_by, having=self._having
+            )
+            return [tuple(row) for row in self.session.execute(sql, params)]
+
+        values = self._aggregate_values(aggregates)
+        return values[0] if len(aggregates) == 1 else values
+
+    def _aggregate_values(self, aggregates):
+        """One row of aggregates. LIMIT/OFFSET and groups are applied in a subquery first."""
+        if hasattr(self.session, '_autoflush'):
+            self.session._autoflush()
+
+        if self._limit is None and self._offset is None and not self._group_by:
+            sql, params = self._build_select(select=list(aggregates))
+        else:
+            mapper = self.model_class._mapper
+            columns = list(self._group_by) or [mapper.pk]
+            for agg in aggregates:
+                if not self._group_by and agg.column_name and agg.column_name not in columns:
+                    columns.append(agg.column_name)
+            sql, params = self._build_select(
+                select=columns, limit=self._limit, offset=self._offset, order_by=self._order_by,
+                group_by=self._group_by, having=self._having
+            )
+            sql, params = self.session.query_builder.build_aggregate_over(sql, params, aggregates)
+        return tuple(self.session.execute(sql, params)[0])
+
+    def _build_select(self, **kwargs):
+        mapper = self.model_class._mapper
+        return self.session.query_builder.build_select(
+            mapper, self.filters, filter_expressions=self.filter_expressions, joins=self._joins, **kwargs
+        )
+
     def join(self, relationship_name):
         mapper = self.model_class._mapper
         if relationship_name not in mapper.relationships:
@@ -114,21 +621,19 @@ class Query:
                f'JOIN "{assoc_table}" AS a ON t."{target_pk}" = a."{remote_key}" '
                f'WHERE a."{local_key}" = ?')
         
-        rows = self.session.engine.execute(sql, (local_id,))
+        rows = self.session.execute(sql, (local_id,))
+        hydrate = target_mapper.row_hydrator(rows.columns)
         
         results = []
         for row in rows:
-            row_dict = dict(row) if hasattr(row, 'keys') else {}
-            
-            pk_val = row_dict.get(target_pk)
+            pk_val = row[hydrate.pk_index] if hydrate.pk_index is not None else None
             existing = self.session.identity_map.get(self.model_class, pk_val)
             
             if existing:
                 results.append(existing)
             else:
-                obj = target_mapper.hydrate(row_dict)
+                obj = hydrate(row)
                 
-                from miniorm.states import ObjectState
                 object.__setattr__(obj, '_orm_state', ObjectState.PERSISTENT)
                 object.__setattr__(obj, '_session', self.session)
                 
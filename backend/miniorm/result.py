@@ -0,0 +1,46 @@
+from collections import namedtuple
+from functools import lru_cache
+
+
+class Rows(list):
+    """
+    Rows of one SELECT as plain tuples, plus the statement's column names.
+
+    Column names are read from the cursor once per statement; use index_of() (or the
+    compiled hydrators) to address values by position instead of by name per row.
+    """
+    def __init__(self, rows=(), columns=()):
+        super().__init__(rows)
+        self.columns = columns
+        self._index = None
+
+    @classmethod
+    def from_cursor(cls, cursor, rows):
+        return cls(rows, cls.cursor_columns(cursor))
+
+    @staticmethod
+    def cursor_columns(cursor):
+        return tuple(d[0] for d in cursor.description or ())
+
+    def index_of(self, column):
+        """Position of a column; the first one wins for duplicated names (like sqlite3.Row)."""
+        if self._index is None:
+            index = {}
+            for i, name in enumerate(self.columns):
+                index.setdefault(name, i)
+            self._index = index
+        return self._index[column]
+
+    def dicts(self):
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in self]
+
+    def namedtuples(self):
+        """Rows as named tuples; dots in column names become underscores ("owner.name" -> owner_name)."""
+        row_class = _row_class(self.columns)
+        return [row_class._make(row) for row in self]
+
+
+@lru_cache(maxsize=256)
+def _row_class(columns):
+    return namedtuple("Row", [name.replace(".", "_") for name in columns], rename=True)
@@ -0,0 +1,132 @@
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from miniorm.result import Rows
+
+
+_READ_TABLE = re.compile(r'\b(?:FROM|JOIN)\s+(?:"([^"]+)"|(\w+))', re.IGNORECASE)
+_WRITE_TABLE = re.compile(
+    r'^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(?:"([^"]+)"|(\w+))',
+    re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=1024)
+def tables_read(sql):
+    """Tables a SELECT reads: every FROM and JOIN, so joins and CLASS-inheritance parents too."""
+    if not sql.lstrip()[:6].upper() == "SELECT":
+        return ()
+    return tuple(sorted({quoted or bare for quoted, bare in _READ_TABLE.findall(sql)}))
+
+
+@lru_cache(maxsize=1024)
+def table_written(sql):
+    """Table an INSERT / UPDATE / DELETE writes to, None for other statements."""
+    match = _WRITE_TABLE.match(sql)
+    return (match.group(1) or match.group(2)) if match else None
+
+
+class ResultCache:
+    """
+    Rows of SELECT statements, keyed by SQL and parameters, shared by the sessions of an engine.
+
+    Every table has a version, bumped by sessions when they write to it (after the
+    statement and again after COMMIT). An entry remembers the versions of the tables
+    its statement read, taken before it ran, and is only served while they are unchanged.
+
+    Other connections, also in other processes, are noticed through PRAGMA data_version
+    of the connection doing the lookup: when it moved, somebody else committed and the
+    whole cache is dropped. A connection seen for the first time drops it as well.
+    Sessions skip the cache inside a transaction.
+    """
+    def __init__(self, maxsize=256, max_rows=10000, check_data_version=True):
+        self.maxsize = maxsize
+        self.max_rows = max_rows
+        self.check_data_version = check_data_version
+        self._entries = OrderedDict()
+        self._by_table = {}
+        self._versions = {}
+        # moved on when the whole cache is dropped, part of every version snapshot
+        self._epoch = 0
+        # last PRAGMA data_version seen per connection (by id(), sqlite3 connections take no weakrefs)
+        self._data_versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def versions(self, tables):
+        with self._lock:
+            return self._snapshot(tables)
+
+    def _snapshot(self, tables):
+        return (self._epoch,) + tuple(self._versions.get(t, 0) for t in tables)
+
+    def get(self, key, tables):
+        """Rows cached for (sql, params) or None; the copy returned can be changed freely."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] != self._snapshot(tables):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            rows = entry[0]
+            return Rows(rows, rows.columns)
+
+    def put(self, key, tables, rows, versions):
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if versions != self._snapshot(tables):
+                return
+            self._entries[key] = (Rows(rows, rows.columns), versions, tables)
+            self._entries.move_to_end(key)
+            for t in tables:
+                self._by_table.setdefault(t, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def bump(self, tables):
+        """A write to `tables`: cached results reading them are dropped."""
+        with self._lock:
+            for t in tables:
+                self._versions[t] = self._versions.get(t, 0) + 1
+                for key in list(self._by_table.get(t, ())):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def sync(self, connection):
+        """Drop everything when another connection committed since `connection` last looked."""
+        if not self.check_data_version:
+            return
+        data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+        with self._lock:
+            if self._data_versions.get(id(connection)) == data_version:
+                return
+            self._data_versions[id(connection)] = data_version
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._by_table.clear()
+            self._epoch += 1
+
+    def _drop(self, key):
+        _, _, tables = self._entries.pop(key)
+        for t in tables:
+            keys = self._by_table.get(t)
+            if keys is not None:
+                keys.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+            self._epoch += 1
+            self.hits = self.misses = self.invalidations = 0
+
+    def info(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations,
+                    "size": len(self._entries), "maxsize": self.maxsize}
@@ -1,41 +1,159 @@
-from collections import deque
+import weakref
+from collections import deque, OrderedDict
 
 from miniorm.states import ObjectState
 from miniorm.identity_map import IdentityMap
+from miniorm.unit_of_work import UnitOfWork
 from miniorm.query import Query
 from miniorm.transactions import InsertTransaction, UpdateTransaction, DeleteTransaction
 from miniorm.mapper import Mapper
 from miniorm.orm_types import Column, Relationship
 from miniorm.builder import QueryBuilder
 from miniorm.base import MiniBase
+from miniorm.hydrator import new_instance
+from miniorm.result_cache import tables_read, table_written
 
 class Session:
-    def __init__(self, engine):
+    def __init__(self, engine, readonly=False):
+        """
+        readonly: every query loads detached objects (Query.readonly()) and the session
+        refuses to add, update or delete anything.
+        """
         Mapper.finalize_mappers()
         
         self.engine = engine
+        self.readonly = readonly
+        self.connection = None
         self.query_builder = QueryBuilder()
         self.identity_map = IdentityMap()
-        self.unit_of_work = deque() 
-        self._snapshots = {}
+        self.unit_of_work = UnitOfWork()
+        # keyed by object, so snapshots go away with objects dropped from the identity map
+        self._snapshots = weakref.WeakKeyDictionary()
+        self._dirty = {}
+        # (mapper, pk) of rows written since the last commit, dropped from the entity cache
+        self._written = set()
+        # tables written since the last commit, their cached query results are stale
+        self._written_tables = set()
         self._processed_transactions = []
         self._in_flush = False
         self._is_loading = False
         self._transaction_active = False
 
+    def execute(self, sql, params=None, return_lastrowid=False):
+        """
+        Run a statement on the connection this session holds for its unit of work.
+
+        With a ResultCache on the engine, SELECTs outside a transaction are answered
+        from it when possible; writes move the versions of the tables they touch.
+        """
+        if self.connection is None:
+            self.connection = self.engine.acquire()
+        cache = getattr(self.engine, 'result_cache', None)
+        if cache is not None:
+            tables = tables_read(sql)
+            if tables and not return_lastrowid and not self._transaction_active:
+                return self._execute_cached(cache, tables, sql, params)
+        result = self.engine.execute(sql, params, return_lastrowid, connection=self.connection)
+        self._wrote(sql)
+        return result
+
+    def _execute_cached(self, cache, tables, sql, params):
+        try:
+            key = (sql, tuple(params or ()))
+            hash(key)
+        except TypeError:
+            return self.engine.execute(sql, params, connection=self.connection)
+        cache.sync(self.connection)
+        rows = cache.get(key, tables)
+        if rows is None:
+            versions = cache.versions(tables)
+            rows = self.engine.execute(sql, params, connection=self.connection)
+            cache.put(key, tables, rows, versions)
+        return rows
+
+    def executemany(self, sql, seq_of_params):
+        if self.connection is None:
+            self.connection = self.engine.acquire()
+        result = self.engine.executemany(sql, seq_of_params, connection=self.connection)
+        self._wrote(sql)
+        return result
+
+    def _wrote(self, sql):
+        """Invalidate cached results of a table as soon as a statement wrote to it."""
+        cache = getattr(self.engine, 'result_cache', None)
+        table = table_written(sql) if cache is not None else None
+        if table is not None:
+            self._written_tables.add(table)
+            cache.bump((table,))
+
+    def iterate(self, sql, params=None, size=1000):
+        """Stream the rows of a SELECT in chunks, on this session's connection."""
+        if self.connection is None:
+            self.connection = self.engine.acquire()
+        return self.engine.iterate(sql, params, connection=self.connection, size=size)
+
+    def _release_connection(self):
+        if self.connection is not None and not self._transaction_active:
+            self.engine.release(self.connection)
+            self.connection = None
+
     def query(self, model_class):
         self._autoflush()
         return Query(model_class, self)
     
     def get(self, model_class, pk):
+        if self.readonly:
+            return self.query(model_class).filter(**{model_class._mapper.pk: pk}).first()
         existing = self.identity_map.get(model_class, pk)
         if existing: return existing
+        cached = self._get_cached(model_class, pk)
+        if cached is not None:
+            return cached
         return self.query(model_class).filter(**{model_class._mapper.pk: pk}).first()
 
+    def _entity_cache(self, mapper):
+        """
+        The engine's EntityCache when `mapper` opted in and the session may use it:
+        not inside a transaction, where reads can see rows this session has not committed.
+        """
+        cache = getattr(self.engine, 'entity_cache', None)
+        if cache is None or not mapper.cache or self._transaction_active:
+            return None
+        return cache
+
+    def _get_cached(self, model_class, pk, weak=False):
+        """Persistent instance built from the entity cache, without SQL, or None on a miss."""
+        cache = self._entity_cache(model_class._mapper)
+        if cache is None or self.unit_of_work:
+            return None
+        cached = cache.get(model_class._mapper, pk)
+        if cached is None:
+            return None
+        cls, values = cached
+        obj = new_instance(cls)
+        obj.__dict__.update(values)
+        return self._make_persistent(obj, weak)
+
+    def _invalidate_cached(self, rows):
+        """Drop written rows from the entity cache, under every class mapped onto their tables."""
+        cache = getattr(self.engine, 'entity_cache', None)
+        if cache is None or not rows:
+            return
+        keys = []
+        for mapper, pk_val in rows:
+            keys.extend((other._mapper, pk_val) for other in self._sharing_classes(mapper) if other._mapper.cache)
+        if keys:
+            cache.invalidate(keys)
+
+    def _check_writable(self):
+        if self.readonly:
+            raise RuntimeError("Session is read-only")
+
     def add(self, entity):
+        self._check_writable()
         state = getattr(entity, '_orm_state', None)
         
-        if any(t.entity is entity and isinstance(t, InsertTransaction) for t in self.unit_of_work):
+        if self.unit_of_work.contains(entity, InsertTransaction):
             return
 
         if state == ObjectState.DETACHED:
@@ -55,36 +173,31 @@ class Session:
             self._cascade_add(entity)
 
     def update(self, entity):
+        self._check_writable()
         state = getattr(entity, '_orm_state', None)
         if state in (ObjectState.PERSISTENT, ObjectState.EXPIRED):
-            if not any(t.entity is entity and isinstance(t, UpdateTransaction) for t in self.unit_of_work):
+            if not self.unit_of_work.contains(entity, UpdateTransaction):
                 self.unit_of_work.append(UpdateTransaction(self, entity))
 
     def delete(self, entity):
+        self._check_writable()
         state = getattr(entity, '_orm_state', None)
         if state == ObjectState.PENDING:
-            found_insert = None
-            for t in self.unit_of_work:
-                if t.entity is entity and isinstance(t, InsertTransaction):
-                    found_insert = t
-                    break
-            
+            found_insert = self.unit_of_work.discard(entity, InsertTransaction)
             if found_insert:
-                self.unit_of_work.remove(found_insert)
                 object.__setattr__(entity, '_orm_state', ObjectState.TRANSIENT)
                 print(f"DEBUG: Cancelled adding object {entity}. Removed from queue.")
             return
             
         if state in (ObjectState.PERSISTENT, ObjectState.EXPIRED):
-            object.__setattr__(entity, '_orm_state', ObjectState.DELETED)
-            dependents = self._collect_cascade_dependents(entity)
-            already_queued = {t.entity for t in self.unit_of_work
-                             if isinstance(t, DeleteTransaction)}
-            for e in dependents:
-                if e not in already_queued:
-                    object.__setattr__(e, '_orm_state', ObjectState.DELETED)
-                    self.unit_of_work.append(DeleteTransaction(self, e))
-                    already_queued.add(e)
+            mapper = entity._mapper
+            plan = self._plan_cascade(mapper, [entity.__dict__.get(mapper.pk)])
+            for target_mapper, pks in plan.items():
+                transaction = self.unit_of_work.get(target_mapper, DeleteTransaction)
+                if transaction is None:
+                    transaction = DeleteTransaction(self, target_mapper)
+                    self.unit_of_work.append(transaction)
+                transaction.add(pks, self._mark_deleted(target_mapper, pks))
 
     def flush(self):
         if self._in_flush:
@@ -94,51 +207,63 @@ class Session:
         self._processed_transactions = []
 
         dirty_objects = self._get_dirty_objects()
+        self._dirty.clear()
         for obj in dirty_objects:
-            is_queued = any(t.entity is obj and isinstance(t, UpdateTransaction) for t in self.unit_of_work)
-            if not is_queued:
+            if not self.unit_of_work.contains(obj, UpdateTransaction):
                 self.unit_of_work.append(UpdateTransaction(self, obj))
 
         if not self.unit_of_work:
             self._in_flush = False
             return
 
-        self.unit_of_work = self._sort_unit_of_work()
+        queue = deque()
         entities_to_sync = set()
 
         try:
+            queue = self._sort_unit_of_work()
+            self.unit_of_work.clear()
+
             if not self._transaction_active:
-                self.engine.execute("BEGIN TRANSACTION")
+                self.execute("BEGIN TRANSACTION")
                 self._transaction_active = True
 
-            while self.unit_of_work:
-                transaction = self.unit_of_work.popleft()
+            while queue:
+                transaction = queue.popleft()
                 transaction_type = type(transaction)
+
+                if transaction_type == InsertTransaction:
+                    batch = [transaction]
+                    batch_ids = {id(transaction.entity)}
+                    while queue and self._can_batch_insert(batch, batch_ids, queue[0]):
+                        batch.append(queue.popleft())
+                        batch_ids.add(id(batch[-1].entity))
+                    self._processed_transactions.extend(batch)
+                    self._flush_inserts(batch)
+                    entities_to_sync.update(t.entity for t in batch)
+                    self._written.update((t.entity._mapper, t.entity.__dict__.get(t.entity._mapper.pk)) for t in batch)
+                    continue
+
                 self._processed_transactions.append(transaction)
                 
                 operations = transaction.prepare()
                 
-                current_id = None
                 for op in operations:
                     print(f"DEBUG: Processing operation: {op}")
                     table_name, data = op["table_name"], op["data"]
 
-                    if transaction_type == InsertTransaction:
-                        # jeżeli to jest insert z CLASS inheritance, to potrzebujemy pk rodzica
-                        fk_col = op.get("fk_col")
-                        if fk_col:
-                            data[fk_col] = current_id
-                        sql, params = self.query_builder.build_insert(table_name, data)
-                    elif transaction_type == UpdateTransaction:
+                    if transaction_type == UpdateTransaction:
                         sql, params = self.query_builder.build_update(table_name, data)
                     elif transaction_type == DeleteTransaction:
                         sql, params = self.query_builder.build_delete(table_name, data)
 
-                    current_id = self.engine.execute(
-                        sql, params, return_lastrowid=(transaction_type == InsertTransaction)
-                    )
+                    self.execute(sql, params)
 
-                entities_to_sync.add(transaction.entity)
+                if transaction_type != DeleteTransaction:
+                    entities_to_sync.add(transaction.entity)
+                    entity = transaction.entity
+                    self._written.add((entity._mapper, entity.__dict__.get(entity._mapper.pk)))
+                else:
+                    self._written.update((transaction.mapper, pk_val) for pk_val in transaction.pks)
 
                 
             for entity in list(entities_to_sync):
@@ -146,13 +271,17 @@ class Session:
                 if state == ObjectState.DELETED:
                     continue
                 self._flush_m2m(entity)
-                self.refresh(entity)
+                object.__setattr__(entity, '_orm_state', ObjectState.PERSISTENT)
+                self._take_snapshot(entity)
 
             self._processed_transactions = []
+            self._invalidate_cached(self._written)
 
         except Exception as e:
+            # whatever was not run yet still has to be undone by rollback()
+            self._processed_transactions.extend(queue)
             if self._transaction_active:
-                self.engine.execute("ROLLBACK")
+                self.execute("ROLLBACK")
                 self._transaction_active = False
             self.rollback()
             raise RuntimeError(f"Error during flush: {e}")
@@ -160,6 +289,83 @@ class Session:
             self._in_flush = False
     
 
+    def _can_batch_insert(self, batch, batch_ids, transaction):
+        """Inserts of the same class can share a statement unless one points at another in the batch."""
+        if type(transaction) is not InsertTransaction:
+            return False
+        entity = transaction.entity
+        if entity.__class__ is not batch[0].entity.__class__:
+            return False
+        for rel_name, rel in entity._mapper.relationships.items():
+            if rel.r_type != "many-to-one":
+                continue
+            related = entity.__dict__.get(rel_name)
+            if related is not None and id(related) in batch_ids:
+                return False
+        return True
+
+    def _flush_inserts(self, batch):
+        """
+        Insert a batch of same-class entities with one executemany per table and column set.
+
+        Generated keys come back as a rowid range: inside the write transaction
+        SQLite hands out consecutive rowids, ending at last_insert_rowid().
+        For CLASS inheritance each table level is written for the whole batch
+        before the next one, so child rows can take the parent keys (fk_col).
+        """
+        prepared = [t.prepare() for t in batch]
+        ids = [None] * len(batch)
+        mapper = batch[0].entity._mapper
+
+        for level in range(len(prepared[0])):
+            groups = {}
+            for i, operations in enumerate(prepared):
+                op = operations[level]
+                data = op["data"]
+                if op.get("fk_col"):
+                    data[op["fk_col"]] = ids[i]
+                pk_name = mapper._get_mapper_for_table(op["table_name"]).pk
+                has_pk = data.get(pk_name) is not None
+                key = (op["table_name"], tuple(data), pk_name, has_pk)
+                groups.setdefault(key, []).append(i)
+
+            for (table_name, fields, pk_name, has_pk), indexes in groups.items():
+                rows = [prepared[i][level]["data"] for i in indexes]
+                sql, params = self.query_builder.build_bulk_insert(table_name, fields, rows)
+                self.executemany(sql, params)
+
+                if has_pk:
+                    for i, data in zip(indexes, rows):
+                        ids[i] = data[pk_name]
+                else:
+                    last_id = self.execute("SELECT last_insert_rowid()")[0][0]
+                    first_id = last_id - len(indexes) + 1
+                    for offset, i in enumerate(indexes):
+                        ids[i] = first_id + offset
+
+        for transaction, pk_val in zip(batch, ids):
+            entity = transaction.entity
+            object.__setattr__(entity, entity._mapper.pk, pk_val)
+            object.__setattr__(entity, '_orm_state', ObjectState.PERSISTENT)
+            self.identity_map.add(entity.__class__, pk_val, entity)
+
+        self._fetch_server_defaults(mapper, [t.entity for t in batch])
+
+    def _fetch_server_defaults(self, mapper, entities):
+        """Read back columns the database filled in (server_default), one SELECT per table and chunk."""
+        for table_name, (pk_name, columns) in mapper.server_generated_columns().items():
+            missing = [e for e in entities if any(c not in e.__dict__ for c in columns)]
+            by_pk = {e.__dict__.get(mapper.pk): e for e in missing}
+            pks = list(by_pk)
+            for start in range(0, len(pks), DeleteTransaction.CHUNK_SIZE):
+                sql, params = self.query_builder.build_select_in(
+                    table_name, [pk_name] + columns, pk_name, pks[start:start + DeleteTransaction.CHUNK_SIZE]
+                )
+                for row in self.execute(sql, params):
+                    entity = by_pk[row[0]]
+                    for name, value in zip(columns, row[1:]):
+                        entity.__dict__.setdefault(name, value)
+
     def _flush_m2m(self, instance):
         mapper = instance._mapper
         for name, rel in mapper.relationships.items():
@@ -180,7 +386,7 @@ class Session:
             current_ids = {safe_int(getattr(o, o._mapper.pk)) for o in current_objects 
                            if hasattr(o, '_mapper') and safe_int(getattr(o, o._mapper.pk)) is not None}
             
-            old_snapshot = self._snapshots.get(id(instance), {})
+            old_snapshot = self._snapshots.get(instance, {})
             old_ids = {safe_int(x) for x in old_snapshot.get(name, [])}
 
             local_id = safe_int(getattr(instance, mapper.pk))
@@ -196,20 +402,21 @@ class Session:
                 sql, params = self.query_builder.build_m2m_insert(
                     assoc.name, local_id, target_id, assoc.local_key, assoc.remote_key
                 )
-                try: self.engine.execute(sql, params)
+                try: self.execute(sql, params)
                 except: pass 
 
             for target_id in to_remove:
                 sql, params = self.query_builder.build_m2m_delete(
                     assoc.name, local_id, target_id, assoc.local_key, assoc.remote_key
                 )
-                self.engine.execute(sql, params)
+                self.execute(sql, params)
 
     def _take_snapshot(self, instance):
         if not instance._mapper: return
 
         state = {}
-        for col in instance._mapper.columns:
+        mapper = instance._mapper
+        for col in mapper.inheritance.strategy.resolve_attributes(mapper):
             if col in instance.__dict__:
                 state[col] = instance.__dict__[col]
 
@@ -225,9 +432,9 @@ class Session:
                             except: ids.append(str(pk_val))
                     state[name] = sorted(ids)
                 
-        self._snapshots[id(instance)] = state
+        self._snapshots[instance] = state
 
-    def _make_persistent(self, obj):
+    def _make_persistent(self, obj, weak=False):
         if not obj:
             return None
         
@@ -243,7 +450,7 @@ class Session:
         object.__setattr__(obj, '_orm_state', ObjectState.PERSISTENT)
         object.__setattr__(obj, '_session', self)
         
-        self.identity_map.add(obj.__class__, pk_val, obj)
+        self.identity_map.add(obj.__class__, pk_val, obj, weak)
         
         self._take_snapshot(obj)
         
@@ -251,137 +458,244 @@ class Session:
 
 
     def _sort_unit_of_work(self):
-        from miniorm.transactions import InsertTransaction
-        
-        inserts = [t for t in self.unit_of_work if isinstance(t, InsertTransaction)]
-        others = [t for t in self.unit_of_work if not isinstance(t, InsertTransaction)]
-        
-        sorted_inserts = []
-        visited = set()
-
-        def visit(trans):
-            if trans in visited: return
-            visited.add(trans)
-            
-            mapper = trans.entity._mapper
-            for rel_name, rel in mapper.relationships.items():
-                if rel.r_type == "many-to-one":
-                    related_obj = getattr(trans.entity, rel_name, None)
-                    if related_obj:
-                        dep = next((t for t in inserts if t.entity is related_obj), None)
-                        if dep: visit(dep)
-            sorted_inserts.append(trans)
-
-        for t in inserts:
-            visit(t)
-            
-        return deque(sorted_inserts + others)
-
-    def _collect_cascade_dependents(self, entity, _visited=None):
-        """Return list of entities to delete in order: dependents first (cascade_delete), then entity. No duplicates."""
-        if _visited is None:
-            _visited = set()
-        if id(entity) in _visited:
-            return []
-        _visited.add(id(entity))
-        out = []
-        mapper = entity._mapper
-        
-        entity_pk = getattr(entity, mapper.pk, None)
-        if entity_pk is None:
-            return [entity]
-
-        target_tables = {mapper.table_name}
-        if mapper.inheritance and mapper.inheritance.strategy.name == "CLASS" and mapper.parent:
-            target_tables.add(mapper.parent.table_name)
-        
-        for other_mapper in MiniBase._registry.values():
-            if other_mapper.cls is entity.__class__:
+        """
+        Order pending transactions along their dependencies (Kahn's algorithm).
+
+        - an insert of a referenced object runs before inserts/updates pointing at it
+        - deletes of a class run before deletes of the classes it references, which
+          also puts CLASS-inheritance child rows before their parent rows
+        - an update moving a reference away from a deleted row runs before that delete
+
+        Among ready transactions inserts go first, then updates, then deletes, and
+        the class of the previous transaction is preferred, so same-table
+        operations stay adjacent for batching.
+        """
+        transactions = list(self.unit_of_work)
+        position = {id(t): i for i, t in enumerate(transactions)}
+        successors = [[] for _ in transactions]
+        indegree = [0] * len(transactions)
+
+        deleted_rows = {}
+        deleting_tables = {}
+        for t in transactions:
+            if isinstance(t, DeleteTransaction):
+                for table_name in t.mapper.table_chain():
+                    deleting_tables.setdefault(table_name, []).append(t)
+                    for pk_val in t.pks:
+                        deleted_rows.setdefault((table_name, pk_val), []).append(t)
+
+        def targets(value, rel, transaction_type):
+            if value is None or isinstance(value, (Column, Relationship)):
+                return ()
+            if hasattr(value, '_mapper'):
+                found = self.unit_of_work.get(value, transaction_type)
+                if found is not None:
+                    return (found,)
+                value = value.__dict__.get(value._mapper.pk)
+            if transaction_type is DeleteTransaction:
+                return deleted_rows.get((rel.remote_table, value), ())
+            return ()
+
+        def depends(before, after):
+            if before is not after:
+                successors[position[id(before)]].append(position[id(after)])
+                indegree[position[id(after)]] += 1
+
+        for t in transactions:
+            if isinstance(t, DeleteTransaction):
+                for name, rel in t.mapper.foreign_key_relationships():
+                    for parent in deleting_tables.get(rel.remote_table, ()):
+                        depends(t, parent)
                 continue
-            for rel in other_mapper.relationships.values():
-                if not getattr(rel, 'cascade_delete', True):
-                    continue
-                if rel.r_type not in ('many-to-one', 'one-to-one'):
-                    continue
-                if not getattr(rel, '_resolved_target', None):
-                    continue
-                
-                fk_target_table = getattr(rel, 'remote_table', None)
-                if not fk_target_table:
-                    fk_target_table = rel._resolved_target._mapper.table_name
-                
-                if fk_target_table not in target_tables:
-                    continue
-                
-                fk_name = getattr(rel, '_resolved_fk_name', None)
-                if not fk_name:
+
+            entity = t.entity
+            for name, rel in t.mapper.foreign_key_relationships():
+                value = entity.__dict__.get(name)
+                if isinstance(t, InsertTransaction):
+                    for parent in targets(value, rel, InsertTransaction):
+                        depends(parent, t)
+                elif isinstance(t, UpdateTransaction):
+                    for parent in targets(value, rel, InsertTransaction):
+                        depends(parent, t)
+                    old_value = self._snapshots.get(entity, {}).get(name)
+                    for parent in targets(old_value, rel, DeleteTransaction):
+                        depends(t, parent)
+
+        ranks = {InsertTransaction: 0, UpdateTransaction: 1, DeleteTransaction: 2}
+        ready = [OrderedDict() for _ in range(3)]
+
+        def push(i):
+            t = transactions[i]
+            ready[ranks[type(t)]].setdefault(t.mapper.cls, deque()).append(i)
+
+        for i, degree in enumerate(indegree):
+            if degree == 0:
+                push(i)
+
+        ordered = deque()
+        last_cls = None
+        while True:
+            group = next((g for g in ready if g), None)
+            if group is None:
+                break
+            cls = last_cls if last_cls in group else next(iter(group))
+            bucket = group[cls]
+            i = bucket.popleft()
+            if not bucket:
+                del group[cls]
+            ordered.append(transactions[i])
+            last_cls = cls
+            for j in successors[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    push(j)
+
+        if len(ordered) != len(transactions):
+            stuck = [t for i, t in enumerate(transactions) if indegree[i] > 0]
+            raise RuntimeError(
+                f"Cannot order flush, dependency cycle between: "
+                f"{', '.join(f'{type(t).__name__}({t.entity or t.mapper.cls.__name__!r})' for t in stuck)}"
+            )
+        return ordered
+
+    def _plan_cascade(self, mapper, pks):
+        """
+        Collect the rows removed by deleting `pks` of `mapper`, following
+        cascade_delete foreign keys level by level through Mapper.referenced_by.
+
+        Each level costs one SELECT pk ... WHERE fk IN (...) per referencing
+        foreign key. Returns {mapper: [pks]} with the starting rows included.
+        """
+        plan = {mapper: list(pks)}
+        planned = {mapper: set(pks)}
+        frontier = [(mapper, list(pks))]
+
+        self._is_loading = True
+        try:
+            while frontier:
+                next_frontier = []
+                for current, ids in frontier:
+                    for table_name in current.table_chain():
+                        for ref_mapper, fk_name, rel in self._referencing(table_name):
+                            if not getattr(rel, 'cascade_delete', True):
+                                continue
+                            # the CLASS-inheritance link of the class itself, same rows
+                            if issubclass(current.cls, ref_mapper.cls):
+                                continue
+                            found = []
+                            for start in range(0, len(ids), DeleteTransaction.CHUNK_SIZE):
+                                sql, params = self.query_builder.build_select_pks(
+                                    ref_mapper.table_name, ref_mapper.pk, fk_name,
+                                    ids[start:start + DeleteTransaction.CHUNK_SIZE]
+                                )
+                                found.extend(row[0] for row in self.execute(sql, params))
+
+                            seen = planned.setdefault(ref_mapper, set())
+                            new_ids = [pk for pk in dict.fromkeys(found) if pk not in seen]
+                            if new_ids:
+                                seen.update(new_ids)
+                                plan.setdefault(ref_mapper, []).extend(new_ids)
+                                next_frontier.append((ref_mapper, new_ids))
+                frontier = next_frontier
+        finally:
+            self._is_loading = False
+        return plan
+
+    def _referencing(self, table_name):
+        for mapper in MiniBase._registry.values():
+            if mapper.table_name == table_name:
+                return mapper.referenced_by
+        return []
+
+    def _mark_deleted(self, mapper, pks):
+        """Move identity-map objects for these rows to DELETED, under any class sharing the rows."""
+        classes = self._sharing_classes(mapper)
+        deleted = []
+        for pk_val in pks:
+            for cls in classes:
+                obj = self.identity_map.get(cls, pk_val)
+                if obj is None or obj._orm_state == ObjectState.DELETED:
                     continue
-                self._is_loading = True
-                try:
-                    refs = self.query(other_mapper.cls).filter(**{fk_name: entity_pk}).all()
-                finally:
-                    self._is_loading = False
-                for ref in refs:
-                    out.extend(self._collect_cascade_dependents(ref, _visited))
-        out.append(entity)
-        return out
+                object.__setattr__(obj, '_orm_state', ObjectState.DELETED)
+                self.unit_of_work.discard(obj, UpdateTransaction)
+                deleted.append(obj)
+        return deleted
+
+    def _sharing_classes(self, mapper):
+        """Mapped classes that have rows in one of the tables of `mapper`."""
+        tables = set(mapper.table_chain())
+        return [cls for cls, other in MiniBase._registry.items()
+                if tables.intersection(other.table_chain())]
+
+    def _mark_dirty(self, obj, name):
+        """Record that `name` was assigned or its collection mutated; checked at the next flush."""
+        entry = self._dirty.get(id(obj))
+        if entry is None:
+            self._dirty[id(obj)] = (obj, {name})
+        else:
+            entry[1].add(name)
 
     def _get_dirty_objects(self):
+        """Objects with recorded changes that really differ from their snapshot."""
         dirty = []
-        for obj in list(self.identity_map._map.values()):
+        for obj, names in list(self._dirty.values()):
             if getattr(obj, '_orm_state', None) not in (ObjectState.PERSISTENT, ObjectState.EXPIRED):
                 continue
             
-            old_state = self._snapshots.get(id(obj))
+            old_state = self._snapshots.get(obj)
             if old_state is None: continue
             
-            is_dirty = False
-            for col in obj._mapper.columns:
-                if col == obj._mapper.pk: continue
-                if obj.__dict__.get(col) != old_state.get(col):
-                    is_dirty = True
-                    break
-            
-            if not is_dirty:
-                for name, rel in obj._mapper.relationships.items():
-                    if rel.r_type == "many-to-many":
-                        current_collection = obj.__dict__.get(name)
-                        if isinstance(current_collection, list):
-                            c_ids = []
-                            for o in current_collection:
-                                pk_val = getattr(o, o._mapper.pk, None)
-                                if pk_val is None or isinstance(pk_val, Column):
-                                    c_ids.append(f"new_{id(o)}")
-                                else:
-                                    try: c_ids.append(int(pk_val))
-                                    except: c_ids.append(str(pk_val))
-                            
-                            c_ids.sort(key=lambda x: str(x))
-                            o_ids = sorted(old_state.get(name, []), key=lambda x: str(x))
-                            
-                            if c_ids != o_ids:
-                                is_dirty = True
-                                break
-            
-            if is_dirty: dirty.append(obj)
+            mapper = obj._mapper
+            attributes = mapper.inheritance.strategy.resolve_attributes(mapper)
+            for name in names:
+                rel = mapper.relationships.get(name)
+                if rel is not None and rel.r_type == "many-to-many":
+                    current_collection = obj.__dict__.get(name)
+                    if not isinstance(current_collection, list):
+                        continue
+                    c_ids = []
+                    for o in current_collection:
+                        pk_val = getattr(o, o._mapper.pk, None)
+                        if pk_val is None or isinstance(pk_val, Column):
+                            c_ids.append(f"new_{id(o)}")
+                        else:
+                            try: c_ids.append(int(pk_val))
+                            except: c_ids.append(str(pk_val))
+                    
+                    c_ids.sort(key=lambda x: str(x))
+                    o_ids = sorted(old_state.get(name, []), key=lambda x: str(x))
+                    if c_ids != o_ids:
+                        dirty.append(obj)
+                        break
+                elif name in attributes and name != mapper.pk:
+                    if obj.__dict__.get(name) != old_state.get(name):
+                        dirty.append(obj)
+                        break
         return dirty
 
     def commit(self):
         self.flush()
         if self._transaction_active:
-            self.engine.execute("COMMIT")
+            self.execute("COMMIT")
             self._transaction_active = False
-        for obj in list(self.identity_map._map.values()):
+        # again after COMMIT: other sessions may have cached the old rows in the meantime
+        self._invalidate_cached(self._written)
+        self._written.clear()
+        if self._written_tables:
+            self.engine.result_cache.bump(self._written_tables)
+            self._written_tables.clear()
+        for obj in self.identity_map.values():
             state = getattr(obj, '_orm_state', None)
             if state in (ObjectState.PERSISTENT, ObjectState.EXPIRED):
                 self._take_snapshot(obj)
                 object.__setattr__(obj, '_orm_state', ObjectState.EXPIRED)
+        self._release_connection()
 
 
     def rollback(self):
         if self._transaction_active:
             try:
-                self.engine.execute("ROLLBACK")
+                self.execute("ROLLBACK")
             except:
                 pass
             self._transaction_active = False
@@ -389,19 +703,28 @@ class Session:
         to_undo = self._processed_transactions + list(self.unit_of_work)
         
         for transaction in to_undo:
+            if isinstance(transaction, DeleteTransaction):
+                for entity in transaction.entities:
+                    object.__setattr__(entity, '_orm_state', ObjectState.PERSISTENT)
+                continue
+
             entity = transaction.entity
             mapper = entity._mapper 
             
             if isinstance(transaction, InsertTransaction):
                 object.__setattr__(entity, mapper.pk, None)
                 object.__setattr__(entity, '_orm_state', ObjectState.TRANSIENT)
-            elif isinstance(transaction, (UpdateTransaction, DeleteTransaction)):
+            elif isinstance(transaction, UpdateTransaction):
                 object.__setattr__(entity, '_orm_state', ObjectState.PERSISTENT)
 
         self.unit_of_work.clear()
         self._processed_transactions = []
         self.identity_map.clear()
         self._snapshots.clear()
+        self._dirty.clear()
+        self._written.clear()
+        self._written_tables.clear()
+        self._release_connection()
         print("DEBUG: Rollback completed. Objects reset to safe state.")
         
     def _cascade_add(self, instance):
@@ -443,7 +766,7 @@ class Session:
 
     def close(self):
         
-        all_tracked_objects = list(self.identity_map._map.values())
+        all_tracked_objects = self.identity_map.values()
         
         for obj in all_tracked_objects:
             object.__setattr__(obj, '_session', None)
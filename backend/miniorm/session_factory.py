@@ -0,0 +1,63 @@
+import threading
+from contextlib import contextmanager
+
+from miniorm.session import Session
+
+
+class SessionMaker:
+    """
+    Creates sessions bound to one engine.
+
+    Every call returns a new Session with its own identity map and unit of work;
+    connections come from the engine's pool, so sessions are cheap to create and
+    should be short-lived (one per request or job). readonly=True makes read-only sessions.
+    """
+    def __init__(self, engine, session_cls=Session, readonly=False):
+        self.engine = engine
+        self.session_cls = session_cls
+        self.readonly = readonly
+
+    def __call__(self, readonly=None):
+        return self.session_cls(self.engine, readonly=self.readonly if readonly is None else readonly)
+
+    @contextmanager
+    def begin(self):
+        """Session for a block of work: committed on success, rolled back on error, always closed."""
+        session = self()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class ScopedSession:
+    """
+    One session per thread, created on first use from a SessionMaker.
+
+    remove() closes the current thread's session; the next call starts a new one.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self._local = threading.local()
+
+    def __call__(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self.factory()
+            self._local.session = session
+        return session
+
+    def has_session(self):
+        return getattr(self._local, "session", None) is not None
+
+    def remove(self):
+        session = getattr(self._local, "session", None)
+        if session is not None:
+            try:
+                session.close()
+            finally:
+                self._local.session = None
@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+
+class StatementCache:
+    """
+    Bounded LRU cache of compiled SQL strings, keyed by query shape.
+
+    Shared by every QueryBuilder (sessions are short-lived, the shapes they run are not).
+    """
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            sql = self._entries.get(key)
+            if sql is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return sql
+
+    def put(self, key, sql):
+        with self._lock:
+            self._entries[key] = sql
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
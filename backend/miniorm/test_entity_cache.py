@@ -0,0 +1,140 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.base import MiniBase
+from miniorm.orm_types import Text, Number, Relationship
+from miniorm.conftest import TracingEngine
+from miniorm.generator import SchemaGenerator
+from miniorm.session_factory import SessionMaker
+from miniorm.entity_cache import EntityCache
+from miniorm.options import selectinload
+
+
+class Breed(MiniBase):
+    breed_id = Number(pk=True)
+    name = Text()
+    class Meta:
+        table_name = "breeds"
+        cache = True
+
+
+class Kennel(MiniBase):
+    kennel_id = Number(pk=True)
+    breed = Relationship("breeds", backref="kennels", r_type="many-to-one")
+    class Meta:
+        table_name = "kennels"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _factory(tmp_path, **cache_kwargs):
+    engine = TracingEngine(db_path=tmp_path / "cache.sqlite", entity_cache=EntityCache(**cache_kwargs))
+    SchemaGenerator().create_all(engine, MiniBase._registry)
+    factory = SessionMaker(engine)
+    with factory.begin() as session:
+        breeds = [Breed(name=n) for n in ("beagle", "collie", "pug")]
+        for b in breeds:
+            session.add(b)
+        session.add(Kennel(breed=breeds[0]))
+        session.add(Kennel(breed=breeds[0]))
+    engine.statements.clear()
+    return factory, engine
+
+
+def _breed_id(factory, name):
+    with factory.begin() as session:
+        return session.query(Breed).filter(name=name).first().breed_id
+
+
+def test_get_is_served_across_sessions(tmp_path):
+    factory, engine = _factory(tmp_path)
+    pk = _breed_id(factory, "collie")
+    engine.statements.clear()
+
+    with factory.begin() as session:
+        breed = session.get(Breed, pk)
+        assert breed.name == "collie" and session.identity_map.get(Breed, pk) is breed
+    assert engine.selects("breeds") == []
+    assert engine.entity_cache.info()["hits"] == 1
+
+    # models without Meta.cache always go to the database
+    with factory.begin() as session:
+        kennel_id = session.query(Kennel).first().kennel_id
+    engine.statements.clear()
+    with factory.begin() as session:
+        session.get(Kennel, kennel_id)
+    assert len(engine.selects("kennels")) == 1
+
+
+def test_relationship_loads_use_the_cache(tmp_path):
+    factory, engine = _factory(tmp_path)
+    _breed_id(factory, "beagle")
+    engine.statements.clear()
+
+    with factory.begin() as session:
+        kennels = session.query(Kennel).all()
+        assert {k.breed.name for k in kennels} == {"beagle"}
+    with factory.begin() as session:
+        kennels = session.query(Kennel).options(selectinload("breed")).all()
+        assert {k.breed.name for k in kennels} == {"beagle"}
+    assert engine.selects("breeds") == []
+
+
+def test_commit_invalidates_written_rows(tmp_path):
+    factory, engine = _factory(tmp_path)
+    pk = _breed_id(factory, "pug")
+
+    with factory.begin() as session:
+        session.get(Breed, pk).name = "mops"
+        # inside the transaction the session reads the database, not the cache
+        assert session.query(Breed).filter(name="mops").count() == 1
+    assert engine.entity_cache.info()["invalidations"] == 1
+
+    engine.statements.clear()
+    with factory.begin() as session:
+        assert session.get(Breed, pk).name == "mops"
+    assert len(engine.selects("breeds")) == 1
+
+    with factory.begin() as session:
+        session.delete(session.get(Breed, pk))
+    with factory.begin() as session:
+        assert session.get(Breed, pk) is None
+
+
+def test_stale_read_is_not_cached():
+    cache = EntityCache()
+    generation = cache.generation
+    cache.invalidate([(Breed._mapper, 1)])
+    cache.put(Breed._mapper, 1, Breed, {"name": "old"}, generation)
+    assert cache.get(Breed._mapper, 1) is None
+
+
+def test_lru_and_ttl_eviction():
+    clock = FakeClock()
+    cache = EntityCache(maxsize=2, ttl=10, clock=clock)
+    for pk in (1, 2):
+        cache.put(Breed._mapper, pk, Breed, {"breed_id": pk}, cache.generation)
+    cache.get(Breed._mapper, 1)
+    cache.put(Breed._mapper, 3, Breed, {"breed_id": 3}, cache.generation)
+    assert cache.get(Breed._mapper, 2) is None and cache.get(Breed._mapper, 1) is not None
+
+    clock.now = 11
+    assert cache.get(Breed._mapper, 1) is None
+    info = cache.info()
+    assert (info["evictions"], info["expirations"], info["size"]) == (1, 1, 1)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_get_is_served_across_sessions(pathlib.Path(tempfile.mkdtemp()))
+    test_relationship_loads_use_the_cache(pathlib.Path(tempfile.mkdtemp()))
+    test_commit_invalidates_written_rows(pathlib.Path(tempfile.mkdtemp()))
+    test_stale_read_is_not_cached()
+    test_lru_and_ttl_eviction()
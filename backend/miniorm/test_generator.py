@@ -0,0 +1,226 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.base import MiniBase
+from miniorm.orm_types import Text, Number, Relationship
+from miniorm.database import DatabaseEngine
+from miniorm.conftest import TracingEngine
+from miniorm.generator import SchemaGenerator
+from miniorm.indexes import Index
+from miniorm.migrations import Migrator
+from miniorm.session import Session
+
+
+class Walker(MiniBase):
+    walker_id = Number(pk=True)
+    email = Text(unique=True)
+    city = Text(index=True)
+    class Meta:
+        table_name = "walkers"
+
+
+class Walk(MiniBase):
+    walk_id = Number(pk=True)
+    walker = Relationship("walkers", backref="walks", r_type="many-to-one")
+    day = Text()
+    paid = Number()
+    class Meta:
+        table_name = "walks"
+        indexes = [Index("day", "paid"), Index("walker", name="walks_unpaid", where='"paid" = 0')]
+
+
+class Member(MiniBase):
+    member_id = Number(pk=True)
+    name = Text(collation="NOCASE")
+    class Meta:
+        table_name = "members"
+        inheritance = "CONCRETE"
+
+
+class Trainer(Member):
+    badge = Text()
+    class Meta:
+        table_name = "trainers"
+        inheritance = "CONCRETE"
+
+
+def _engine(tmp_path):
+    return DatabaseEngine(db_path=tmp_path / "schema.sqlite")
+
+
+def _indexes(engine, table_name):
+    return SchemaGenerator()._get_existing_indexes(engine, table_name)
+
+
+def test_create_all_creates_declared_indexes(tmp_path):
+    engine = _engine(tmp_path)
+    SchemaGenerator().create_all(engine, MiniBase._registry)
+
+    assert _indexes(engine, "walkers") == {
+        "ux_walkers_email": 'CREATE UNIQUE INDEX "ux_walkers_email" ON "walkers" ("email")',
+        "ix_walkers_city": 'CREATE INDEX "ix_walkers_city" ON "walkers" ("city")',
+    }
+    assert _indexes(engine, "walks") == {
+        "ix_walks_day_paid": 'CREATE INDEX "ix_walks_day_paid" ON "walks" ("day", "paid")',
+        "walks_unpaid": 'CREATE INDEX "walks_unpaid" ON "walks" ("walker") WHERE "paid" = 0',
+        "ix_walks_walker": 'CREATE INDEX "ix_walks_walker" ON "walks" ("walker")',
+    }
+
+    plan = engine.execute('EXPLAIN QUERY PLAN SELECT * FROM "walks" WHERE "walker" = ?', (1,))
+    assert "ix_walks_walker" in plan[0][-1]
+
+    engine.execute('INSERT INTO "walkers" ("email") VALUES (?)', ("a@b.c",))
+    try:
+        engine.execute('INSERT INTO "walkers" ("email") VALUES (?)', ("a@b.c",))
+    except Exception:
+        pass
+    else:
+        raise AssertionError("duplicate email should be rejected")
+
+
+def test_create_all_reconciles_indexes(tmp_path):
+    engine = _engine(tmp_path)
+    generator = SchemaGenerator()
+    generator.create_all(engine, MiniBase._registry)
+    engine.execute('DROP INDEX "ix_walkers_city"')
+    engine.execute('DROP INDEX "ix_walks_day_paid"')
+    engine.execute('CREATE INDEX "ix_walks_day_paid" ON "walks" ("day")')
+    engine.execute('CREATE INDEX "ix_walks_old" ON "walks" ("day")')
+    engine.execute('ALTER TABLE "walks" ADD COLUMN "legacy" TEXT')
+    engine.execute('CREATE INDEX "ix_walks_legacy" ON "walks" ("legacy")')
+
+    generator.create_all(engine, MiniBase._registry)
+
+    assert "ix_walkers_city" in _indexes(engine, "walkers")
+    walks = _indexes(engine, "walks")
+    assert sorted(walks) == ["ix_walks_day_paid", "ix_walks_walker", "walks_unpaid"]
+    assert walks["ix_walks_day_paid"].endswith('("day", "paid")')
+    assert "legacy" not in generator._get_existing_columns(engine, "walks")
+
+
+def test_migrate_runs_once_per_schema(tmp_path):
+    engine = TracingEngine(db_path=tmp_path / "migrate.sqlite")
+    migrator = Migrator(engine, MiniBase._registry)
+
+    migration = migrator.migrate()
+    assert migration.version == 1 and migration.rebuilt == []
+    assert "walks_unpaid" in _indexes(engine, "walks")
+    assert migrator.history()[0][:2] == (1, migrator.fingerprint())
+
+    engine.statements.clear()
+    assert migrator.migrate() is None
+    assert not [s for s in engine.statements if "PRAGMA" in s or "CREATE" in s and "_miniorm_schema" not in s]
+
+
+def test_migrate_adds_columns_and_rebuilds_changed_tables(tmp_path):
+    engine = _engine(tmp_path)
+    migrator = Migrator(engine, MiniBase._registry)
+    migrator.migrate()
+    engine.execute('DROP TABLE "walkers"')
+    engine.execute('CREATE TABLE "walkers" ("walker_id" INTEGER PRIMARY KEY AUTOINCREMENT, "email" TEXT, "city" INTEGER, "old" TEXT)')
+    engine.execute('INSERT INTO "walkers" ("email", "city", "old") VALUES (?, ?, ?)', ("a@b.c", "Oslo", "x"))
+    engine.execute('DROP INDEX "ix_walks_day_paid"')
+    engine.execute('ALTER TABLE "walks" DROP COLUMN "day"')
+    engine.execute('DELETE FROM "_miniorm_schema"')
+
+    # "old" still holds a value, dropping it takes the explicit opt-in
+    try:
+        migrator.migrate()
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("dropping a column with values should be refused")
+    assert "old" in SchemaGenerator()._get_existing_columns(engine, "walkers")
+
+    migration = Migrator(engine, MiniBase._registry, drop_columns=True).migrate()
+    assert migration.rebuilt == ["walkers"]
+    assert 'ALTER TABLE "walks" ADD COLUMN "day" TEXT' in migration.statements
+    assert ";;" not in migration.script()
+    assert engine.execute('SELECT walker_id, email, city FROM "walkers"') == [(1, "a@b.c", "Oslo")]
+    assert SchemaGenerator()._get_existing_columns(engine, "walkers") == ["walker_id", "email", "city"]
+    assert sorted(_indexes(engine, "walkers")) == ["ix_walkers_city", "ux_walkers_email"]
+    # nothing left to do but the idempotent association table indexes
+    assert all(s.startswith("CREATE INDEX IF NOT EXISTS") for s in migrator.plan().statements)
+
+
+def test_failed_migration_is_rolled_back(tmp_path):
+    engine = _engine(tmp_path)
+    engine.execute('CREATE TABLE "walkers" ("walker_id" INTEGER PRIMARY KEY AUTOINCREMENT, "email" TEXT, "city" TEXT)')
+    engine.execute('INSERT INTO "walkers" ("email") VALUES (?), (?)', ("a@b.c", "a@b.c"))
+    migrator = Migrator(engine, MiniBase._registry)
+    try:
+        migrator.migrate()
+    except Exception:
+        pass
+    else:
+        raise AssertionError("unique index over duplicate emails should fail")
+
+    assert migrator.current() == (0, None)
+    assert SchemaGenerator()._get_existing_columns(engine, "walks") == []
+    assert _indexes(engine, "walkers") == {}
+
+
+def test_migrate_keeps_concrete_tables_and_their_rows(tmp_path):
+    engine = _engine(tmp_path)
+    # the concrete table holds the primary key and its own columns, the inherited ones live in the parent's
+    engine.execute('CREATE TABLE "members" ("member_id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" TEXT COLLATE NOCASE)')
+    engine.execute('CREATE TABLE "trainers" ("member_id" INTEGER PRIMARY KEY, "badge" TEXT)')
+    engine.execute('INSERT INTO "members" ("name") VALUES (?), (?)', ("Ann", "Bob"))
+    engine.execute('INSERT INTO "trainers" ("member_id", "badge") VALUES (?, ?), (?, ?)', (1, "gold", 2, "silver"))
+
+    migration = Migrator(engine, MiniBase._registry).migrate()
+
+    assert "members" not in migration.rebuilt and "trainers" not in migration.rebuilt
+    assert SchemaGenerator()._get_existing_columns(engine, "trainers") == ["member_id", "badge"]
+    assert engine.execute('SELECT member_id, badge FROM "trainers" ORDER BY member_id') == [(1, "gold"), (2, "silver")]
+
+    session = Session(engine)
+    session.add(Trainer(name="Cid", badge="bronze"))
+    session.commit()
+    assert engine.execute('SELECT t.badge FROM "trainers" t JOIN "members" m USING (member_id) WHERE m.name = ?', ("cid",)) == [("bronze",)]
+
+
+def test_migrate_drops_listed_legacy_columns(tmp_path):
+    engine = _engine(tmp_path)
+    # a database from before, the concrete table carries copies of the inherited columns
+    engine.execute('CREATE TABLE "trainers" ("member_id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" TEXT, "badge" TEXT)')
+    engine.execute('INSERT INTO "trainers" ("name", "badge") VALUES (?, ?)', ("Ann", "gold"))
+
+    try:
+        Migrator(engine, MiniBase._registry, drop_columns={"trainers": ["badge"]}).migrate()
+    except RuntimeError as e:
+        assert "column name of trainers" in str(e)
+    else:
+        raise AssertionError("dropping a column with values should be refused")
+
+    migration = Migrator(engine, MiniBase._registry, drop_columns={"trainers": ["name"]}).migrate()
+    assert "trainers" in migration.rebuilt
+    assert SchemaGenerator()._get_existing_columns(engine, "trainers") == ["member_id", "badge"]
+    assert engine.execute('SELECT member_id, badge FROM "trainers"') == [(1, "gold")]
+
+
+def test_migrate_refuses_to_drop_a_primary_key(tmp_path):
+    engine = _engine(tmp_path)
+    engine.execute('CREATE TABLE "trainers" ("trainer_no" INTEGER PRIMARY KEY, "member_id" INTEGER, "name" TEXT, "badge" TEXT)')
+    migrator = Migrator(engine, MiniBase._registry)
+    try:
+        migrator.migrate()
+    except RuntimeError as e:
+        assert "primary key trainer_no" in str(e)
+    else:
+        raise AssertionError("dropping the primary key should be refused")
+    assert migrator.current() == (0, None)
+    assert SchemaGenerator()._get_existing_columns(engine, "trainers")[0] == "trainer_no"
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_create_all_creates_declared_indexes(pathlib.Path(tempfile.mkdtemp()))
+    test_create_all_reconciles_indexes(pathlib.Path(tempfile.mkdtemp()))
+    test_migrate_runs_once_per_schema(pathlib.Path(tempfile.mkdtemp()))
+    test_migrate_adds_columns_and_rebuilds_changed_tables(pathlib.Path(tempfile.mkdtemp()))
+    test_failed_migration_is_rolled_back(pathlib.Path(tempfile.mkdtemp()))
+    test_migrate_keeps_concrete_tables_and_their_rows(pathlib.Path(tempfile.mkdtemp()))
+    test_migrate_drops_listed_legacy_columns(pathlib.Path(tempfile.mkdtemp()))
+    test_migrate_refuses_to_drop_a_primary_key(pathlib.Path(tempfile.mkdtemp()))
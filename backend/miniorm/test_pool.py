@@ -0,0 +1,90 @@
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.database import DatabaseEngine
+from miniorm.pool import ConnectionPool
+
+
+def _engine(pool_size=2, pool_timeout=1.0):
+    db_path = os.path.join(tempfile.mkdtemp(), "pool.sqlite")
+    return DatabaseEngine(db_path=db_path, pool_size=pool_size, pool_timeout=pool_timeout)
+
+
+def test_checkout_checkin_reuses_connections():
+    engine = _engine()
+    engine.execute("CREATE TABLE t (x INTEGER)")
+    for i in range(5):
+        engine.execute("INSERT INTO t (x) VALUES (?)", (i,))
+
+    status = engine.pool_status()
+    assert status["created"] == 1
+    assert status["checked_out"] == 0
+    assert status["idle"] == 1
+
+
+def test_pool_timeout_when_exhausted():
+    pool = ConnectionPool(object, size=1, timeout=0.05)
+    pool.checkout()
+    try:
+        pool.checkout()
+    except TimeoutError:
+        pass
+    else:
+        raise AssertionError("second checkout should time out")
+    assert pool.status()["waiting"] == 0
+
+
+def test_waiting_thread_gets_released_connection():
+    pool = ConnectionPool(object, size=1, timeout=2.0)
+    conn = pool.checkout()
+    got = []
+
+    t = threading.Thread(target=lambda: got.append(pool.checkout()))
+    t.start()
+    while pool.status()["waiting"] == 0:
+        pass
+    pool.checkin(conn)
+    t.join()
+
+    assert got == [conn]
+    assert pool.status()["created"] == 1
+
+
+def test_threads_read_in_parallel():
+    engine = _engine(pool_size=4)
+    engine.execute("CREATE TABLE t (x INTEGER)")
+    engine.execute("INSERT INTO t (x) VALUES (1)")
+
+    barrier = threading.Barrier(4)
+    results = []
+
+    def worker():
+        with engine.connect() as conn:
+            barrier.wait(timeout=2)
+            results.append(engine.execute("SELECT x FROM t", connection=conn)[0][0])
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == [1, 1, 1, 1]
+    assert engine.pool_status()["created"] == 4
+
+
+def test_memory_database_shares_one_connection():
+    engine = DatabaseEngine()
+    engine.execute("CREATE TABLE t (x INTEGER)")
+    engine.execute("INSERT INTO t (x) VALUES (1)")
+    assert engine.execute("SELECT COUNT(*) FROM t")[0][0] == 1
+
+
+if __name__ == "__main__":
+    test_checkout_checkin_reuses_connections()
+    test_pool_timeout_when_exhausted()
+    test_waiting_thread_gets_released_connection()
+    test_threads_read_in_parallel()
+    test_memory_database_shares_one_connection()
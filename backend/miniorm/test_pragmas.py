@@ -0,0 +1,65 @@
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.database import DatabaseEngine
+from miniorm.pragmas import PragmaProfile, PROFILES
+
+
+def _engine(**kwargs):
+    return DatabaseEngine(db_path=os.path.join(tempfile.mkdtemp(), "pragmas.sqlite"), **kwargs)
+
+
+def test_profile_is_applied_to_every_pooled_connection():
+    engine = _engine(profile="write_heavy", pool_size=2)
+    first, second = engine.acquire(), engine.acquire()
+    for connection in (first, second):
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert connection.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert connection.execute("PRAGMA busy_timeout").fetchone()[0] == 10000
+    engine.release(first)
+    engine.release(second)
+
+    status = engine.pragma_status()
+    assert status["profile"] == "write_heavy"
+    assert status["configured"] == PROFILES["write_heavy"].pragmas
+    assert status["actual"]["cache_size"] == -32000 and status["actual"]["temp_store"] == 2
+
+
+def test_default_profile_keeps_sqlite_defaults():
+    status = _engine().pragma_status()
+    assert status["profile"] == "default" and status["configured"] == {}
+    assert status["actual"]["journal_mode"] == "delete" and status["actual"]["foreign_keys"] == 0
+
+
+def test_foreign_keys_make_cascades_fire():
+    engine = _engine(profile="test")
+    engine.execute("CREATE TABLE parent (id INTEGER PRIMARY KEY)")
+    engine.execute("CREATE TABLE child (id INTEGER PRIMARY KEY, parent INTEGER REFERENCES parent(id) ON DELETE CASCADE)")
+    engine.execute("INSERT INTO parent (id) VALUES (1)")
+    engine.execute("INSERT INTO child (parent) VALUES (1)")
+    engine.execute("DELETE FROM parent")
+    assert engine.execute("SELECT COUNT(*) FROM child")[0][0] == 0
+
+
+def test_overrides_and_unknown_profiles():
+    engine = _engine(profile="read_heavy", pragmas={"foreign_keys": False})
+    assert engine.pragma_status()["actual"]["foreign_keys"] == 0
+    assert engine.pragma_status()["actual"]["mmap_size"] == 268435456
+
+    for bad in (lambda: _engine(profile="fast"), lambda: PragmaProfile("x", page_size=4096),
+                lambda: PragmaProfile("x", journal_mode="WAL; DROP TABLE t").statements()):
+        try:
+            bad()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    test_profile_is_applied_to_every_pooled_connection()
+    test_default_profile_keeps_sqlite_defaults()
+    test_foreign_keys_make_cascades_fire()
+    test_overrides_and_unknown_profiles()
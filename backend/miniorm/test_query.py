@@ -0,0 +1,508 @@
+import sys
+import os
+import gc
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.base import MiniBase
+from miniorm.orm_types import Text, Number, Relationship
+from miniorm.session import Session
+from miniorm.conftest import TracingEngine
+from miniorm.generator import SchemaGenerator
+from miniorm.options import joinedload, selectinload
+from miniorm.aggregates import func
+from miniorm.filters import col, or_
+from miniorm.builder import QueryBuilder
+from miniorm.query import Query
+from miniorm.states import ObjectState
+from miniorm.attributes import ColumnAttribute, RelationshipAttribute
+
+
+class Shelter(MiniBase):
+    shelter_id = Number(pk=True)
+    city = Text()
+    notes = Text(deferred=True)
+    class Meta:
+        table_name = "shelters"
+
+
+class Toy(MiniBase):
+    toy_id = Number(pk=True)
+    label = Text(collation="NOCASE", index=True)
+    class Meta:
+        table_name = "toys"
+
+
+class Hound(MiniBase):
+    hound_id = Number(pk=True)
+    name = Text()
+    age = Number()
+    shelter = Relationship("shelters", backref="hounds", r_type="many-to-one")
+    toys = Relationship("toys", r_type="many-to-many")
+    class Meta:
+        table_name = "hounds"
+
+
+class Vehicle(MiniBase):
+    vehicle_id = Number(pk=True)
+    wheels = Number()
+    class Meta:
+        table_name = "vehicles"
+        inheritance = "class"
+
+
+class Truck(Vehicle):
+    vehicle_id = Relationship(Vehicle, r_type="many-to-one")
+    load = Number()
+    class Meta:
+        table_name = "trucks"
+        inheritance = "class"
+
+
+class Delivery(MiniBase):
+    delivery_id = Number(pk=True)
+    truck = Relationship("trucks", r_type="many-to-one")
+    day = Text()
+    class Meta:
+        table_name = "deliveries"
+
+
+def _populate(tmp_path):
+    engine = TracingEngine(db_path=tmp_path / "query.sqlite")
+    SchemaGenerator().create_all(engine, MiniBase._registry)
+
+    session = Session(engine)
+    shelters = [Shelter(city=c, notes=f"{c} notes") for c in ("Oslo", "Lyon")]
+    toys = [Toy(label=l) for l in ("ball", "rope", "bone")]
+    for s in shelters + toys:
+        session.add(s)
+    for i in range(6):
+        hound = Hound(name=f"h{i}", age=i, shelter=shelters[i % 2])
+        hound.toys.extend(toys[:i % 3])
+        session.add(hound)
+    session.commit()
+    session.close()
+
+    engine.statements.clear()
+    return Session(engine), engine
+
+
+def test_joinedload_many_to_one_uses_one_select(tmp_path):
+    session, engine = _populate(tmp_path)
+    hounds = session.query(Hound).options(joinedload("shelter")).all()
+
+    assert {h.name: h.shelter.city for h in hounds} == {
+        "h0": "Oslo", "h1": "Lyon", "h2": "Oslo", "h3": "Lyon", "h4": "Oslo", "h5": "Lyon"
+    }
+    assert len(engine.selects()) == 1
+    assert "LEFT JOIN" in engine.selects()[0]
+    assert session.identity_map.get(Shelter, 1) is hounds[0].shelter
+
+
+def test_selectinload_one_to_many(tmp_path):
+    session, engine = _populate(tmp_path)
+    shelters = session.query(Shelter).options(selectinload("hounds")).all()
+
+    assert [sorted(h.name for h in s.hounds) for s in shelters] == [["h0", "h2", "h4"], ["h1", "h3", "h5"]]
+    assert len(engine.selects()) == 2
+
+
+def test_selectinload_many_to_many(tmp_path):
+    session, engine = _populate(tmp_path)
+    hounds = session.query(Hound).options(selectinload("toys"), joinedload("shelter")).all()
+
+    by_name = {h.name: h for h in hounds}
+    assert {name: sorted(t.label for t in h.toys) for name, h in by_name.items()} == {
+        "h0": [], "h1": ["ball"], "h2": ["ball", "rope"], "h3": [], "h4": ["ball"], "h5": ["ball", "rope"]
+    }
+    assert len(engine.selects()) == 2
+    assert by_name["h1"].toys[0] is by_name["h2"].toys[0]
+
+    by_name["h0"].toys.append(session.get(Toy, 3))
+    assert session._get_dirty_objects() == [by_name["h0"]]
+
+
+def test_selectinload_splits_long_in_lists(tmp_path):
+    session, engine = _populate(tmp_path)
+    Query.IN_CHUNK_SIZE = 1
+    try:
+        hounds = session.query(Hound).options(selectinload("toys"), selectinload("shelter")).all()
+        shelters = session.query(Shelter).options(selectinload("hounds")).all()
+    finally:
+        Query.IN_CHUNK_SIZE = 500
+
+    assert {h.name: (h.shelter.city, len(h.toys)) for h in hounds} == {
+        "h0": ("Oslo", 0), "h1": ("Lyon", 1), "h2": ("Oslo", 2), "h3": ("Lyon", 0), "h4": ("Oslo", 1), "h5": ("Lyon", 2)
+    }
+    assert [len(s.hounds) for s in shelters] == [3, 3]
+    # a query per hound for the toys and per shelter for either side of the relationship
+    assert len(engine.selects()) == 1 + 6 + 2 + 1 + 2
+
+
+def test_yield_per_streams_chunks(tmp_path):
+    session, engine = _populate(tmp_path)
+    chunks = []
+    iterate = session.iterate
+
+    def recording_iterate(sql, params=None, size=1000):
+        for rows in iterate(sql, params, size):
+            chunks.append(len(rows))
+            yield rows
+
+    session.iterate = recording_iterate
+    names = []
+    for hound in session.query(Hound).options(selectinload("toys")).yield_per(4):
+        names.append(hound.name)
+        assert isinstance(hound.__dict__["toys"], list)
+
+    assert sorted(names) == [f"h{i}" for i in range(6)]
+    assert chunks == [4, 2]
+    assert len(engine.selects()) == 3
+
+
+def test_streamed_objects_are_not_kept_alive(tmp_path):
+    session, engine = _populate(tmp_path)
+    for hound in session.query(Hound).yield_per(2):
+        hound.name
+    del hound
+    assert len(session.identity_map) == 0
+
+    kept = session.query(Hound).all()
+    assert len(session.identity_map) == 6
+    kept[0].name = "renamed"
+    del kept
+    session.commit()
+    assert [r[0] for r in engine.execute('SELECT name FROM "hounds" WHERE hound_id = 1')] == ["renamed"]
+
+
+def test_loaded_objects_stay_in_the_identity_map(tmp_path):
+    session, engine = _populate(tmp_path)
+    hound_id = session.query(Hound).filter(name="h1").first().hound_id
+    gc.collect()
+    engine.statements.clear()
+    hound = session.get(Hound, hound_id)
+    assert engine.selects() == []
+    assert session.query(Hound).filter(name="h1").first() is hound
+
+    # a streamed object returned again by a regular query is held from then on
+    streamed = [h for h in session.query(Hound).filter(name="h2").yield_per(1)]
+    assert session.query(Hound).filter(name="h2").all() == streamed
+    streamed_id = streamed[0].hound_id
+    del streamed
+    gc.collect()
+    assert session.identity_map.get(Hound, streamed_id).name == "h2"
+    assert len(session.identity_map) == 2
+
+
+def test_count_and_exists_do_not_hydrate(tmp_path):
+    session, engine = _populate(tmp_path)
+    assert session.query(Hound).count() == 6
+    assert session.query(Hound).filter(col("age") >= 4).count() == 2
+    assert session.query(Hound).limit(4).count() == 4
+    assert session.query(Hound).filter(name="h3").exists()
+    assert not session.query(Hound).filter(name="nobody").exists()
+    assert len(session.identity_map) == 0
+    assert all("COUNT" in s or "EXISTS" in s for s in engine.selects())
+
+
+def test_aggregates_and_group_by(tmp_path):
+    session, engine = _populate(tmp_path)
+    q = session.query(Hound)
+    assert q.sum("age") == 15
+    assert q.min("age") == 0 and q.max("age") == 5
+    assert q.avg("age") == 2.5
+    assert session.query(Hound).aggregate(func.count(), func.max("age")) == (6, 5)
+
+    per_shelter = session.query(Hound).group_by("shelter").aggregate(func.count(), func.sum("age"))
+    assert sorted(per_shelter) == [(1, 3, 6), (2, 3, 9)]
+    assert session.query(Hound).group_by("shelter").having(func.sum("age") > 7).sum("age") == [(2, 9)]
+    assert session.query(Hound).group_by("shelter").count() == 2
+    assert len(session.identity_map) == 0
+
+
+def test_offset_pagination_with_total(tmp_path):
+    session, engine = _populate(tmp_path)
+    page = session.query(Hound).filter(col("age") >= 1).paginate(page=2, per_page=2)
+    assert [h.hound_id for h in page] == [4, 5]
+    assert page.total == 5 and page.pages == 3
+    assert page.has_next
+
+    last = session.query(Hound).order_by("age", "DESC").offset(4).limit(10).all()
+    assert [h.age for h in last] == [1, 0]
+
+
+def test_keyset_pagination_follows_next_after(tmp_path):
+    session, engine = _populate(tmp_path)
+    seen = []
+    page = session.query(Hound).order_by("age", "DESC").paginate(per_page=4)
+    while True:
+        seen.extend(h.age for h in page)
+        if not page.has_next:
+            break
+        engine.statements.clear()
+        page = session.query(Hound).order_by("age", "DESC").paginate(per_page=4, after=page.next_after)
+        assert "OFFSET" not in engine.selects()[-1]
+    assert seen == [5, 4, 3, 2, 1, 0]
+
+
+def test_keyset_pagination_pages_through_nulls_and_duplicates(tmp_path):
+    session, engine = _populate(tmp_path)
+    for age in (None, 3, None, 3):
+        session.add(Hound(name="x", age=age))
+    session.commit()
+    hounds = session.query(Hound).all()
+    # SQLite sorts NULLs first, ties go by primary key
+    expected = {
+        "ASC": sorted(hounds, key=lambda h: (h.age is not None, h.age or 0, h.hound_id)),
+        "DESC": sorted(hounds, key=lambda h: (h.age is None, -(h.age or 0), -h.hound_id)),
+    }
+    for direction, rows in expected.items():
+        seen = []
+        page = session.query(Hound).order_by("age", direction).paginate(per_page=2)
+        while True:
+            seen.extend(page.items)
+            if not page.has_next:
+                break
+            page = session.query(Hound).order_by("age", direction).paginate(per_page=2, after=page.next_after)
+        assert [h.hound_id for h in seen] == [h.hound_id for h in rows]
+
+    try:
+        session.query(Hound).order_by("age").paginate(per_page=2, after=hounds[0].hound_id)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a bare primary key cannot continue a page ordered by another column")
+    page = session.query(Hound).paginate(per_page=2, after=hounds[1].hound_id)
+    assert [h.hound_id for h in page] == sorted(h.hound_id for h in hounds)[2:4]
+
+
+def test_repeated_query_shape_hits_statement_cache(tmp_path):
+    session, engine = _populate(tmp_path)
+    cache = QueryBuilder.select_cache
+    cache.clear()
+
+    for pk in (1, 2, 3):
+        assert session.get(Hound, pk).hound_id == pk
+    assert cache.info()["misses"] == 1 and cache.info()["hits"] == 2
+
+    def build(name, ages):
+        q = session.query(Hound).filter(or_(col("name").ilike(name), col("age").in_(ages)), shelter=1)
+        q.group_by("shelter").having(func.count() > 0).limit(5).offset(1)
+        return session.query_builder.build_select(
+            Hound._mapper, q.filters, filter_expressions=q.filter_expressions, limit=q._limit,
+            offset=q._offset, group_by=q._group_by, having=q._having, select=["shelter", func.count()]
+        )
+
+    compiled = build("%h%", [1, 2])
+    cached = build("%x%", [3, 4])
+    assert cached[0] == compiled[0]
+    assert compiled[1] == (1, "%h%", 1, 2, 0, 5, 1)
+    assert cached[1] == (1, "%x%", 3, 4, 0, 5, 1)
+    assert build("%h%", [1, 2, 3])[0] != compiled[0]
+
+
+def test_prefix_and_substring_search_use_nocase_index(tmp_path):
+    session, engine = _populate(tmp_path)
+    session.add(Toy(label="50%_Off Bone"))
+    session.commit()
+
+    assert sorted(t.label for t in session.query(Toy).filter(col("label").startswith("BO")).all()) == ["bone"]
+    assert [t.label for t in session.query(Toy).filter(col("label").contains("%_o")).all()] == ["50%_Off Bone"]
+    assert session.query(Toy).filter(col("label").contains("0_o")).count() == 0
+    assert "LOWER(" not in engine.selects()[-1]
+    # like() and ilike() are the same filter, SQLite's LIKE ignores ASCII case
+    assert session.query(Toy).filter(col("label").like("ROPE")).count() == 1
+    assert session.query(Toy).filter(col("label").ilike("ROPE")).count() == 1
+
+    sql, params = session.query_builder.build_select(
+        Toy._mapper, {}, filter_expressions=[col("label").startswith("bo")]
+    )
+    plan = engine.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    assert "SEARCH" in plan[-1][-1] and "ix_toys_label" in plan[-1][-1]
+
+
+def test_readonly_query_loads_untracked_objects(tmp_path):
+    session, engine = _populate(tmp_path)
+    hounds = session.query(Hound).readonly().options(joinedload("shelter"), selectinload("toys")).all()
+
+    assert len(hounds) == 6 and len(session.identity_map) == 0 and len(session._snapshots) == 0
+    assert {h._orm_state for h in hounds} == {ObjectState.DETACHED}
+    by_shelter = {}
+    for h in hounds:
+        by_shelter.setdefault(h.shelter.city, set()).add(id(h.shelter))
+        assert len(h.toys) == h.age % 3
+    assert {city: len(ids) for city, ids in by_shelter.items()} == {"Oslo": 1, "Lyon": 1}
+
+    hounds[0].name = "changed"
+    engine.statements.clear()
+    session.commit()
+    assert not [s for s in engine.statements if s.startswith("UPDATE")]
+
+    readonly = Session(engine, readonly=True)
+    assert readonly.get(Hound, hounds[0].hound_id).name == f"h{hounds[0].age}"
+    try:
+        readonly.add(Toy(label="kite"))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("read-only session should refuse add()")
+
+
+def test_projection_returns_rows_without_objects(tmp_path):
+    session, engine = _populate(tmp_path)
+    q = session.query(Hound).filter(col("age") >= 4).order_by("age")
+
+    assert q.values("name", "shelter.city") == [("h4", "Oslo"), ("h5", "Lyon")]
+    assert 'SELECT hounds."name", "eager_0"."city" FROM' in engine.selects()[-1]
+    assert len(session.identity_map) == 0
+
+    named = q.values("age", "shelter.city", row_type="named")
+    assert [(r.age, r.shelter_city) for r in named] == [(4, "Oslo"), (5, "Lyon")]
+    assert session.query(Hound).with_columns("name", "age", row_type="dict").filter(age=1).first() == {"name": "h1", "age": 1}
+
+    page = session.query(Hound).order_by("age").with_columns("hound_id", "age").paginate(per_page=4)
+    assert page.total == 6 and page.next_after == (3, page.items[-1][0])
+    assert sorted(tuple(r) for r in session.query(Hound).with_columns("age").yield_per(2)) == [(i,) for i in range(6)]
+
+    for bad in ("weight", "toys.label", "shelter.size"):
+        try:
+            q.values(bad)
+        except (AttributeError, ValueError):
+            pass
+        else:
+            raise AssertionError(f"{bad} should be rejected")
+
+
+def test_projection_reads_inherited_columns_of_the_target(tmp_path):
+    session, engine = _populate(tmp_path)
+    truck = Truck(wheels=6, load=10)
+    session.add(truck)
+    session.commit()
+    session.add(Delivery(day="mon", truck=truck))
+    session.add(Delivery(day="tue"))
+    session.commit()
+
+    rows = session.query(Delivery).order_by("day").values("day", "truck.wheels", "truck.load")
+    assert rows == [("mon", 6, 10), ("tue", None, None)]
+    assert '"vehicles" AS "eager_0_1"' in engine.selects()[-1]
+
+
+def test_deferred_columns_load_in_one_batch(tmp_path):
+    session, engine = _populate(tmp_path)
+    shelters = session.query(Shelter).all()
+    assert '"notes"' not in engine.selects()[-1]
+    engine.statements.clear()
+    assert sorted(s.notes for s in shelters) == ["Lyon notes", "Oslo notes"]
+    assert len(engine.selects()) == 1
+
+    hounds = session.query(Hound).load_only("name").all()
+    assert '"age"' not in engine.selects()[-1] and '"shelter"' in engine.selects()[-1]
+    engine.statements.clear()
+    assert sorted(h.age for h in hounds) == list(range(6))
+    assert len(engine.selects()) == 1 and not session._get_dirty_objects()
+
+    hounds[0].age = 42
+    session.commit()
+    assert session.query(Hound).filter(age=42).values("name") == [(hounds[0].name,)]
+    assert session.query(Shelter).defer("city").load_only("city")._deferred == {"notes"}
+    for bad in (lambda: session.query(Hound).defer("shelter"), lambda: session.query(Hound).load_only("weight")):
+        try:
+            bad()
+        except (AttributeError, ValueError):
+            pass
+        else:
+            raise AssertionError("expected the column to be rejected")
+
+
+def test_lazy_many_to_many_loads_only_linked_rows(tmp_path):
+    session, engine = _populate(tmp_path)
+    hound = session.query(Hound).filter(age=2).first()
+    assert sorted(t.label for t in hound.toys) == ["ball", "rope"]
+
+
+def test_hydrator_is_compiled_once_per_layout(tmp_path):
+    session, engine = _populate(tmp_path)
+    Hound._mapper._hydrators.clear()
+    hounds = session.query(Hound).filter(col("age") < 3).all()
+    hydrators = dict(Hound._mapper._hydrators)
+    session.query(Hound).filter(name="h4").all()
+    assert Hound._mapper._hydrators == hydrators and len(hydrators) == 1
+
+    assert sorted(h.name for h in hounds) == ["h0", "h1", "h2"]
+    assert hounds[0].type == "Hound" and hounds[0]._orm_state == ObjectState.PERSISTENT
+    assert "toys" not in hounds[0].__dict__
+
+
+def test_hydrator_dispatches_subclass_by_position():
+    Vehicle._mapper.finalize_mappers()
+    hydrate = Vehicle._mapper.row_hydrator(["vehicle_id", "wheels", "trucks#vehicle_id", "load"])
+    vehicle = hydrate((1, 4, None, None))
+    truck = hydrate((2, 6, 2, 12))
+
+    assert type(vehicle) is Vehicle and vehicle.__dict__["wheels"] == 4
+    assert "load" not in vehicle.__dict__
+    assert type(truck) is Truck and truck.type == "Truck"
+    assert (truck.__dict__["vehicle_id"], truck.__dict__["load"]) == (2, 12)
+
+
+def test_engine_returns_tuples_with_column_names(tmp_path):
+    session, engine = _populate(tmp_path)
+    rows = engine.execute('SELECT name, age AS years FROM "hounds" ORDER BY name LIMIT 2')
+    assert rows == [("h0", 0), ("h1", 1)] and type(rows[0]) is tuple
+    assert rows.columns == ("name", "years") and rows.index_of("years") == 1
+    assert rows.dicts()[1] == {"name": "h1", "years": 1}
+
+
+def test_attributes_are_descriptors(tmp_path):
+    assert "__getattribute__" not in MiniBase.__dict__
+    assert isinstance(Hound.__dict__["name"], ColumnAttribute) and isinstance(Hound.name, Text)
+    assert isinstance(Shelter.__dict__["hounds"], RelationshipAttribute)
+    assert isinstance(Vehicle.__dict__["wheels"], ColumnAttribute)
+    assert type(Truck.__dict__["vehicle_id"]) is ColumnAttribute
+
+    fresh = Hound(name="pup")
+    assert fresh.age is None and fresh.shelter is None and fresh.toys == []
+
+    session, engine = _populate(tmp_path)
+    hound = session.query(Hound).filter(name="h3").first()
+    assert hound.name == "h3" and hound.__dict__["shelter"] == 2
+    assert len(engine.selects()) == 1
+    assert hound.shelter.city == "Lyon" and hound.shelter is session.get(Shelter, 2)
+    assert sorted(h.name for h in hound.shelter.hounds) == ["h1", "h3", "h5"]
+
+
+def test_unknown_option_is_rejected(tmp_path):
+    session, engine = _populate(tmp_path)
+    try:
+        session.query(Hound).options(joinedload("owner"))
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("unknown relationship should be rejected")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_joinedload_many_to_one_uses_one_select(pathlib.Path(tempfile.mkdtemp()))
+    test_selectinload_one_to_many(pathlib.Path(tempfile.mkdtemp()))
+    test_selectinload_many_to_many(pathlib.Path(tempfile.mkdtemp()))
+    test_selectinload_splits_long_in_lists(pathlib.Path(tempfile.mkdtemp()))
+    test_yield_per_streams_chunks(pathlib.Path(tempfile.mkdtemp()))
+    test_streamed_objects_are_not_kept_alive(pathlib.Path(tempfile.mkdtemp()))
+    test_loaded_objects_stay_in_the_identity_map(pathlib.Path(tempfile.mkdtemp()))
+    test_count_and_exists_do_not_hydrate(pathlib.Path(tempfile.mkdtemp()))
+    test_aggregates_and_group_by(pathlib.Path(tempfile.mkdtemp()))
+    test_offset_pagination_with_total(pathlib.Path(tempfile.mkdtemp()))
+    test_keyset_pagination_follows_next_after(pathlib.Path(tempfile.mkdtemp()))
+    test_keyset_pagination_pages_through_nulls_and_duplicates(pathlib.Path(tempfile.mkdtemp()))
+    test_repeated_query_shape_hits_statement_cache(pathlib.Path(tempfile.mkdtemp()))
+    test_prefix_and_substring_search_use_nocase_index(pathlib.Path(tempfile.mkdtemp()))
+    test_readonly_query_loads_untracked_objects(pathlib.Path(tempfile.mkdtemp()))
+    test_projection_returns_rows_without_objects(pathlib.Path(tempfile.mkdtemp()))
+    test_projection_reads_inherited_columns_of_the_target(pathlib.Path(tempfile.mkdtemp()))
+    test_deferred_columns_load_in_one_batch(pathlib.Path(tempfile.mkdtemp()))
+    test_lazy_many_to_many_loads_only_linked_rows(pathlib.Path(tempfile.mkdtemp()))
+    test_hydrator_is_compiled_once_per_layout(pathlib.Path(tempfile.mkdtemp()))
+    test_hydrator_dispatches_subclass_by_position()
+    test_engine_returns_tuples_with_column_names(pathlib.Path(tempfile.mkdtemp()))
+    test_attributes_are_descriptors(pathlib.Path(tempfile.mkdtemp()))
+    test_unknown_option_is_rejected(pathlib.Path(tempfile.mkdtemp()))
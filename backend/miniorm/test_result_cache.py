@@ -0,0 +1,89 @@
+import sys
+import os
+import sqlite3
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.base import MiniBase
+from miniorm.orm_types import Text, Number, Relationship
+from miniorm.conftest import TracingEngine
+from miniorm.generator import SchemaGenerator
+from miniorm.session_factory import SessionMaker
+from miniorm.result_cache import ResultCache, tables_read, table_written
+from miniorm.filters import col
+
+
+class Device(MiniBase):
+    device_id = Number(pk=True)
+    label = Text()
+    class Meta:
+        table_name = "devices"
+        inheritance = "class"
+
+
+class Phone(Device):
+    device_id = Relationship(Device, r_type="many-to-one")
+    number = Text()
+    class Meta:
+        table_name = "phones"
+        inheritance = "class"
+
+
+def _factory(tmp_path):
+    engine = TracingEngine(db_path=tmp_path / "results.sqlite", result_cache=ResultCache())
+    SchemaGenerator().create_all(engine, MiniBase._registry)
+    factory = SessionMaker(engine)
+    with factory.begin() as session:
+        session.add(Phone(label="work", number="111"))
+        session.add(Phone(label="home", number="222"))
+    engine.statements.clear()
+    return factory, engine
+
+
+def _labels(factory):
+    with factory.begin() as session:
+        return sorted(p.label for p in session.query(Phone).filter(col("number") != "0").all())
+
+
+def test_tables_read_include_joins_and_parents():
+    sql = ('SELECT trucks."load", vehicles."wheels" FROM "trucks" JOIN vehicles ON trucks."id" = vehicles."id" '
+           'LEFT JOIN "shelters" AS "eager_0" ON 1 WHERE x IN (SELECT id FROM "toys")')
+    assert tables_read(sql) == ("shelters", "toys", "trucks", "vehicles")
+    assert tables_read('UPDATE "toys" SET "label" = ?') == ()
+    assert table_written('UPDATE "toys" SET "label" = ?') == "toys"
+    assert table_written('INSERT OR IGNORE INTO "hounds_toys" ("a") VALUES (?)') == "hounds_toys"
+    assert table_written("SELECT 1") is None
+
+
+def test_repeated_select_is_served_from_cache(tmp_path):
+    factory, engine = _factory(tmp_path)
+    assert _labels(factory) == ["home", "work"]
+    assert _labels(factory) == ["home", "work"]
+    assert len(engine.selects()) == 1
+    assert engine.result_cache.info()["hits"] == 1
+
+
+def test_write_to_parent_table_invalidates(tmp_path):
+    factory, engine = _factory(tmp_path)
+    _labels(factory)
+    with factory.begin() as session:
+        # a Device-level column lives in the parent table only
+        session.query(Phone).filter(number="111").first().label = "office"
+    assert engine.result_cache.info()["invalidations"] >= 1
+    assert _labels(factory) == ["home", "office"]
+
+
+def test_other_connection_is_noticed_by_data_version(tmp_path):
+    factory, engine = _factory(tmp_path)
+    _labels(factory)
+    other = sqlite3.connect(engine.db_path, isolation_level=None)
+    other.execute('UPDATE "devices" SET "label" = ? WHERE "label" = ?', ("mobile", "home"))
+    other.close()
+    assert _labels(factory) == ["mobile", "work"]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_tables_read_include_joins_and_parents()
+    test_repeated_select_is_served_from_cache(pathlib.Path(tempfile.mkdtemp()))
+    test_write_to_parent_table_invalidates(pathlib.Path(tempfile.mkdtemp()))
+    test_other_connection_is_noticed_by_data_version(pathlib.Path(tempfile.mkdtemp()))
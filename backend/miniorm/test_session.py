@@ -0,0 +1,271 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.base import MiniBase
+from miniorm.orm_types import Text, Number, Relationship
+from miniorm.session import Session
+from miniorm.conftest import TracingEngine
+from miniorm.generator import SchemaGenerator
+from miniorm.transactions import InsertTransaction
+
+
+class Keeper(MiniBase):
+    keeper_id = Number(pk=True)
+    name = Text()
+    perches = Relationship("perches", r_type="many-to-many")
+    class Meta:
+        table_name = "keepers"
+
+
+class Perch(MiniBase):
+    perch_id = Number(pk=True)
+    height = Number()
+    class Meta:
+        table_name = "perches"
+
+
+class Creature(MiniBase):
+    creature_id = Number(pk=True)
+    name = Text()
+    class Meta:
+        table_name = "creatures"
+        inheritance = "class"
+
+
+class Bird(Creature):
+    creature_id = Relationship(Creature, r_type="many-to-one")
+    wingspan = Number()
+    keeper = Relationship("keepers", backref="birds", r_type="many-to-one")
+    class Meta:
+        table_name = "birds"
+        inheritance = "class"
+
+
+class Lock(MiniBase):
+    lock_id = Number(pk=True)
+    key = Relationship("keys", backref="locks", r_type="many-to-one")
+    class Meta:
+        table_name = "locks"
+
+
+class Key(MiniBase):
+    key_id = Number(pk=True)
+    lock = Relationship("locks", backref="keys", r_type="many-to-one")
+    class Meta:
+        table_name = "keys"
+
+
+class Nest(MiniBase):
+    nest_id = Number(pk=True)
+    eggs = Number(default=0)
+    built = Text(server_default="CURRENT_TIMESTAMP")
+    class Meta:
+        table_name = "nests"
+
+
+def _session(tmp_path):
+    engine = TracingEngine(db_path=tmp_path / "session.sqlite")
+    SchemaGenerator().create_all(engine, MiniBase._registry)
+    engine.statements.clear()
+    return Session(engine), engine
+
+
+def test_bulk_insert_assigns_primary_keys(tmp_path):
+    session, engine = _session(tmp_path)
+    keepers = [Keeper(name=f"k{i}") for i in range(50)]
+    for k in keepers:
+        session.add(k)
+    session.commit()
+
+    assert [k.keeper_id for k in keepers] == list(range(1, 51))
+    assert session.identity_map.get(Keeper, 7) is keepers[6]
+    rows = engine.execute('SELECT keeper_id, name FROM "keepers" ORDER BY keeper_id')
+    assert [tuple(r) for r in rows] == [(i + 1, f"k{i}") for i in range(50)]
+
+
+def test_class_inheritance_bulk_insert_chains_parent_keys(tmp_path):
+    session, engine = _session(tmp_path)
+    keeper = Keeper(name="Ada")
+    birds = [Bird(name=f"b{i}", wingspan=i, keeper=keeper) for i in range(10)]
+    session.add(keeper)
+    for b in birds:
+        session.add(b)
+    session.commit()
+
+    ids = [b.creature_id for b in birds]
+    assert len(set(ids)) == 10 and None not in ids
+    rows = engine.execute(
+        'SELECT c.creature_id, c.name, b.wingspan, b.keeper FROM "creatures" c '
+        'JOIN "birds" b ON b.creature_id = c.creature_id ORDER BY c.creature_id'
+    )
+    assert [tuple(r) for r in rows] == [
+        (b.creature_id, b.name, b.wingspan, keeper.keeper_id) for b in birds
+    ]
+
+
+def test_only_changed_objects_are_dirty(tmp_path):
+    session, engine = _session(tmp_path)
+    for i in range(20):
+        session.add(Keeper(name=f"k{i}"))
+    session.commit()
+
+    keepers = session.query(Keeper).all()
+    assert session._get_dirty_objects() == []
+
+    keepers[3].name = "renamed"
+    keepers[4].name = keepers[4].name
+    assert list(session._dirty) == [id(keepers[3]), id(keepers[4])]
+    assert session._get_dirty_objects() == [keepers[3]]
+
+    engine.statements.clear()
+    session.commit()
+    updates = [s for s in engine.statements if s.startswith("UPDATE")]
+    assert len(updates) == 1 and "renamed" in updates[0]
+    assert session._dirty == {}
+
+
+def test_inherited_column_assignment_is_flushed(tmp_path):
+    session, engine = _session(tmp_path)
+    bird = Bird(name="Kea", wingspan=90)
+    session.add(bird)
+    session.commit()
+
+    # name lives in the parent table only
+    bird.name = "Kaka"
+    assert session._get_dirty_objects() == [bird]
+    session.commit()
+
+    rows = engine.execute('SELECT name FROM "creatures" WHERE creature_id = ?', (bird.creature_id,))
+    assert [tuple(r) for r in rows] == [("Kaka",)]
+
+
+def test_collection_mutation_marks_owner_dirty(tmp_path):
+    session, engine = _session(tmp_path)
+    keeper = Keeper(name="Ada")
+    perch = Perch(height=3)
+    session.add(keeper)
+    session.add(perch)
+    session.commit()
+
+    keeper.perches.append(perch)
+    assert session._get_dirty_objects() == [keeper]
+    session.commit()
+
+    rows = engine.execute('SELECT * FROM "keepers_perches"')
+    assert [tuple(r) for r in rows] == [(keeper.keeper_id, perch.perch_id)]
+
+
+def test_unit_of_work_dedup_and_cancel(tmp_path):
+    session, engine = _session(tmp_path)
+    keepers = [Keeper(name=f"k{i}") for i in range(5)]
+    for k in keepers:
+        session.add(k)
+        session.add(k)
+    assert len(session.unit_of_work) == 5
+
+    session.delete(keepers[2])
+    assert len(session.unit_of_work) == 4
+    assert not session.unit_of_work.contains(keepers[2], InsertTransaction)
+    session.commit()
+
+    names = [r[0] for r in engine.execute('SELECT name FROM "keepers" ORDER BY keeper_id')]
+    assert names == ["k0", "k1", "k3", "k4"]
+
+
+def test_flush_orders_parents_before_children(tmp_path):
+    session, engine = _session(tmp_path)
+    keeper = Keeper(name="Ada")
+    birds = [Bird(name=f"b{i}", keeper=keeper) for i in range(3)]
+    for b in birds:
+        session.add(b)
+
+    ordered = [t.entity for t in session._sort_unit_of_work()]
+    assert ordered == [keeper] + birds
+    session.commit()
+    assert all(b.keeper.keeper_id == keeper.keeper_id for b in birds)
+
+
+def test_cascade_deletes_children_before_parents(tmp_path):
+    session, engine = _session(tmp_path)
+    keeper = Keeper(name="Ada")
+    session.add(keeper)
+    for i in range(3):
+        session.add(Bird(name=f"b{i}", keeper=keeper))
+    session.commit()
+
+    birds = list(keeper.birds)
+    engine.statements.clear()
+    session.delete(keeper)
+    session.commit()
+
+    selects = [s for s in engine.statements if s.startswith("SELECT")]
+    assert len(selects) == 1
+    deletes = [s for s in engine.statements if s.startswith("DELETE")]
+    assert deletes == [
+        'DELETE FROM "birds" WHERE "creature_id" IN (1, 2, 3)',
+        'DELETE FROM "creatures" WHERE "creature_id" IN (1, 2, 3)',
+        'DELETE FROM "keepers_perches" WHERE "keeper_id" IN (1)',
+        'DELETE FROM "keepers" WHERE "keeper_id" IN (1)',
+    ]
+    assert all(b._orm_state.name == "DELETED" for b in birds)
+    assert engine.execute('SELECT COUNT(*) FROM "creatures"')[0][0] == 0
+
+
+def test_flush_does_not_reselect_inserted_rows(tmp_path):
+    session, engine = _session(tmp_path)
+    keepers = [Keeper(name=f"k{i}") for i in range(10)]
+    for k in keepers:
+        session.add(k)
+    session.commit()
+
+    assert [s for s in engine.statements if s.startswith("SELECT") and "last_insert_rowid" not in s] == []
+    keepers[0].name = "renamed"
+    engine.statements.clear()
+    session.commit()
+    assert not [s for s in engine.statements if s.startswith("SELECT")]
+
+
+def test_defaults_filled_without_refresh(tmp_path):
+    session, engine = _session(tmp_path)
+    nests = [Nest(), Nest(eggs=3)]
+    for n in nests:
+        session.add(n)
+    session.commit()
+
+    assert [n.eggs for n in nests] == [0, 3]
+    assert all(n.built for n in nests)
+    selects = [s for s in engine.statements if s.startswith('SELECT "nest_id", "built"')]
+    assert len(selects) == 1
+    rows = engine.execute('SELECT eggs FROM "nests" ORDER BY nest_id')
+    assert [r[0] for r in rows] == [0, 3]
+
+
+def test_dependency_cycle_is_reported(tmp_path):
+    session, engine = _session(tmp_path)
+    lock, key = Lock(), Key()
+    lock.key = key
+    key.lock = lock
+    session.add(lock)
+    try:
+        session.flush()
+    except RuntimeError as e:
+        assert "cycle" in str(e)
+    else:
+        raise AssertionError("flush should fail on a dependency cycle")
+    assert lock._orm_state.name == "TRANSIENT"
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_bulk_insert_assigns_primary_keys(pathlib.Path(tempfile.mkdtemp()))
+    test_class_inheritance_bulk_insert_chains_parent_keys(pathlib.Path(tempfile.mkdtemp()))
+    test_only_changed_objects_are_dirty(pathlib.Path(tempfile.mkdtemp()))
+    test_inherited_column_assignment_is_flushed(pathlib.Path(tempfile.mkdtemp()))
+    test_collection_mutation_marks_owner_dirty(pathlib.Path(tempfile.mkdtemp()))
+    test_unit_of_work_dedup_and_cancel(pathlib.Path(tempfile.mkdtemp()))
+    test_flush_orders_parents_before_children(pathlib.Path(tempfile.mkdtemp()))
+    test_cascade_deletes_children_before_parents(pathlib.Path(tempfile.mkdtemp()))
+    test_flush_does_not_reselect_inserted_rows(pathlib.Path(tempfile.mkdtemp()))
+    test_defaults_filled_without_refresh(pathlib.Path(tempfile.mkdtemp()))
+    test_dependency_cycle_is_reported(pathlib.Path(tempfile.mkdtemp()))
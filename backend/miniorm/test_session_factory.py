@@ -0,0 +1,107 @@
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from miniorm.base import MiniBase
+from miniorm.orm_types import Text, Number
+from miniorm.mapper import Mapper
+from miniorm.database import DatabaseEngine
+from miniorm.generator import SchemaGenerator
+from miniorm.session_factory import SessionMaker, ScopedSession
+
+
+class Ticket(MiniBase):
+    ticket_id = Number(pk=True)
+    title = Text()
+    class Meta:
+        table_name = "tickets"
+
+
+def _factory():
+    db_path = os.path.join(tempfile.mkdtemp(), "factory.sqlite")
+    engine = DatabaseEngine(db_path=db_path)
+    SchemaGenerator().create_all(engine, MiniBase._registry)
+    return SessionMaker(engine), engine
+
+
+def test_sessions_are_independent():
+    factory, engine = _factory()
+    first, second = factory(), factory()
+    assert first is not second
+
+    first.add(Ticket(title="open"))
+    assert len(second.unit_of_work) == 0
+    first.commit()
+    first.close()
+    second.close()
+    assert engine.pool_status()["checked_out"] == 0
+
+
+def test_begin_commits_or_rolls_back():
+    factory, engine = _factory()
+    with factory.begin() as session:
+        session.add(Ticket(title="kept"))
+
+    try:
+        with factory.begin() as session:
+            session.add(Ticket(title="dropped"))
+            session.flush()
+            raise ValueError("request failed")
+    except ValueError:
+        pass
+
+    titles = [r[0] for r in engine.execute('SELECT title FROM "tickets"')]
+    assert titles == ["kept"]
+    assert engine.pool_status()["checked_out"] == 0
+
+
+def test_scoped_session_is_per_thread():
+    factory, engine = _factory()
+    scoped = ScopedSession(factory)
+    assert scoped() is scoped()
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(scoped()))
+    t.start()
+    t.join()
+    assert other[0] is not scoped()
+
+    current = scoped()
+    scoped.remove()
+    assert not scoped.has_session()
+    assert scoped() is not current
+
+
+def test_finalize_runs_once_per_registration():
+    factory, engine = _factory()
+    factory()
+    assert Mapper._finalized
+
+    calls = []
+    original = Mapper._finalize
+    Mapper._finalize = staticmethod(lambda: calls.append(1) or original())
+    try:
+        factory()
+        factory()
+        assert calls == []
+
+        class Comment(MiniBase):
+            comment_id = Number(pk=True)
+            class Meta:
+                table_name = "comments"
+
+        assert not Mapper._finalized
+        factory()
+        factory()
+        assert calls == [1]
+    finally:
+        Mapper._finalize = staticmethod(original)
+        MiniBase._registry.pop(Comment, None)
+
+
+if __name__ == "__main__":
+    test_sessions_are_independent()
+    test_begin_commits_or_rolls_back()
+    test_scoped_session_is_per_thread()
+    test_finalize_runs_once_per_registration()
@@ -4,6 +4,12 @@ class Transaction(ABC):
     def __init__(self, session, entity):
         self.session = session
         self.entity = entity
+        self.mapper = entity._mapper
+
+    @property
+    def key(self):
+        """Identity of this transaction in the unit of work."""
+        return (id(self.entity), type(self))
 
     @abstractmethod
     def prepare(self):
@@ -18,6 +24,7 @@ class Transaction(ABC):
 class InsertTransaction(Transaction):
     def prepare(self):
         mapper = self.entity._mapper
+        mapper.apply_defaults(self.entity)
 
         operations = mapper.prepare_insert(self.entity)
         fk_from_parent = operations.pop("_fk_from_parent", None)  # { table_name: fk_column_name }
@@ -34,7 +41,7 @@ class InsertTransaction(Transaction):
 class UpdateTransaction(Transaction):
     def prepare(self):
         mapper = self.entity._mapper
-        old_state = self.session._snapshots.get(id(self.entity))
+        old_state = self.session._snapshots.get(self.entity)
         operations = mapper.prepare_update(self.entity, old_state)
         results = []
 
@@ -44,13 +51,39 @@ class UpdateTransaction(Transaction):
         return results
 
 class DeleteTransaction(Transaction):
+    """
+    Deletes a set of rows of one mapped class by primary key.
+
+    The session plans cascades and merges every row of a class into one
+    transaction, so rows are removed with DELETE ... WHERE pk IN (...).
+    """
+    CHUNK_SIZE = 500
+
+    def __init__(self, session, mapper):
+        self.session = session
+        self.entity = None
+        self.mapper = mapper
+        self.pks = {}
+        self.entities = []
+
+    @property
+    def key(self):
+        return (id(self.mapper), type(self))
+
+    def add(self, pks, entities=()):
+        self.pks.update(dict.fromkeys(pks))
+        self.entities.extend(entities)
+
     def prepare(self):
-        mapper = self.entity._mapper
-        operations = mapper.prepare_delete(self.entity)
-        
+        pks = list(self.pks)
         results = []
 
-        for table_name, data in operations.items():
-            results.append({"table_name": table_name, "data": data})
+        for start in range(0, len(pks), self.CHUNK_SIZE):
+            operations = self.mapper.prepare_delete(pks[start:start + self.CHUNK_SIZE])
+            # association rows reference the deleted rows, remove them first
+            for assoc_table, local_key, chunk in operations.pop("_m2m_cleanup", []):
+                results.append({"table_name": assoc_table, "data": {"_pk": {local_key: chunk}}})
+            for table_name, data in operations.items():
+                results.append({"table_name": table_name, "data": data})
 
-        return results
\ No newline at end of file
+        return results
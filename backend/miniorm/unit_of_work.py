@@ -0,0 +1,40 @@
+class UnitOfWork:
+    """
+    Pending transactions indexed by (entity identity, transaction type).
+    Deletes are queued once per mapped class, so they are looked up by mapper.
+
+    Membership checks, deduplication and cancellation are dict operations.
+    Iteration follows queueing order, which is the stream flush sorts and runs.
+    """
+    def __init__(self):
+        self._transactions = {}
+
+    def append(self, transaction):
+        """Queue a transaction. Returns False if one of that type is already queued for the entity."""
+        key = transaction.key
+        if key in self._transactions:
+            return False
+        self._transactions[key] = transaction
+        return True
+
+    def contains(self, entity, transaction_type):
+        return (id(entity), transaction_type) in self._transactions
+
+    def get(self, entity, transaction_type):
+        return self._transactions.get((id(entity), transaction_type))
+
+    def discard(self, entity, transaction_type):
+        """Cancel the queued transaction of that type for the entity and return it (or None)."""
+        return self._transactions.pop((id(entity), transaction_type), None)
+
+    def clear(self):
+        self._transactions.clear()
+
+    def __iter__(self):
+        return iter(list(self._transactions.values()))
+
+    def __len__(self):
+        return len(self._transactions)
+
+    def __bool__(self):
+        return bool(self._transactions)
@@ -8,9 +8,9 @@ class Person(MiniBase):
         discriminator = "person_type"
         discriminator_value = "person"
     person_id = Number(pk=True)
-    first_name = Text()
-    last_name = Text()
-    email = Text()
+    first_name = Text(collation="NOCASE")
+    last_name = Text(collation="NOCASE", index=True)
+    email = Text(collation="NOCASE", index=True)
     phone = Text()
 
 
@@ -19,13 +19,14 @@ class Owner(Person):
         table_name = "owners"
         inheritance = "CONCRETE"
         discriminator_value = "owner"
-    password = Text()
+    password = Text(deferred=True)
 
 class Vet(Person):
     class Meta:
         table_name = "vets"
         inheritance = "CONCRETE"
         discriminator_value = "vet"
+        cache = True
     license = Text()
 
 class Pet(MiniBase):
@@ -33,8 +34,8 @@ class Pet(MiniBase):
         table_name = "pets"
     pet_id = Number(pk=True)
     owner = Relationship("owners", backref="pets", r_type="many-to-one", cascade_delete=True)
-    name = Text()
-    species = Text()
+    name = Text(collation="NOCASE", index=True)
+    species = Text(collation="NOCASE")
     breed = Text()
     birth_date = Text()
 
@@ -43,9 +44,9 @@ class Visit(MiniBase):
         table_name = "visits"
     visit_id = Number(pk=True)
     pet = Relationship("pets", backref="visits", r_type="many-to-one", cascade_delete=True)
-    vet = Relationship("owners", backref="visits", r_type="many-to-one", cascade_delete=True)
+    vet = Relationship("vets", backref="visits", r_type="many-to-one", cascade_delete=True)
     procedures = Relationship("procedures", backref="visits", r_type="many-to-many")
-    date = Text()
+    date = Text(index=True)
     reason = Text()
     paid = Number()
 
@@ -53,7 +54,8 @@ class Visit(MiniBase):
 class Procedure(MiniBase):
     class Meta:
         table_name = "procedures"
+        cache = True
     procedure_id = Number(pk=True)
-    name = Text()
+    name = Text(collation="NOCASE", index=True)
     description = Text()
     price = Number()
\ No newline at end of file
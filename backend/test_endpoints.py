@@ -0,0 +1,71 @@
+import sys
+import os
+import shutil
+import importlib
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from fastapi.testclient import TestClient
+
+
+def _client(tmp_path):
+    """The app on a copy of the shipped database, migrated at import like the real one."""
+    db_path = tmp_path / "miniorm.sqlite"
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), "miniorm.sqlite"), db_path)
+    os.environ["MINIORM_DB"] = str(db_path)
+    try:
+        main = importlib.reload(sys.modules["main"]) if "main" in sys.modules else importlib.import_module("main")
+    finally:
+        del os.environ["MINIORM_DB"]
+    return TestClient(main.app)
+
+
+def test_add_visit_with_a_vet(tmp_path):
+    client = _client(tmp_path)
+    owner = client.post("/api/owners", json={
+        "first_name": "Ann", "last_name": "Lee", "email": "ann@lee.pl", "phone": "100", "password": "x",
+    }).json()
+    vet = client.post("/api/vets", json={
+        "first_name": "Bob", "last_name": "Kowal", "email": "bob@vet.pl", "phone": "200", "license": "L-1",
+    }).json()
+    pet = client.post("/api/pets", json={
+        "owner_id": owner["owner_id"], "name": "Rex", "species": "dog", "breed": "mutt", "birth_date": "2020-01-01",
+    }).json()
+
+    response = client.post("/api/visits", json={
+        "pet_id": pet["pet_id"], "vet_id": vet["vet_id"], "date": "2026-01-05", "reason": "checkup", "paid": 0,
+    })
+
+    assert response.status_code == 200
+    assert response.json()["vet_id"] == vet["vet_id"]
+    visits = client.get("/api/visits", params={"vet_id": vet["vet_id"]}).json()
+    assert [(v["pet_id"], v["vet_id"]) for v in visits] == [(pet["pet_id"], vet["vet_id"])]
+
+
+def test_keyset_paging_through_null_and_equal_prices(tmp_path):
+    client = _client(tmp_path)
+    for name, price in [("a", None), ("b", 50), ("c", None), ("d", 50), ("e", 20)]:
+        body = {"name": name} if price is None else {"name": name, "price": price}
+        client.post("/api/procedures", json=body)
+
+    names = []
+    params = {"order_by": "price", "per_page": 2, "page": 1}
+    while True:
+        response = client.get("/api/procedures", params=params)
+        names.extend(p["name"] for p in response.json())
+        if "X-Next-After-Id" not in response.headers:
+            break
+        params = {"order_by": "price", "per_page": 2, "after_id": response.headers["X-Next-After-Id"]}
+        if "X-Next-After-Null" in response.headers:
+            params["after_null"] = "true"
+        else:
+            params["after"] = response.headers["X-Next-After"]
+    assert names == ["a", "c", "e", "b", "d"]
+
+    response = client.get("/api/procedures", params={"order_by": "price", "after_id": 1})
+    assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_add_visit_with_a_vet(pathlib.Path(tempfile.mkdtemp()))
+    test_keyset_paging_through_null_and_equal_prices(pathlib.Path(tempfile.mkdtemp()))